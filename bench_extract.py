@@ -0,0 +1,128 @@
+"""Сравнение extract.extract с цепочками локаторов на сохранённых страницах.
+
+    python bench_extract.py workflows.litnet_com:LitnetItem saved/litnet_*.html
+
+Для каждой страницы поля воркфлоу (`cls.fields`) достаются трижды: как
+раньше, локаторами (count, потом text_content/all/get_attribute на каждый
+элемент), одним evaluate и разбором `page.content()` в процессе
+(`extract.Document`). Печатает число обращений в браузер (считаются в
+местах вызова, по одному на каждый await к странице), время и поля, где
+результаты разошлись с локаторами.
+"""
+import asyncio
+import importlib
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, TypeVar
+from urllib.parse import urljoin
+
+from camoufox.async_api import AsyncCamoufox
+from playwright.async_api import Page
+
+from extract import Document, Field, extract, postprocess
+
+T = TypeVar('T')
+
+rpc_count = 0
+
+
+async def rpc(call: Awaitable[T]) -> T:
+    """Один поход в браузер: считаем и ждём."""
+    global rpc_count
+    rpc_count += 1
+    return await call
+
+
+async def extract_with_locators(page: Page, fields: dict[str, Field]) -> dict:
+    """Те же поля так, как их достают воркфлоу сейчас."""
+    out = {}
+    for name, f in fields.items():
+        loc = page.locator(f.selector)
+        if f.has_text:
+            loc = loc.filter(has_text=re.compile(f.has_text))
+        if f.has:
+            has = page.locator(f.has[0])
+            if f.has[1]:
+                has = has.filter(has_text=re.compile(f.has[1]))
+            loc = loc.filter(has=has)
+        if f.then:
+            loc = loc.locator(f.then)
+
+        if f.count:
+            out[name] = await rpc(loc.count())
+            continue
+        if await rpc(loc.count()) == 0:
+            out[name] = [] if f.many else None
+            continue
+
+        # all() - один count, локаторы на элементы строятся без браузера
+        els = await rpc(loc.all()) if f.many else [loc.last if f.last else loc.first]
+        vals = []
+        for e in els:
+            if f.attr:
+                v = await rpc(e.get_attribute(f.attr))
+                if f.url and v is not None:
+                    v = urljoin(page.url, v)
+            elif f.inner:
+                v = await rpc(e.inner_text())
+            else:
+                v = await rpc(e.text_content())
+            vals.append(v)
+
+        out[name] = postprocess(f, vals if f.many else vals[0])
+    return out
+
+
+async def extract_evaluate(page: Page, fields: dict[str, Field]) -> dict:
+    # extract.extract - ровно один page.evaluate
+    return await rpc(extract(page, fields))
+
+
+async def extract_static(page: Page, fields: dict[str, Field]) -> dict:
+    return Document(await rpc(page.content()), page.url).extract(fields)
+
+
+async def bench(page: Page, fields: dict[str, Field], html: str) -> list:
+    global rpc_count
+    await page.set_content(html)
+
+    results = []
+    for func in (extract_with_locators, extract_evaluate, extract_static):
+        rpc_count = 0
+        started = time.perf_counter()
+        data = await func(page, fields)
+        results.append((rpc_count, (time.perf_counter() - started) * 1000, data))
+    return results
+
+
+async def main() -> None:
+    module_name, class_name = sys.argv[1].split(':')
+    wf = getattr(importlib.import_module(module_name), class_name)
+    files = [Path(p) for p in sys.argv[2:]]
+
+    total = {'locators': [0, 0.0], 'extract': [0, 0.0], 'static': [0, 0.0]}
+    async with AsyncCamoufox(headless=True) as browser:
+        page = await browser.new_page()
+        for file in files:
+            results = await bench(page, wf.fields, file.read_text(encoding='utf-8'))
+            print(file.name + ': ' + ', '.join(
+                f'{name} {calls} rpc {ms:.0f}ms'
+                for name, (calls, ms, _) in zip(total, results)
+            ))
+
+            l_data = results[0][2]
+            for name, (calls, ms, data) in zip(total, results):
+                total[name][0] += calls
+                total[name][1] += ms
+                for k in wf.fields:
+                    if l_data[k] != data[k]:
+                        print(f'  {name} differs {k}: {l_data[k]!r} != {data[k]!r}')
+
+    for name, (calls, ms) in total.items():
+        print(f'{name}: {calls} rpc, {ms:.0f}ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Замер холодного старта воркера.
+
+    python bench_startup.py --runs 5 --budget-ms 4000
+
+Запускать с тем же окружением, что и воркер (SESSION, PROXY_URI, ...).
+Каждый прогон - новый процесс python, как после рестарта контейнера.
+Код выхода 1, если медиана time-to-ready больше бюджета или на старте
+импортируется что-то из LAZY_MODULES.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+# Эти зависимости должны грузиться только по требованию
+LAZY_MODULES = [
+    'pandas',
+    'pymongo',
+    'camoufox',
+    'browserforge',
+    'dateparser',
+    'aiobotocore',
+    'PIL',
+    'usp',
+]
+
+READY_CODE = '''
+import worker
+workflows = worker.load_workflows()
+worker.hatchet.worker(
+    name='bench',
+    slots=worker.settings.WORKER_SLOTS,
+    labels=worker.settings.WORKER_LABELS,
+    workflows=workflows,
+)
+'''
+
+
+def import_times() -> dict[str, int]:
+    """Кумулятивное время импорта (мкс) каждого модуля из `-X importtime`.
+
+    Воркфлоу импортирует `load_workflows`, а не сам `worker`.
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import worker; worker.load_workflows()'],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if m := re.match(r'import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)', line):
+            times[m.group(4)] = int(m.group(2))
+    return times
+
+
+def time_to_ready() -> float:
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', READY_CODE],
+        capture_output=True,
+        check=True,
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument(
+        '--budget-ms',
+        type=float,
+        default=float(os.environ.get('STARTUP_BUDGET_MS', 5_000)),
+    )
+    args = parser.parse_args()
+
+    times = import_times()
+
+    print(f'top {args.top} imports by cumulative time:')
+    top = sorted(times.items(), key=lambda i: i[1], reverse=True)[:args.top]
+    for name, us in top:
+        print(f'  {us / 1000:8.1f}ms  {name}')
+
+    print('\nworkflows:')
+    for name, us in sorted(times.items()):
+        if name.startswith('workflows.'):
+            print(f'  {us / 1000:8.1f}ms  {name}')
+
+    eager = [m for m in LAZY_MODULES if m in times]
+    if eager:
+        print(f'\nimported at startup, must be lazy: {", ".join(eager)}')
+
+    ready_ms = [time_to_ready() for _ in range(args.runs)]
+    median = statistics.median(ready_ms)
+    print(
+        f'\ntime-to-ready: median {median:.0f}ms, '
+        f'min {min(ready_ms):.0f}ms, max {max(ready_ms):.0f}ms, '
+        f'budget {args.budget_ms:.0f}ms'
+    )
+
+    if eager or median > args.budget_ms:
+        print('FAIL')
+        sys.exit(1)
+    print('OK')
+
+
+if __name__ == '__main__':
+    main()
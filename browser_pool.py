@@ -0,0 +1,391 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator
+from weakref import WeakKeyDictionary
+
+from playwright.async_api import Browser, BrowserContext, Page
+
+import settings
+from snapshots import SnapshotStore
+
+if TYPE_CHECKING:
+    from camoufox.async_api import AsyncCamoufox
+
+# Прокси, с которым создан контекст слота: httpx-сессии (`sessions`) должны
+# ходить с того же IP, к которому сайт привязал куки
+_context_proxies: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def context_proxy(context: BrowserContext, default: str | None = None) -> str | None:
+    """Прокси контекста из пула; `default` - для контекстов не из пула (debug)."""
+    return _context_proxies[context] if context in _context_proxies else default
+
+
+CLEAR_STORAGE_JS = '(clearLocal) => { sessionStorage.clear(); if (clearLocal) localStorage.clear(); }'
+
+
+class BrowserMemoryError(Exception):
+    """Браузер превысил BROWSER_KILL_RSS_MB, таск прерван и будет повторён."""
+
+
+def browser_rss_mb() -> float:
+    """RSS всех дочерних процессов воркера: драйвер playwright, Firefox, Xvfb."""
+    import psutil
+
+    total = 0
+    for proc in psutil.Process().children(recursive=True):
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total / 2**20
+
+
+@dataclass
+class PooledBrowser:
+    camoufox: 'AsyncCamoufox'
+    handle: Browser
+    launch_sec: float
+    launched: float = field(default_factory=time.monotonic)
+    tasks: int = 0
+    active: int = 0
+    # Выставляет вотчдог памяти, браузер перезапустится после текущих тасков
+    retired: bool = False
+
+    def expired(self, max_tasks: int, max_age_sec: int) -> bool:
+        return (
+            self.retired
+            or self.tasks >= max_tasks
+            or time.monotonic() - self.launched >= max_age_sec
+        )
+
+
+@dataclass
+class Slot:
+    index: int
+    proxy_uri: str
+    browser: PooledBrowser | None = None
+    context: BrowserContext | None = None
+    proxy_enable: bool = True
+    site: str = ''
+    # Тасков в контексте с последнего сохранения снапшота
+    unsaved: int = 0
+    page: Page | None = None
+    viewport: dict | None = None
+
+
+@dataclass
+class Lease:
+    slot: int = 0
+    page: Page | None = None
+    launch_sec: float = 0.0
+    setup_sec: float = 0.0
+    page_reused: bool = False
+    task_sec: float = 0.0
+    rss_peak_mb: float = 0.0
+    killed_rss_mb: float = 0.0
+
+    def report(self) -> str:
+        return (
+            f'slot: {self.slot}, browser launch: {self.launch_sec:.2f}s, '
+            f'page setup: {self.setup_sec:.2f}s (reused: {self.page_reused}), task: {self.task_sec:.2f}s, '
+            f'rss peak: {self.rss_peak_mb:.0f}MB'
+        )
+
+
+class BrowserPool:
+    """Держит запущенный Camoufox между тасками воркера.
+
+    Браузер общий, а каждый слот работает в своём изолированном контексте
+    с прокси из `PROXY_URIS`. Контекст слота создаётся из снапшота сайта
+    (`snapshots.SnapshotStore`) и живёт, пока слот выполняет таски того же
+    сайта; снапшот сохраняется каждые `BROWSER_SNAPSHOT_EVERY` тасков и при
+    закрытии контекста.
+
+    Браузер перезапускается после `max_tasks` тасков или `max_age_sec` секунд
+    жизни. Перезапуск ждёт, пока браузер освободят все текущие таски, чтобы
+    не держать в памяти два Firefox.
+
+    С `BROWSER_REUSE_PAGE` слот не закрывает страницу после таска, а
+    сбрасывает её перед следующим: about:blank, снятие роутов, очистка
+    sessionStorage (и localStorage с `BROWSER_REUSE_CLEAR_STORAGE`).
+    Обработчики событий снимают после таска те, кто их ставил (блокер,
+    перехват, ожидания). Если сброс не удался, создаётся новая.
+
+    Пока таск идёт, вотчдог раз в `BROWSER_RSS_CHECK_SEC` снимает RSS
+    браузера. Выше `max_rss_mb` браузер помечается на перезапуск, выше
+    `kill_rss_mb` страница таска закрывается и таск падает с
+    `BrowserMemoryError`, чтобы Hatchet его повторил, а не OOM убил воркер.
+    """
+
+    def __init__(
+        self,
+        max_tasks: int = settings.BROWSER_MAX_TASKS,
+        max_age_sec: int = settings.BROWSER_MAX_AGE_SEC,
+        slots: int = settings.WORKER_SLOTS,
+        max_rss_mb: int = settings.BROWSER_MAX_RSS_MB,
+        kill_rss_mb: int = settings.BROWSER_KILL_RSS_MB,
+    ):
+        self.max_tasks = max_tasks
+        self.max_age_sec = max_age_sec
+        self.slots = slots
+        self.max_rss_mb = max_rss_mb
+        self.kill_rss_mb = kill_rss_mb
+
+        self.snapshots = SnapshotStore()
+
+        self._all_slots = [
+            Slot(index=i, proxy_uri=settings.PROXY_URIS[i % len(settings.PROXY_URIS)])
+            for i in range(slots)
+        ]
+        self._slots: asyncio.Queue[Slot] = asyncio.Queue()
+        for slot in self._all_slots:
+            self._slots.put_nowait(slot)
+
+        self._browser: PooledBrowser | None = None
+        self._cond = asyncio.Condition()
+
+        self.stats = {
+            'launches': 0,
+            'launch_sec': 0.0,
+            'tasks': 0,
+            'task_sec': 0.0,
+            'setup_sec': 0.0,
+            'reuse_hits': 0,
+            'reuse_misses': 0,
+            'rss_mb': 0.0,
+            'rss_recycles': 0,
+            'rss_kills': 0,
+        }
+
+    @staticmethod
+    def _addons() -> list[str]:
+        addons_dir = Path(settings.BROWSER_ADDONS_DIR)
+        if addons_dir.is_dir():
+            return [str(f.resolve()) for f in addons_dir.iterdir()]
+        return []
+
+    async def _launch(self) -> PooledBrowser:
+        # camoufox/browserforge тяжёлые, импортируем к первому запуску браузера
+        from browserforge.fingerprints import Screen
+        from camoufox.async_api import AsyncCamoufox
+
+        started = time.monotonic()
+        # Прокси задаётся на уровне контекста слота
+        camoufox = AsyncCamoufox(
+            os='windows',
+            humanize=True,
+            headless='virtual',
+            screen=Screen(max_width=1920, max_height=1080),
+            locale=['ru-RU', 'en-US'],
+            addons=self._addons(),
+        )
+        handle = await camoufox.__aenter__()
+        launch_sec = time.monotonic() - started
+
+        self.stats['launches'] += 1
+        self.stats['launch_sec'] += launch_sec
+
+        return PooledBrowser(
+            camoufox=camoufox,
+            handle=handle,
+            launch_sec=launch_sec,
+        )
+
+    async def _close(self, browser: PooledBrowser) -> None:
+        for slot in self._all_slots:
+            if slot.browser is browser:
+                await self._close_context(slot)
+
+        try:
+            await browser.camoufox.__aexit__(None, None, None)
+        except Exception as e:
+            print(f'browser close error: {e!r}')
+
+    async def _acquire(self) -> tuple[PooledBrowser, float]:
+        launch_sec = 0.0
+        async with self._cond:
+            while True:
+                browser = self._browser
+                if browser and not browser.expired(self.max_tasks, self.max_age_sec):
+                    break
+
+                if browser and browser.active:
+                    # Ждём, пока текущие таски отпустят браузер
+                    await self._cond.wait()
+                    continue
+
+                if browser:
+                    self._browser = None
+                    await self._close(browser)
+
+                self._browser = await self._launch()
+                launch_sec = self._browser.launch_sec
+
+            browser.tasks += 1
+            browser.active += 1
+            return browser, launch_sec
+
+    async def _release(self, browser: PooledBrowser) -> None:
+        async with self._cond:
+            browser.active -= 1
+            self._cond.notify_all()
+
+    async def _save_snapshot(self, slot: Slot) -> None:
+        try:
+            await self.snapshots.save(slot.site, slot.context)
+            slot.unsaved = 0
+        except Exception as e:
+            print(f'snapshot save error {slot.site}: {e!r}')
+
+    async def _close_context(self, slot: Slot) -> None:
+        if not slot.context:
+            return
+
+        await self._save_snapshot(slot)
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        slot.context = None
+        slot.browser = None
+        slot.page = None
+
+    async def _context(self, browser: PooledBrowser, slot: Slot, proxy_enable: bool, site: str) -> BrowserContext:
+        if slot.context and (
+            slot.browser is not browser
+            or slot.proxy_enable != proxy_enable
+            or slot.site != site
+        ):
+            await self._close_context(slot)
+
+        if not slot.context:
+            proxy = {'server': slot.proxy_uri} if proxy_enable else None
+            try:
+                slot.context = await browser.handle.new_context(
+                    proxy=proxy,
+                    storage_state=self.snapshots.load(site),
+                )
+            except Exception as e:
+                # Битый снапшот не должен ронять таски сайта
+                print(f'snapshot load error {site}: {e!r}')
+                self.snapshots.drop(site)
+                slot.context = await browser.handle.new_context(proxy=proxy)
+            slot.browser = browser
+            slot.proxy_enable = proxy_enable
+            slot.site = site
+            _context_proxies[slot.context] = slot.proxy_uri if proxy_enable else None
+
+        return slot.context
+
+    async def _reset_page(self, slot: Slot) -> None:
+        page = slot.page
+        try:
+            await page.evaluate(CLEAR_STORAGE_JS, settings.BROWSER_REUSE_CLEAR_STORAGE)
+        except Exception:
+            # about:blank или страница без доступа к storage
+            pass
+
+        # Обработчики событий снимают сами блокер, перехват и ожидания после
+        # таска; роуты, оставшиеся от упавшего таска, снимаются здесь
+        await page.unroute_all(behavior='ignoreErrors')
+        await page.goto('about:blank', timeout=5_000)
+        if slot.viewport and page.viewport_size != slot.viewport:
+            await page.set_viewport_size(slot.viewport)
+
+    async def _page(self, slot: Slot, context: BrowserContext, lease: Lease) -> Page:
+        if settings.BROWSER_REUSE_PAGE and slot.page and not slot.page.is_closed():
+            try:
+                await self._reset_page(slot)
+                lease.page_reused = True
+                self.stats['reuse_hits'] += 1
+                return slot.page
+            except Exception as e:
+                print(f'page reset error: {e!r}')
+                try:
+                    await slot.page.close()
+                except Exception:
+                    pass
+
+        if settings.BROWSER_REUSE_PAGE:
+            self.stats['reuse_misses'] += 1
+
+        slot.page = await context.new_page()
+        slot.viewport = slot.page.viewport_size
+        return slot.page
+
+    async def _watch(self, browser: PooledBrowser, lease: Lease) -> None:
+        while True:
+            await asyncio.sleep(settings.BROWSER_RSS_CHECK_SEC)
+
+            rss = await asyncio.to_thread(browser_rss_mb)
+            self.stats['rss_mb'] = rss
+            lease.rss_peak_mb = max(lease.rss_peak_mb, rss)
+
+            if rss > self.max_rss_mb and not browser.retired:
+                browser.retired = True
+                self.stats['rss_recycles'] += 1
+                print(f'browser rss {rss:.0f}MB > {self.max_rss_mb}MB, recycle after current tasks')
+
+            if rss > self.kill_rss_mb:
+                lease.killed_rss_mb = rss
+                self.stats['rss_kills'] += 1
+                await lease.page.close()
+                return
+
+    @asynccontextmanager
+    async def lease(self, site: str, proxy_enable: bool = True) -> AsyncIterator[Lease]:
+        slot = await self._slots.get()
+        try:
+            browser, launch_sec = await self._acquire()
+            lease = Lease(slot=slot.index, launch_sec=launch_sec)
+            started = time.monotonic()
+            try:
+                context = await self._context(browser, slot, proxy_enable, site)
+                lease.page = await self._page(slot, context, lease)
+                lease.setup_sec = time.monotonic() - started
+                self.stats['setup_sec'] += lease.setup_sec
+                watchdog = asyncio.create_task(self._watch(browser, lease))
+                try:
+                    yield lease
+                finally:
+                    watchdog.cancel()
+                    if not settings.BROWSER_REUSE_PAGE or lease.killed_rss_mb:
+                        try:
+                            await lease.page.close()
+                        except Exception:
+                            pass
+
+                    slot.unsaved += 1
+                    if slot.unsaved >= settings.BROWSER_SNAPSHOT_EVERY:
+                        await self._save_snapshot(slot)
+
+                    if lease.killed_rss_mb:
+                        raise BrowserMemoryError(
+                            f'browser rss {lease.killed_rss_mb:.0f}MB > {self.kill_rss_mb}MB, task aborted'
+                        )
+            finally:
+                lease.task_sec = time.monotonic() - started
+                self.stats['tasks'] += 1
+                self.stats['task_sec'] += lease.task_sec
+                await self._release(browser)
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def close(self) -> None:
+        async with self._cond:
+            if self._browser:
+                await self._close(self._browser)
+                self._browser = None
+
+    def report(self) -> str:
+        s = self.stats
+        return (
+            f"browser launches: {s['launches']} ({s['launch_sec']:.1f}s), "
+            f"tasks: {s['tasks']} ({s['task_sec']:.1f}s), "
+            f"page setup: {s['setup_sec']:.1f}s, page reuse: {s['reuse_hits']}/{s['reuse_hits'] + s['reuse_misses']}, "
+            f"rss: {s['rss_mb']:.0f}MB, rss recycles: {s['rss_recycles']}, rss kills: {s['rss_kills']}"
+        )
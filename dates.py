@@ -0,0 +1,235 @@
+"""Разбор дат с сайтов без dateparser там, где формат и так известен.
+
+`parse_date` принимает те же `date_formats`/`languages`, что и
+`dateparser.parse`, и повторяет его результат для форматов, которые
+встречаются в воркфлоу: dd.mm.yyyy, yyyy, ISO, "5 марта 2023", "March 5,
+2023", "вчера", "сегодня в 12:30", "3 дня назад". Всё остальное уходит в
+dateparser. Результаты кэшируются, относительные даты - нет.
+
+Отличие от dateparser: dd.mm.yyyy без подсказок всегда день.месяц.год,
+dateparser без языка читает такое как месяц.день.год.
+
+    python dates.py  # фикстуры и бенчмарк против dateparser
+"""
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from utils import lazy_import
+
+dateparser = lazy_import('dateparser')
+
+MONTHS = {
+    'январ': 1, 'феврал': 2, 'март': 3, 'апрел': 4, 'ма': 5, 'июн': 6,
+    'июл': 7, 'август': 8, 'сентябр': 9, 'октябр': 10, 'ноябр': 11, 'декабр': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+# Основа названия месяца + окончание: "марта", "мая", "Sept.", "September"
+MONTH = r'(январ|феврал|март|апрел|ма|июн|июл|август|сентябр|октябр|ноябр|декабр|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-zа-яё]*\.?'
+TIME = r'(?:,?\s*(?:в\s+)?(\d{1,2}):(\d{2}))?'
+
+NUMERIC_RE = re.compile(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})' + TIME)
+YEAR_RE = re.compile(r'(\d{4})')
+DAY_MONTH_RE = re.compile(r'(\d{1,2})\s+' + MONTH + r'(?:\s+(\d{4}))?' + TIME)
+MONTH_DAY_RE = re.compile(MONTH + r'\s+(\d{1,2}),?\s+(\d{4})')
+MONTH_YEAR_RE = re.compile(MONTH + r'\s+(\d{4})')
+RELATIVE_DAY_RE = re.compile(r'(позавчера|вчера|сегодня)' + TIME)
+AGO_RE = re.compile(r'(\d+)?\s*(минут|час|дн|день|недел)[а-яё]*\s+назад')
+
+AGO_UNITS = {
+    'минут': timedelta(minutes=1),
+    'час': timedelta(hours=1),
+    'дн': timedelta(days=1),
+    'день': timedelta(days=1),
+    'недел': timedelta(weeks=1),
+}
+DAYS_BACK = {'сегодня': 0, 'вчера': 1, 'позавчера': 2}
+
+stats = {'fast': 0, 'relative': 0, 'fallback': 0}
+
+
+def parse_date(
+    text: str | None,
+    date_formats: list[str] | None = None,
+    languages: list[str] | None = None,
+) -> datetime | None:
+    if not text:
+        return None
+    text = re.sub(r'\s+', ' ', text).strip().lower()
+
+    if (result := _relative(text, datetime.now())) is not None:
+        stats['relative'] += 1
+        return result
+
+    return _parse(
+        text,
+        tuple(date_formats or ()),
+        tuple(languages or ()),
+        date.today(),
+    )
+
+
+def _relative(text: str, now: datetime) -> datetime | None:
+    if m := RELATIVE_DAY_RE.fullmatch(text):
+        day = now - timedelta(days=DAYS_BACK[m.group(1)])
+        if m.group(2):
+            return day.replace(hour=int(m.group(2)), minute=int(m.group(3)), second=0, microsecond=0)
+        return day
+
+    if m := AGO_RE.fullmatch(text):
+        return now - int(m.group(1) or 1) * AGO_UNITS[m.group(2)]
+    return None
+
+
+# `today` в ключе: dateparser дописывает недостающие день и месяц текущими
+@lru_cache(maxsize=8192)
+def _parse(text: str, date_formats: tuple, languages: tuple, today: date) -> datetime | None:
+    if (result := _fast(text, date_formats, today)) is not None:
+        stats['fast'] += 1
+        return result
+
+    stats['fallback'] += 1
+    return dateparser.parse(
+        text,
+        date_formats=list(date_formats) or None,
+        languages=list(languages) or None,
+    )
+
+
+def _fast(text: str, date_formats: tuple, today: date) -> datetime | None:
+    for fmt in date_formats:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return _fill_missing(parsed, fmt, today)
+
+    try:
+        if re.fullmatch(r'\d{4}-\d{2}-\d{2}(?:[t ][\d:.]+(?:z|[+-]\d{2}:?\d{2})?)?', text):
+            return datetime.fromisoformat(text.upper())
+    except ValueError:
+        pass
+
+    if m := NUMERIC_RE.fullmatch(text):
+        return _build(int(m.group(3)), int(m.group(2)), int(m.group(1)), m.group(4), m.group(5))
+
+    text = re.sub(r'\s*(г\.|года?)$', '', text)
+
+    if m := DAY_MONTH_RE.fullmatch(text):
+        year = int(m.group(3)) if m.group(3) else today.year
+        return _build(year, MONTHS[m.group(2)], int(m.group(1)), m.group(4), m.group(5))
+
+    if m := MONTH_DAY_RE.fullmatch(text):
+        return _build(int(m.group(3)), MONTHS[m.group(1)], int(m.group(2)))
+
+    if m := MONTH_YEAR_RE.fullmatch(text):
+        year, month = int(m.group(2)), MONTHS[m.group(1)]
+        return _build(year, month, _clamp_day(year, month, today.day))
+
+    if m := YEAR_RE.fullmatch(text):
+        year = int(m.group(1))
+        return _build(year, today.month, _clamp_day(year, today.month, today.day))
+
+    return None
+
+
+def _fill_missing(parsed: datetime, fmt: str, today: date) -> datetime:
+    """Как dateparser: чего нет в формате, берётся из сегодняшней даты."""
+    has_month = any(d in fmt for d in ('%m', '%b', '%B'))
+    has_day = '%d' in fmt
+    if has_month and has_day:
+        return parsed
+
+    month = parsed.month if has_month else today.month
+    day = parsed.day if has_day else _clamp_day(parsed.year, month, today.day)
+    return parsed.replace(month=month, day=day)
+
+
+def _clamp_day(year: int, month: int, day: int) -> int:
+    return min(day, calendar.monthrange(year, month)[1])
+
+
+def _build(year: int, month: int, day: int, hour: str | None = None, minute: str | None = None) -> datetime | None:
+    try:
+        return datetime(year, month, day, int(hour or 0), int(minute or 0))
+    except ValueError:
+        return None
+
+
+# Строки из воркфлоу и что должно получиться; None в ожидании - дата
+# относительная, сравнивается с dateparser с допуском
+FIXTURES = [
+    # litnet, prodaman, litgorod: regex + date_formats
+    ('12.03.2021', {'date_formats': ['%d.%m.%Y']}, datetime(2021, 3, 12)),
+    ('02.01.2026', {'date_formats': ['%d.%m.%Y']}, datetime(2026, 1, 2)),
+    # mangalib, ranobelib, bookmate: год
+    ('2019', {'date_formats': ['%Y']}, 'year'),
+    # readli, zahleb: languages=['ru']
+    ('25.11.2020', {'languages': ['ru']}, datetime(2020, 11, 25)),
+    ('5 марта 2023', {'languages': ['ru']}, datetime(2023, 3, 5)),
+    ('12 мая 2022 г.', {}, datetime(2022, 5, 12)),
+    ('1 сентября 2024, 14:35', {}, datetime(2024, 9, 1, 14, 35)),
+    # ficbook, litmarket, acomics: без подсказок
+    ('7 декабря 2018', {}, datetime(2018, 12, 7)),
+    ('сегодня в 12:30', {}, None),
+    ('вчера', {}, None),
+    ('3 дня назад', {}, None),
+    ('2 часа назад', {}, None),
+    # marvel, darkhorse, dc, manta, globalcomix
+    ('March 5, 2023', {}, datetime(2023, 3, 5)),
+    ('Sep 12, 2021', {}, datetime(2021, 9, 12)),
+    # author.today: data-time
+    ('2023-05-01T12:00:00+03:00', {}, datetime.fromisoformat('2023-05-01T12:00:00+03:00')),
+    ('2023-05-01', {}, datetime(2023, 5, 1)),
+]
+
+
+def _check_fixtures() -> bool:
+    ok = True
+    for text, kwargs, expected in FIXTURES:
+        got = parse_date(text, **kwargs)
+        if expected == 'year':
+            expected = dateparser.parse(text, **kwargs)
+        if expected is None:
+            reference = dateparser.parse(text, **kwargs)
+            good = got is not None and abs(got - reference) < timedelta(minutes=1)
+        else:
+            good = got == expected
+        ok &= good
+        print(f'{"ok  " if good else "FAIL"} {text!r}: {got}')
+    return ok
+
+
+def _bench(rounds: int = 2_000) -> None:
+    import time
+
+    texts = [(t, kw) for t, kw, _ in FIXTURES]
+
+    started = time.perf_counter()
+    dateparser.parse('01.01.2000')
+    print(f'dateparser import + first call: {(time.perf_counter() - started) * 1000:.0f}ms')
+
+    for name, func in (('dateparser', dateparser.parse), ('parse_date', parse_date)):
+        started = time.perf_counter()
+        for _ in range(rounds // len(texts)):
+            for text, kwargs in texts:
+                func(text, **kwargs)
+        us = (time.perf_counter() - started) / rounds * 1_000_000
+        print(f'{name}: {us:.1f}us/call')
+
+    _parse.cache_clear()
+    started = time.perf_counter()
+    for text, kwargs in texts:
+        parse_date(text, **kwargs)
+    us = (time.perf_counter() - started) / len(texts) * 1_000_000
+    print(f'parse_date, cold cache: {us:.1f}us/call; {stats}')
+
+
+if __name__ == '__main__':
+    import sys
+
+    fixtures_ok = _check_fixtures()
+    _bench()
+    sys.exit(0 if fixtures_ok else 1)
@@ -1,9 +1,7 @@
 import json
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
-
-from pymongo import AsyncMongoClient
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
 
 import settings
 from interfaces import InputLitresPartnersBook
@@ -14,6 +12,8 @@ async def save_book_mongo(input: InputLitresPartnersBook, site:str, book: dict[s
     if settings.DEBUG:
         return
 
+    from pymongo import AsyncMongoClient
+
     client = AsyncMongoClient(settings.MONGO_URI)
     col = client['ltrs']['books']
 
@@ -175,6 +175,21 @@ class DbSamizdatPrisma:
         metrics = await self.convert_metrics(metrics)
         await self.con.metrics.create(data=metrics)
 
+    async def create_metrics_many(self, metrics_list: List[Dict[str, Any]]) -> None:
+        """Метрики нескольких книг одним INSERT, для листингов с полными записями."""
+        if settings.DEBUG or not metrics_list:
+            return
+
+        data = [await self.convert_metrics(await self.clear_item(m)) for m in metrics_list]
+        await self.con.metrics.create_many(data=data)
+
+    async def get_books_have_cover(self, urls: List[str]) -> Dict[str, bool]:
+        """url -> есть ли обложка, для тех из `urls`, что уже есть в базе."""
+        books = await self.con.book.find_many(
+            where={"url": {"in": urls}},
+        )
+        return {b.url: b.coverImage is not None for b in books}
+
     async def clear_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
         item_clear = {}
         for k, v in item.items():
@@ -256,11 +271,24 @@ class DbSamizdatPrisma:
 
         return metrics
 
-    async def get_all_books_urls(self, source: str) -> List[str]:
-        books = await self.con.book.find_many(
-            where={"source": source},
-        )
-        return [b.url for b in books]
+    async def iter_books_urls(self, source: str, page_size: int = 50_000) -> AsyncIterator[str]:
+        """Ссылки книг источника страницами по id, без загрузки моделей целиком."""
+        last_id = 0
+        while True:
+            rows = await self.con.query_raw(
+                'SELECT id, url FROM "Book" WHERE source = $1 AND id > $2 ORDER BY id LIMIT $3',
+                source,
+                last_id,
+                page_size,
+            )
+            for row in rows:
+                yield row['url']
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1]['id']
+
+    async def get_all_books_urls(self, source: str) -> Set[str]:
+        return {url async for url in self.iter_books_urls(source)}
 
     async def get_priority_persons_urls(self, source: str) -> List[str]:
         persons = await self.con.person.find_many(
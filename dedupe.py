@@ -0,0 +1,121 @@
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Literal
+
+import settings
+
+
+@dataclass
+class DedupeStats:
+    hits: int = 0
+    misses: int = 0
+    # Промахи, которые пришлось проверять в Hatchet, и сколько из них там нашлось
+    hatchet_lookups: int = 0
+    hatchet_found: int = 0
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return (
+            f'dedupe: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit), '
+            f'hatchet {self.hatchet_found}/{self.hatchet_lookups}'
+        )
+
+
+# 'done' - таск завершён, дубль на всё окно `crawl`;
+# 'pending' - поставлен недавно, дубль до DEDUPE_PENDING_MINUTES;
+# 'stale' - поставлен давно и не подтверждён: мог упасть, спросить Hatchet
+Status = Literal['done', 'pending', 'stale']
+
+
+def _status(added: float, done: bool, hours: int) -> Status | None:
+    now = time.time()
+    if added <= now - hours * 3600:
+        return None
+    if done:
+        return 'done'
+    if added > now - settings.DEDUPE_PENDING_MINUTES * 60:
+        return 'pending'
+    return 'stale'
+
+
+class SqliteDedupe:
+    """Хэши поставленных тасков в SQLite воркера.
+
+    Хранится время постановки, а не срок жизни: у `crawl` окно
+    дедупликации своё на каждый вызов. Знает только то, что ставил этот
+    воркер, поэтому промах всегда проверяется в Hatchet.
+    """
+
+    def __init__(self, path: str, max_hours: int):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.max_hours = max_hours
+        self.con = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.con.execute('PRAGMA journal_mode=WAL')
+        self.con.execute('PRAGMA synchronous=NORMAL')
+        self.con.execute(
+            'CREATE TABLE IF NOT EXISTS tasks '
+            '(hash TEXT PRIMARY KEY, added REAL NOT NULL, done INTEGER NOT NULL)'
+        )
+        self.con.execute('DELETE FROM tasks WHERE added < ?', (time.time() - max_hours * 3600,))
+
+    async def status(self, hash: str, hours: int) -> Status | None:
+        row = self.con.execute('SELECT added, done FROM tasks WHERE hash = ?', (hash,)).fetchone()
+        return _status(row[0], bool(row[1]), hours) if row else None
+
+    async def add(self, hash: str, done: bool = False) -> None:
+        self.con.execute('INSERT OR REPLACE INTO tasks VALUES (?, ?, ?)', (hash, time.time(), int(done)))
+
+    async def warm(self, hours: int) -> bool:
+        return False
+
+
+class RedisDedupe:
+    """То же в общем Redis: его видят все воркеры.
+
+    Промах надёжен, только если Redis пишет таски всё окно `crawl`: с
+    `dedupe:since` (время первой записи) прошло больше `hours`. Новый или
+    очищенный Redis холодный, и промахи проверяются в Hatchet.
+    """
+
+    def __init__(self, uri: str, max_hours: int):
+        from redis.asyncio import Redis
+
+        self.redis = Redis.from_url(uri)
+        self.max_hours = max_hours
+        self._since: float | None = None
+
+    async def status(self, hash: str, hours: int) -> Status | None:
+        value = await self.redis.get(f'dedupe:{hash}')
+        if value is None:
+            return None
+        added, _, done = value.decode().partition(':')
+        return _status(float(added), done == '1', hours)
+
+    async def add(self, hash: str, done: bool = False) -> None:
+        await self.redis.set(f'dedupe:{hash}', f'{time.time()}:{int(done)}', ex=self.max_hours * 3600)
+        if self._since is None:
+            await self.redis.set('dedupe:since', time.time(), nx=True)
+
+    async def warm(self, hours: int) -> bool:
+        # Перечитывается, пока холодный: после FLUSH ключа нет, и снова холодный
+        if self._since is None or self._since > time.time() - hours * 3600:
+            since = await self.redis.get('dedupe:since')
+            self._since = float(since) if since is not None else None
+        return self._since is not None and self._since <= time.time() - hours * 3600
+
+
+_store: SqliteDedupe | RedisDedupe | None = None
+stats = DedupeStats()
+
+
+def store() -> SqliteDedupe | RedisDedupe:
+    global _store
+    if _store is None:
+        if settings.DEDUPE_REDIS_URI:
+            _store = RedisDedupe(settings.DEDUPE_REDIS_URI, settings.DEDUPE_MAX_HOURS)
+        else:
+            _store = SqliteDedupe(settings.DEDUPE_SQLITE_PATH, settings.DEDUPE_MAX_HOURS)
+    return _store
@@ -0,0 +1,232 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any
+from urllib.parse import urljoin
+
+from playwright.async_api import Page
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+
+@dataclass
+class Field:
+    """Что достать со страницы, аналог цепочки локаторов.
+
+    `selector` -> фильтр `has_text` (regex по тексту элемента) -> фильтр
+    `has` (есть потомок `has[0]`, чей текст подходит под regex `has[1]`) ->
+    `then` (потомки, `:scope > span` для прямых) -> текст или `attr`.
+    Селекторы - обычный CSS, без playwright-расширений вроде `:has-text()`.
+    """
+    selector: str
+    has_text: str | None = None
+    has: tuple[str, str | None] | None = None
+    then: str | None = None
+    # None - textContent
+    attr: str | None = None
+    # innerText вместо textContent
+    inner: bool = False
+    # Сделать ссылку абсолютной относительно страницы
+    url: bool = False
+    many: bool = False
+    last: bool = False
+    # Вернуть число найденных элементов вместо значений
+    count: bool = False
+    # Постобработка на стороне python: группа 1, если есть, иначе всё совпадение
+    regex: str | None = None
+
+
+EXTRACT_JS = '''(fields) => {
+    const out = {};
+    for (const [name, f] of Object.entries(fields)) {
+        let els = Array.from(document.querySelectorAll(f.selector));
+        if (f.has_text) {
+            const re = new RegExp(f.has_text);
+            els = els.filter(e => re.test(e.textContent));
+        }
+        if (f.has) {
+            const re = f.has[1] ? new RegExp(f.has[1]) : null;
+            els = els.filter(e => Array.from(e.querySelectorAll(f.has[0])).some(d => !re || re.test(d.textContent)));
+        }
+        if (f.then) {
+            els = els.flatMap(e => Array.from(e.querySelectorAll(f.then)));
+        }
+        if (f.count) {
+            out[name] = els.length;
+            continue;
+        }
+        let vals = els.map(e => f.attr ? e.getAttribute(f.attr) : (f.inner ? e.innerText : e.textContent));
+        if (f.url) {
+            vals = vals.map(v => {
+                try { return v == null ? v : new URL(v, document.baseURI).href; } catch (e) { return v; }
+            });
+        }
+        if (f.many) {
+            out[name] = vals;
+        } else {
+            out[name] = vals.length ? vals[f.last ? vals.length - 1 : 0] : null;
+        }
+    }
+    return out;
+}'''
+
+
+def postprocess(field: Field, value: Any) -> Any:
+    if not field.regex or value is None or field.count:
+        return value
+
+    if field.many:
+        return [v for v in (_post_one(field.regex, i) for i in value) if v is not None]
+    return _post_one(field.regex, value)
+
+
+def _post_one(regex: str, value: str | None) -> str | None:
+    if value is None:
+        return None
+    if m := re.search(regex, value):
+        return m.group(1) if m.groups() else m.group(0)
+    return None
+
+
+async def extract(page: Page, fields: dict[str, Field]) -> dict[str, Any]:
+    """Все поля одним `page.evaluate` вместо count/text_content на каждое.
+
+    Не найдено - None (или [] для `many`).
+    """
+    raw = await page.evaluate(EXTRACT_JS, {k: asdict(f) for k, f in fields.items()})
+    return {k: postprocess(f, raw[k]) for k, f in fields.items()}
+
+
+# Теги, вокруг которых innerText ставит переносы строк (p - двойной)
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5',
+    'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'pre', 'section',
+    'table', 'tr', 'ul',
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'head'}
+
+
+class Document:
+    """HTML страницы, разобранный в процессе воркера (selectolax/lexbor).
+
+    Понимает те же `Field`, что и `extract`, но без браузера: HTML берётся
+    один раз, и страница дальше не нужна. `inner` здесь - приближение
+    innerText по блочным тегам, без учёта CSS.
+    """
+
+    def __init__(self, html: str, url: str, status: int = 200):
+        self.tree = LexborHTMLParser(html)
+        self.url = url
+        self.status = status
+
+        base = self.tree.css_first('base[href]')
+        self.base_url = urljoin(url, base.attributes['href']) if base else url
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+    def css(self, selector: str, node: LexborNode | None = None) -> list[LexborNode]:
+        if node is None:
+            return self.tree.css(selector)
+        return _select(node, selector)
+
+    def css_first(self, selector: str, node: LexborNode | None = None) -> LexborNode | None:
+        nodes = self.css(selector, node)
+        return nodes[0] if nodes else None
+
+    def absolute(self, href: str | None) -> str | None:
+        if href is None:
+            return None
+        try:
+            return urljoin(self.base_url, href)
+        except ValueError:
+            return href
+
+    def extract(self, fields: dict[str, Field]) -> dict[str, Any]:
+        """Как `extract.extract`, но по разобранному HTML."""
+        return {k: postprocess(f, self._field(f)) for k, f in fields.items()}
+
+    def _field(self, f: Field) -> Any:
+        els = self.tree.css(f.selector)
+        if f.has_text:
+            els = [e for e in els if re.search(f.has_text, e.text(deep=True))]
+        if f.has:
+            selector, has_text = f.has
+            els = [
+                e for e in els
+                if any(not has_text or re.search(has_text, d.text(deep=True)) for d in _select(e, selector))
+            ]
+        if f.then:
+            els = [d for e in els for d in _select(e, f.then)]
+        if f.count:
+            return len(els)
+
+        if f.attr:
+            vals = [e.attributes.get(f.attr) for e in els]
+        elif f.inner:
+            vals = [inner_text(e) for e in els]
+        else:
+            vals = [e.text(deep=True) for e in els]
+        if f.url:
+            vals = [self.absolute(v) for v in vals]
+
+        if f.many:
+            return vals
+        return (vals[-1] if f.last else vals[0]) if vals else None
+
+
+def _select(node: LexborNode, selector: str) -> list[LexborNode]:
+    """`querySelectorAll` от элемента: lexbor не знает `:scope` и находит сам узел."""
+    if selector.startswith(':scope'):
+        rest = selector.removeprefix(':scope').lstrip()
+        if not rest.startswith('>'):
+            return _select(node, rest)
+
+        first, _, tail = rest[1:].strip().partition(' ')
+        children = [c for c in node.css(first) if c.parent == node]
+        if not tail:
+            return children
+        tail = tail.strip()
+        if tail.startswith('>'):
+            tail = ':scope ' + tail
+        return [d for c in children for d in _select(c, tail)]
+
+    return [d for d in node.css(selector) if d != node]
+
+
+def inner_text(node: LexborNode) -> str:
+    # Строки и требуемое число переносов между ними, как в алгоритме innerText
+    parts: list[str | int] = []
+    _walk_text(node, parts)
+
+    out = []
+    breaks = 0
+    for part in parts:
+        if isinstance(part, int):
+            breaks = max(breaks, part)
+            continue
+        if not part:
+            continue
+        if out and breaks:
+            out.append('\n' * breaks)
+        breaks = 0
+        out.append(part)
+
+    text = ''.join(out)
+    text = re.sub(r' *\n *', '\n', text)
+    return text.strip()
+
+
+def _walk_text(node: LexborNode, parts: list[str | int]) -> None:
+    for child in node.iter(include_text=True):
+        if child.tag == '-text':
+            parts.append(re.sub(r'\s+', ' ', child.text_content or ''))
+        elif child.tag == 'br':
+            parts.append('\n')
+        elif child.tag in SKIP_TAGS:
+            continue
+        else:
+            block = 2 if child.tag == 'p' else 1 if child.tag in BLOCK_TAGS else 0
+            parts.append(block)
+            _walk_text(child, parts)
+            parts.append(block)
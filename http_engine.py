@@ -0,0 +1,146 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+import httpx
+
+import settings
+
+DEFAULT_HEADERS = {
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:135.0) Gecko/20100101 Firefox/135.0',
+    'accept': 'application/json, text/plain, */*',
+    'accept-language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+}
+
+
+class HttpResponse:
+    """Ответ httpx с интерфейсом playwright `Response`/`APIResponse`."""
+
+    def __init__(self, resp: httpx.Response):
+        self._resp = resp
+
+    @property
+    def status(self) -> int:
+        return self._resp.status_code
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self._resp.status_code < 300
+
+    @property
+    def url(self) -> str:
+        return str(self._resp.url)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return dict(self._resp.headers)
+
+    async def json(self) -> Any:
+        return self._resp.json()
+
+    async def text(self) -> str:
+        return self._resp.text
+
+    async def body(self) -> bytes:
+        return self._resp.content
+
+
+class HttpRequestContext:
+    """Аналог `page.request` поверх общего `httpx.AsyncClient`."""
+
+    def __init__(self, client: httpx.AsyncClient, page: 'HttpPage'):
+        self._client = client
+        self._page = page
+
+    async def fetch(
+        self,
+        url: str,
+        method: str = 'GET',
+        headers: dict[str, str] | None = None,
+        data: Any = None,
+        timeout: float = 30_000,
+    ) -> HttpResponse:
+        referer = {'referer': self._page.url} if self._page.url != 'about:blank' else {}
+        resp = await self._client.request(
+            method,
+            url,
+            headers=referer | (headers or {}),
+            json=data if isinstance(data, (dict, list)) else None,
+            content=data if isinstance(data, (str, bytes)) else None,
+            timeout=timeout / 1000,
+        )
+        self._page.stats['requests'] += 1
+        return HttpResponse(resp)
+
+    async def get(self, url: str, headers: dict[str, str] | None = None, timeout: float = 30_000) -> HttpResponse:
+        return await self.fetch(url, headers=headers, timeout=timeout)
+
+    async def post(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        data: Any = None,
+        timeout: float = 30_000,
+    ) -> HttpResponse:
+        return await self.fetch(url, method='POST', headers=headers, data=data, timeout=timeout)
+
+
+class HttpPage:
+    """Замена `Page` для воркфлоу, которые ходят только в JSON API.
+
+    Поддерживает то, что используют такие воркфлоу: `goto`, `url`,
+    `request.get/post` и `context.request`.
+    """
+
+    def __init__(self, client: httpx.AsyncClient):
+        self.url = 'about:blank'
+        self.request = HttpRequestContext(client, self)
+        self.stats = {'requests': 0}
+
+    @property
+    def context(self) -> 'HttpPage':
+        return self
+
+    async def goto(self, url: str, wait_until: str | None = None, timeout: float = 30_000) -> HttpResponse:
+        resp = await self.request.get(url, timeout=timeout)
+        self.url = resp.url
+        return resp
+
+
+class HttpEngine:
+    """Пул `httpx.AsyncClient` (HTTP/2, keep-alive) на процесс воркера."""
+
+    def __init__(self):
+        self._clients: dict[bool, httpx.AsyncClient] = {}
+        self.stats = {'tasks': 0, 'task_sec': 0.0, 'requests': 0}
+
+    def client(self, proxy_enable: bool) -> httpx.AsyncClient:
+        if proxy_enable not in self._clients:
+            self._clients[proxy_enable] = httpx.AsyncClient(
+                http2=True,
+                proxy=settings.PROXY_URI if proxy_enable else None,
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._clients[proxy_enable]
+
+    @asynccontextmanager
+    async def page(self, proxy_enable: bool = True) -> AsyncIterator[HttpPage]:
+        page = HttpPage(self.client(proxy_enable))
+        started = time.monotonic()
+        try:
+            yield page
+        finally:
+            self.stats['tasks'] += 1
+            self.stats['task_sec'] += time.monotonic() - started
+            self.stats['requests'] += page.stats['requests']
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+    def report(self) -> str:
+        s = self.stats
+        return f"http tasks: {s['tasks']} ({s['task_sec']:.1f}s), requests: {s['requests']}"
@@ -6,6 +6,14 @@ from pydantic import BaseModel
 class WorkerLabels(TypedDict, total=False):
     ip: Literal['ru', 'rs']
 
+class BlockResources(TypedDict, total=False):
+    # playwright resource_type: image, media, font, stylesheet, script...
+    resource_types: list[str]
+    # regex по URL запроса
+    url_patterns: list[str]
+    # regex по URL, которые пропускаются всегда
+    allow_patterns: list[str]
+
 class InputBase(BaseModel):
     url: str
     task_id: str = 'default'
@@ -14,7 +22,9 @@ class InputLitresPartnersBook(InputBase):
     book_id: int = 0
 
 class InputLivelibBook(InputBase):
-    pass
+    # Постраничные API-листинги: отпечаток ссылок предыдущей страницы,
+    # чтобы узнать повтор последней страницы за концом выдачи
+    prev_page: str = ''
 
 class InputSeLtrs(InputBase):
     source: str = ''
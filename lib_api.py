@@ -0,0 +1,191 @@
+"""api2 mangalib/ranobelib: у сайтов один API, различается заголовок site-id."""
+import re
+from typing import TYPE_CHECKING, Any
+
+from furl import furl
+from playwright.async_api import Page
+
+from db import DbSamizdatPrisma
+from dates import parse_date
+from interfaces import InputLivelibBook, Output
+from utils import save_cover
+
+if TYPE_CHECKING:
+    from workflow_base import BaseLivelibWorkflow
+
+# Подписи закладок в ответе stats -> поля метрик
+BOOKMARK_LABELS = {
+    'Читаю': 'read_process',
+    'Брошено': 'read_stoped',
+    'В планах': 'read_later',
+    'Прочитано': 'read_finished',
+    'Любимые': 'likes',
+}
+
+WRITING_STATUS = {
+    "Завершён": "FINISH",
+    "Онгоинг": "PROCESS",
+    "Приостановлен": "PAUSE",
+    "Выпуск прекращён": "STOP",
+    "Анонс": "ANNOUNCE",
+}
+TRANSLATE_STATUS = {
+    "Завершён": "FINISH",
+    "Продолжается": "PROCESS",
+    "Заморожен": "PAUSE",
+    "Заброшен": "STOP",
+}
+
+LIB_API = 'https://api2.mangalib.me/api/manga'
+# Поля, которые страница тайтла сама запрашивает у api2
+LIB_API_FIELDS = [
+    'summary', 'releaseDate', 'otherNames', 'authors', 'artists', 'publisher',
+    'teams', 'genres', 'tags', 'rate_avg', 'rate', 'status_id', 'manga_status_id', 'chap_count',
+]
+
+
+async def lib_record(page: Page, url: str, site_id: int) -> tuple[int, dict | None, dict | None]:
+    """Запись тайтла и статистика из api2 по ссылке на страницу тайтла.
+
+    Общее для mangalib и ranobelib: у них один API, различается `site_id`.
+    Возвращает статус ответа, `data` записи и ответ stats.
+    """
+    slug = re.search(r'/(?:manga|book)/([^/?#]+)', url).group(1)
+    headers = {'site-id': str(site_id), 'referer': url}
+
+    api_url = furl(f'{LIB_API}/{slug}')
+    api_url.args.addlist('fields[]', LIB_API_FIELDS)
+    resp = await page.request.get(api_url.url, headers=headers)
+    if not resp.ok:
+        return resp.status, None, None
+
+    stats_resp = await page.request.get(f'{LIB_API}/{slug}/stats?bookmarks=true&rating=true', headers=headers)
+    stats = await stats_resp.json() if stats_resp.ok else None
+    return resp.status, (await resp.json()).get('data'), stats
+
+
+def lib_book(record: dict, site_url: str) -> tuple[dict, dict, str | None]:
+    """Поля книги и метрики из записи api2 - те же, что собираются со страницы.
+
+    Возвращает ещё ссылку на обложку.
+    """
+    book, metrics = {}, {}
+
+    def people(items: Any, section: str) -> tuple[str, list[dict]]:
+        items = [p for p in items or [] if p.get('name')]
+        # Без slug_url у человека нет своей ссылки, а персоны в базе
+        # уникальны по url - такие остаются только в строке имён
+        data = [
+            {'name': p['name'].strip(), 'url': f"{site_url}/ru/{section}/{p['slug_url']}"}
+            for p in items if p.get('slug_url')
+        ]
+        return ', '.join(p['name'].strip() for p in items), data
+
+    if title := (record.get('rus_name') or record.get('name') or '').strip():
+        book['title'] = title
+    if record.get('rus_name') and (title_original := (record.get('name') or '').strip()):
+        book['title_original'] = title_original
+    if titles_other := [t.strip() for t in record.get('otherNames') or [] if t.strip()]:
+        book['titles_other'] = titles_other
+
+    for field, data_field, key, section in (
+        ('author', 'authors_data', 'authors', 'people'),
+        ('artist', 'artists_data', 'artists', 'people'),
+        ('publisher', 'publishers_data', 'publisher', 'publisher'),
+        ('translate', 'translators_data', 'teams', 'team'),
+    ):
+        names, data = people(record.get(key), section)
+        if names:
+            book[field] = names
+        if data:
+            book[data_field] = data
+
+    if annotation := (record.get('summary') or '').strip():
+        book['annotation'] = annotation
+
+    if category := [g['name'] for g in record.get('genres') or []]:
+        book['category'] = category
+    if tags := [t['name'] for t in record.get('tags') or []]:
+        book['tags'] = tags
+
+    if release_match := re.search(r'\d{4}', str(record.get('releaseDate') or '')):
+        book['date_release'] = parse_date(release_match.group(0), date_formats=['%Y'])
+    if artwork_type := ((record.get('type') or {}).get('label') or '').strip():
+        book['artwork_type'] = artwork_type
+    if age_match := re.search(r'\d{1,2}', (record.get('ageRestriction') or {}).get('label') or ''):
+        book['age_rating'] = age_match.group(0)
+
+    rating = record.get('rating') or {}
+    if (average := str(rating.get('average') or '0')) != '0':
+        metrics['rating'] = average
+    if (votes := str(rating.get('votes') or '0')) != '0':
+        metrics['votes'] = votes
+
+    if chapters := (record.get('items_count') or {}).get('uploaded'):
+        metrics['chapters_count'] = str(chapters)
+    if status := WRITING_STATUS.get((record.get('status') or {}).get('label')):
+        metrics['status_writing'] = status
+    if status := TRANSLATE_STATUS.get((record.get('scanlateStatus') or {}).get('label')):
+        metrics['status_translate'] = status
+
+    cover = record.get('cover') or {}
+    return book, metrics, cover.get('default') or cover.get('md')
+
+
+def stats_metrics(payload: dict | None) -> dict:
+    """Метрики из ответа `/stats?bookmarks=true&rating=true`."""
+    data = (payload or {}).get('data') or {}
+    metrics = {}
+
+    if votes := (data.get('rating') or {}).get('votes'):
+        metrics['votes'] = str(votes)
+
+    bookmarks = data.get('bookmarks') or {}
+    if adds := bookmarks.get('count'):
+        metrics['added_to_lib'] = str(adds)
+
+    for item in bookmarks.get('stats') or []:
+        if key := BOOKMARK_LABELS.get(item.get('label')):
+            value = item.get('amount', item.get('count'))
+            if value is not None:
+                metrics[key] = str(value)
+
+    return metrics
+
+
+async def lib_task(cls: type['BaseLivelibWorkflow'], input: InputLivelibBook, page: Page, site_url: str) -> Output:
+    """Таск тайтла целиком из api2: запись, статистика, обложка.
+
+    Название пишется только при создании книги, как и при разборе страницы.
+    """
+    status, record, stats = await lib_record(page, input.url, cls.site_id)
+    if status == 404:
+        async with DbSamizdatPrisma() as db:
+            await db.mark_book_deleted(input.url, cls.site)
+        return Output(result='error', data={'status': status, 'error': 'invalid_url_or_404'})
+    if record is None:
+        raise Exception(f'api2 {status}')
+
+    fields, api_metrics, cover_url = lib_book(record, site_url)
+
+    async with DbSamizdatPrisma() as db:
+        book = {'url': input.url, 'source': cls.site}
+        metrics = {'bookUrl': input.url}
+
+        if not await db.check_book_exist(input.url):
+            if 'title' in fields:
+                book['title'] = fields['title']
+            await db.create_book(book)
+
+        book |= {k: v for k, v in fields.items() if k != 'title'}
+
+        if cover_url and not await db.check_book_have_cover(input.url):
+            if cover_name := await save_cover(page, cover_url, referer=input.url):
+                book['coverImage'] = cover_name
+
+        metrics |= api_metrics | stats_metrics(stats)
+
+        await db.update_book(book)
+        await db.create_metrics(metrics)
+
+        return Output(result='done', data={'book': book, 'metrics': metrics})
@@ -0,0 +1,168 @@
+import asyncio
+import re
+from typing import Any
+
+from playwright.async_api import Page, Request, Response, Route
+
+import interfaces
+from waits import UrlMatcher, url_matches
+
+# Типичный размер ответа по типу ресурса, для оценки сэкономленного трафика.
+# Замерить нельзя: заблокированные типы до ответа не доходят
+TYPICAL_SIZES = {
+    'image': 40 * 1024,
+    'media': 500 * 1024,
+    'font': 30 * 1024,
+    'stylesheet': 20 * 1024,
+    'script': 60 * 1024,
+    'xhr': 5 * 1024,
+    'fetch': 5 * 1024,
+}
+
+
+class ResourceBlocker:
+    """Режет запросы страницы по политике `BaseWorkflow.block_resources`.
+
+    `allow_patterns` имеют приоритет над `resource_types` и `url_patterns`.
+    Запросы через `page.request` (например, `utils.save_cover`) через роутинг
+    не проходят и не блокируются.
+    """
+
+    def __init__(self, policy: interfaces.BlockResources):
+        self.resource_types = set(policy.get('resource_types', []))
+        self.url_patterns = [re.compile(p) for p in policy.get('url_patterns', [])]
+        self.allow_patterns = [re.compile(p) for p in policy.get('allow_patterns', [])]
+
+        self.stats = {
+            'blocked': 0,
+            'allowed': 0,
+            'allowed_bytes': 0,
+            'saved_bytes_est': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_types or self.url_patterns)
+
+    def is_blocked(self, url: str, resource_type: str) -> bool:
+        if any(p.search(url) for p in self.allow_patterns):
+            return False
+        if resource_type in self.resource_types:
+            return True
+        return any(p.search(url) for p in self.url_patterns)
+
+    async def attach(self, page: Page) -> None:
+        if not self.enabled:
+            return
+
+        page.on('response', self._on_response)
+        await page.route('**/*', self._handle)
+
+    async def detach(self, page: Page) -> None:
+        if not self.enabled:
+            return
+
+        page.remove_listener('response', self._on_response)
+        await page.unroute('**/*', self._handle)
+
+    async def _handle(self, route: Route, request: Request) -> None:
+        if self.is_blocked(request.url, request.resource_type):
+            self.stats['blocked'] += 1
+            self.stats['saved_bytes_est'] += TYPICAL_SIZES.get(request.resource_type, 0)
+            await route.abort('blockedbyclient')
+        else:
+            self.stats['allowed'] += 1
+            await route.fallback()
+
+    def _on_response(self, response: Response) -> None:
+        length = response.headers.get('content-length')
+        if not length or not length.isdigit():
+            return
+
+        self.stats['allowed_bytes'] += int(length)
+
+    def report(self) -> str:
+        s = self.stats
+        return (
+            f"requests blocked: {s['blocked']}, allowed: {s['allowed']}, "
+            f"allowed: {s['allowed_bytes'] // 1024}KB, saved ~{s['saved_bytes_est'] // 1024}KB"
+        )
+
+
+class ResponseCapture:
+    """JSON, который страница сама скачивает при загрузке.
+
+    Шаблоны регистрируются до `goto`, тела подходящих XHR/fetch ответов
+    разбираются в фоне, и воркфлоу читает поля из них, а не из DOM:
+
+        capture = ResponseCapture(page, stats='/stats?bookmarks=true')
+        capture.attach()
+        await page.goto(url)
+        stats = await capture.json('stats')
+    """
+
+    def __init__(self, page: Page, **patterns: UrlMatcher):
+        self.page = page
+        self.patterns = patterns
+
+        self._bodies: dict[str, list[Any]] = {name: [] for name in patterns}
+        self._first: dict[str, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+        self.stats = {'captured': 0, 'bad_json': 0}
+
+    def attach(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._first = {name: loop.create_future() for name in self.patterns}
+        self.page.on('response', self._on_response)
+
+    def detach(self) -> None:
+        self.page.remove_listener('response', self._on_response)
+        for task in self._tasks:
+            task.cancel()
+        for future in self._first.values():
+            if not future.done():
+                future.cancel()
+
+    def _on_response(self, response: Response) -> None:
+        if response.request.resource_type not in ('xhr', 'fetch'):
+            return
+        for name, pattern in self.patterns.items():
+            if url_matches(pattern, response.url):
+                task = asyncio.create_task(self._read(name, response))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _read(self, name: str, response: Response) -> None:
+        try:
+            body = await response.json()
+        except Exception:
+            # Не JSON или страница ушла дальше, пока читали тело
+            self.stats['bad_json'] += 1
+            return
+
+        self.stats['captured'] += 1
+        self._bodies[name].append(body)
+        if not self._first[name].done():
+            self._first[name].set_result(body)
+
+    async def json(self, name: str, timeout: float = 10_000) -> Any | None:
+        """Первое тело по шаблону `name`; None, если за `timeout` его не было."""
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._first[name]), timeout / 1000)
+        except asyncio.TimeoutError:
+            return None
+
+    async def settled(self) -> None:
+        """Дождаться разбора уже пойманных ответов."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def all(self, name: str) -> list[Any]:
+        """Все тела по шаблону `name`, пойманные к этому моменту."""
+        return list(self._bodies[name])
+
+    def take(self, name: str) -> list[Any]:
+        """Как `all`, но очищает список: удобно для догружающихся списков."""
+        bodies, self._bodies[name] = self._bodies[name], []
+        return bodies
@@ -0,0 +1,142 @@
+import asyncio
+import re
+import time
+from dataclasses import dataclass, field
+
+import httpx
+from furl import furl
+from playwright.async_api import Page
+
+from http_engine import DEFAULT_HEADERS, HttpResponse
+
+# Признаки страницы с JS/cookie челленджем вместо контента
+CHALLENGE_STATUSES = {401, 403, 429, 503}
+CHALLENGE_MARKERS = re.compile(
+    r'challenge-platform|cf-chl|Just a moment\.\.\.|ddos-guard|__qrator|Проверка браузера',
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class SiteSession:
+    client: httpx.AsyncClient
+    warmed: float = field(default_factory=time.monotonic)
+    requests: int = 0
+    # Запросы, идущие через клиент прямо сейчас, и снята ли сессия из карты:
+    # снятая закрывается, когда последний из них закончится
+    inflight: int = 0
+    dropped: bool = False
+
+    async def release(self) -> None:
+        self.inflight -= 1
+        if self.dropped and not self.inflight:
+            await self.client.aclose()
+
+
+class SessionManager:
+    """Сессии сайтов, прогретые браузером и переиспользуемые через httpx.
+
+    Страница проходит челлендж сайта один раз, куки и user-agent переносятся
+    в `httpx.AsyncClient`, и дальше запросы идут без браузера. Прогрев - в
+    отдельной вкладке контекста страницы, клиент ходит с прокси этого
+    контекста. Если сайт снова отдал челлендж, сессия прогревается заново.
+    """
+
+    def __init__(self):
+        self._sessions: dict[tuple[str, str | None], SiteSession] = {}
+        self._locks: dict[tuple[str, str | None], asyncio.Lock] = {}
+
+        self.stats = {'warms': 0, 'requests': 0, 'challenges': 0}
+
+    @staticmethod
+    def is_challenge(resp: httpx.Response) -> bool:
+        if resp.status_code in CHALLENGE_STATUSES:
+            return True
+        content_type = resp.headers.get('content-type', '')
+        return 'html' in content_type and bool(CHALLENGE_MARKERS.search(resp.text[:20_000]))
+
+    async def _warm(self, page: Page, url: str, proxy: str | None) -> SiteSession:
+        # Отдельная вкладка того же контекста: страница таска остаётся, где была
+        warm_page = await page.context.new_page()
+        try:
+            await warm_page.goto(url, wait_until='domcontentloaded')
+            try:
+                # Даём челленджу отработать и перекинуть на сайт
+                await warm_page.wait_for_load_state('networkidle', timeout=15_000)
+            except Exception:
+                pass
+
+            user_agent = await warm_page.evaluate('navigator.userAgent')
+        finally:
+            await warm_page.close()
+
+        cookies = httpx.Cookies()
+        for c in await page.context.cookies():
+            cookies.set(c['name'], c['value'], domain=c['domain'], path=c['path'])
+
+        client = httpx.AsyncClient(
+            http2=True,
+            proxy=proxy,
+            headers=DEFAULT_HEADERS | {
+                'user-agent': user_agent,
+                'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            },
+            cookies=cookies,
+            follow_redirects=True,
+        )
+
+        self.stats['warms'] += 1
+        return SiteSession(client=client)
+
+    async def _drop(self, key: tuple[str, str | None]) -> None:
+        if session := self._sessions.pop(key, None):
+            session.dropped = True
+            if not session.inflight:
+                await session.client.aclose()
+
+    async def fetch(
+        self,
+        page: Page,
+        url: str,
+        proxy: str | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float = 30_000,
+    ) -> HttpResponse:
+        key = (furl(url).host, proxy)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+
+        for attempt in range(2):
+            async with lock:
+                if key not in self._sessions:
+                    self._sessions[key] = await self._warm(page, url, proxy)
+                session = self._sessions[key]
+                session.inflight += 1
+
+            try:
+                resp = await session.client.get(url, headers=headers, timeout=timeout / 1000)
+            finally:
+                await session.release()
+            session.requests += 1
+            self.stats['requests'] += 1
+
+            if not self.is_challenge(resp):
+                return HttpResponse(resp)
+
+            self.stats['challenges'] += 1
+            async with lock:
+                if self._sessions.get(key) is session:
+                    await self._drop(key)
+
+        return HttpResponse(resp)
+
+    async def close(self) -> None:
+        for key in list(self._sessions):
+            await self._drop(key)
+
+    def report(self) -> str:
+        s = self.stats
+        return f"sessions warms: {s['warms']}, requests: {s['requests']}, challenges: {s['challenges']}"
+
+
+# Общий на процесс воркера, сессии живут между тасками
+session_manager = SessionManager()
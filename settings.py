@@ -11,6 +11,12 @@ load_dotenv()
 
 SESSION = os.environ['SESSION']
 PROXY_URI = os.environ['PROXY_URI']
+# Прокси для слотов воркера, по кругу: PROXY_URIS=http://a:1,http://b:2
+PROXY_URIS = [
+    p.strip()
+    for p in (os.environ.get('PROXY_URIS') or PROXY_URI).split(',')
+    if p.strip()
+]
 MONGO_URI = os.environ['MONGO_URI']
 
 AWS_ENDPOINT_URL = os.environ['AWS_ENDPOINT_URL']
@@ -20,6 +26,30 @@ AWS_COVERS_BUCKET = os.environ['AWS_COVERS_BUCKET']
 AWS_COVERS_DIR = 'covers'
 
 BROWSER_ADDONS_DIR='/app/browser_addons'
+# Перезапуск браузера после N тасков или N секунд жизни
+BROWSER_MAX_TASKS = int(os.environ.get('BROWSER_MAX_TASKS', 200))
+BROWSER_MAX_AGE_SEC = int(os.environ.get('BROWSER_MAX_AGE_SEC', 3_600))
+# Вотчдог памяти браузера: выше MAX - перезапуск после таска, выше KILL - таск падает
+BROWSER_MAX_RSS_MB = int(os.environ.get('BROWSER_MAX_RSS_MB', 2_500))
+BROWSER_KILL_RSS_MB = int(os.environ.get('BROWSER_KILL_RSS_MB', 3_500))
+BROWSER_RSS_CHECK_SEC = int(os.environ.get('BROWSER_RSS_CHECK_SEC', 10))
+# Снапшоты куки/localStorage по сайтам вместо общего persistent профиля
+BROWSER_SNAPSHOTS_DIR = 'user_data/snapshots'
+BROWSER_SNAPSHOT_MAX_KB = int(os.environ.get('BROWSER_SNAPSHOT_MAX_KB', 512))
+BROWSER_SNAPSHOT_EVERY = int(os.environ.get('BROWSER_SNAPSHOT_EVERY', 20))
+# Не закрывать страницу слота после таска, а сбрасывать и отдавать следующему
+BROWSER_REUSE_PAGE = bool(os.environ.get('BROWSER_REUSE_PAGE'))
+BROWSER_REUSE_CLEAR_STORAGE = bool(os.environ.get('BROWSER_REUSE_CLEAR_STORAGE'))
+# Дедупликация `crawl`: хэши поставленных тасков в SQLite воркера или, если
+# задан DEDUPE_REDIS_URI, в общем Redis. Старше DEDUPE_MAX_HOURS - удаляются
+DEDUPE_SQLITE_PATH = 'user_data/dedupe.sqlite3'
+DEDUPE_REDIS_URI = os.environ.get('DEDUPE_REDIS_URI')
+DEDUPE_MAX_HOURS = int(os.environ.get('DEDUPE_MAX_HOURS', 480))
+# Не подтверждённый в Hatchet таск считается дублем столько минут, потом
+# статус проверяется заново: упавший или отменённый таск можно ставить снова
+DEDUPE_PENDING_MINUTES = int(os.environ.get('DEDUPE_PENDING_MINUTES', 30))
+# Сколько тасков воркер выполняет параллельно, каждый в своём контексте браузера
+WORKER_SLOTS = int(os.environ.get('WORKER_SLOTS', 1))
 
 
 if labels_str := os.environ.get('LABELS'):
@@ -34,6 +64,20 @@ if labels_str := os.environ.get('LABELS'):
 else:
     WORKER_LABELS = interfaces.WorkerLabels()
 
+# Какие воркфлоу регистрирует воркер, через запятую ключ:значение.
+# Ключи: module, site, customer, event (префикс события).
+# WORKFLOWS_INCLUDE=site:litnet.com,event:livelib:mangalib
+WORKFLOWS_INCLUDE = [
+    tuple(f.strip().split(':', 1))
+    for f in os.environ.get('WORKFLOWS_INCLUDE', '').split(',')
+    if ':' in f
+]
+WORKFLOWS_EXCLUDE = [
+    tuple(f.strip().split(':', 1))
+    for f in os.environ.get('WORKFLOWS_EXCLUDE', '').split(',')
+    if ':' in f
+]
+
 
 DEBUG = os.environ.get('DEBUG')
 DEBUG_PW_SERVER = 'ws://127.0.0.1:3000/'
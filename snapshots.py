@@ -0,0 +1,72 @@
+import json
+import re
+import time
+from pathlib import Path
+from typing import Any
+
+from playwright.async_api import BrowserContext
+
+import settings
+
+
+class SnapshotStore:
+    """Куки и localStorage сайтов, по файлу на сайт.
+
+    Контекст таска создаётся из снапшота своего сайта и сохраняется обратно,
+    поэтому сессия одного сайта не влияет на другие, а один снапшот могут
+    одновременно читать несколько слотов. При сохранении выкидываются
+    истёкшие куки, а если файл больше `max_kb`, - самые большие значения
+    localStorage.
+    """
+
+    def __init__(
+        self,
+        path: str = settings.BROWSER_SNAPSHOTS_DIR,
+        max_kb: int = settings.BROWSER_SNAPSHOT_MAX_KB,
+    ):
+        self.path = Path(path)
+        self.max_kb = max_kb
+
+    def file(self, site: str) -> Path:
+        name = re.sub(r'[^\w.-]', '_', site)
+        return self.path / f'{name}.json'
+
+    def load(self, site: str) -> str | None:
+        """Путь для `new_context(storage_state=...)` или None, если снапшота нет."""
+        file = self.file(site)
+        return str(file) if file.exists() else None
+
+    async def save(self, site: str, context: BrowserContext) -> None:
+        state = self.compact(await context.storage_state())
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        file = self.file(site)
+        # У каждого контекста свой tmp: один сайт могут сохранять несколько слотов
+        tmp = file.with_name(f'{file.stem}.{id(context)}.tmp')
+        tmp.write_text(json.dumps(state, ensure_ascii=False), encoding='utf-8')
+        tmp.replace(file)
+
+    def drop(self, site: str) -> None:
+        self.file(site).unlink(missing_ok=True)
+
+    def compact(self, state: dict[str, Any]) -> dict[str, Any]:
+        now = time.time()
+        state['cookies'] = [
+            c for c in state.get('cookies', [])
+            if c.get('expires', -1) == -1 or c['expires'] > now
+        ]
+
+        items = [
+            (len(item['name']) + len(item['value']), origin, item)
+            for origin in state.get('origins', [])
+            for item in origin.get('localStorage', [])
+        ]
+        size = len(json.dumps(state, ensure_ascii=False).encode())
+        for item_size, origin, item in sorted(items, key=lambda i: i[0], reverse=True):
+            if size <= self.max_kb * 1024:
+                break
+            origin['localStorage'].remove(item)
+            size -= item_size
+
+        state['origins'] = [o for o in state.get('origins', []) if o.get('localStorage')]
+        return state
@@ -0,0 +1,234 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+from urllib.parse import urljoin
+
+from playwright.async_api import Page
+
+from extract import Document
+
+# Типы schema.org, которые описывают саму книгу
+BOOK_TYPES = {'Book', 'Audiobook', 'Product', 'CreativeWork', 'CreativeWorkSeries', 'ComicSeries', 'ComicStory'}
+
+# Глобальные переменные, в которые SSR-фреймворки кладут состояние страницы
+STATE_GLOBALS = ['__NUXT__', '__INITIAL_STATE__', '__APOLLO_STATE__', '__PRELOADED_STATE__']
+
+STRUCTURED_JS = '''([globals, withState]) => {
+    const out = {jsonld: [], microdata: [], state: {}};
+
+    for (const s of document.querySelectorAll('script[type="application/ld+json"]')) {
+        try { out.jsonld.push(JSON.parse(s.textContent)); } catch (e) {}
+    }
+
+    const item = (root) => {
+        const obj = {'@type': root.getAttribute('itemtype')};
+        for (const el of root.querySelectorAll('[itemprop]')) {
+            if (el.parentElement.closest('[itemscope]') !== root) continue;
+            const value = el.hasAttribute('itemscope') ? item(el)
+                : (el.getAttribute('content') ?? el.getAttribute('href') ?? el.getAttribute('src') ?? el.textContent.trim());
+            for (const name of el.getAttribute('itemprop').split(/\\s+/)) {
+                (obj[name] ??= []).push(value);
+            }
+        }
+        return obj;
+    };
+    for (const el of document.querySelectorAll('[itemscope]:not([itemprop])')) {
+        out.microdata.push(item(el));
+    }
+
+    if (!withState) return out;
+
+    // Next.js и Angular TransferState
+    for (const s of document.querySelectorAll('script#__NEXT_DATA__, script[id$="-state"][type="application/json"]')) {
+        try { out.state[s.id] = JSON.parse(s.textContent); } catch (e) {}
+    }
+    for (const name of globals) {
+        try {
+            if (window[name] !== undefined) out.state[name] = JSON.parse(JSON.stringify(window[name]));
+        } catch (e) {}
+    }
+    return out;
+}'''
+
+
+@dataclass
+class Structured:
+    """Структурированные данные страницы: JSON-LD, microdata и состояние SSR."""
+    jsonld: list[Any] = field(default_factory=list)
+    microdata: list[dict] = field(default_factory=list)
+    # id скрипта или имя глобальной переменной -> распарсенное состояние
+    state: dict[str, Any] = field(default_factory=dict)
+
+    def items(self) -> Iterator[dict]:
+        """Все объекты schema.org, включая @graph и вложенные списки."""
+        stack = list(self.jsonld) + list(self.microdata)
+        while stack:
+            obj = stack.pop(0)
+            if isinstance(obj, list):
+                stack[:0] = obj
+            elif isinstance(obj, dict):
+                if isinstance(obj.get('@graph'), list):
+                    stack[:0] = obj['@graph']
+                yield obj
+
+    def book_item(self) -> dict | None:
+        for obj in self.items():
+            if BOOK_TYPES & set(_types(obj)):
+                return obj
+        return None
+
+    def fill(self, book: dict, metrics: dict, base_url: str = '') -> str | None:
+        """Дописывает в `book`/`metrics` общие поля, которых там ещё нет.
+
+        Возвращает ссылку на обложку, если она есть: сохранять её через
+        `utils.save_cover` - дело воркфлоу.
+        """
+        item = self.book_item()
+        if not item:
+            return None
+
+        if title := _text(item.get('name')):
+            book.setdefault('title', title)
+
+        if authors := _people(item.get('author')):
+            book.setdefault('author', ', '.join(a['name'] for a in authors))
+            if all(a.get('url') for a in authors):
+                book.setdefault('authors_data', [a | {'url': urljoin(base_url, a['url'])} for a in authors])
+
+        if annotation := _text(item.get('description')):
+            book.setdefault('annotation', annotation)
+
+        rating = _first(item.get('aggregateRating'))
+        if isinstance(rating, dict):
+            if (value := _number(rating.get('ratingValue'))) and value != '0':
+                metrics.setdefault('rating', value)
+            votes = _number(rating.get('ratingCount')) or _number(rating.get('reviewCount'))
+            if votes and votes != '0':
+                metrics.setdefault('votes', votes)
+
+        offer = _first(item.get('offers'))
+        if isinstance(offer, dict):
+            if (price := _number(offer.get('price') or offer.get('lowPrice'))) is not None:
+                metrics.setdefault('price', price)
+
+        image = _first(item.get('image'))
+        if isinstance(image, dict):
+            image = _first(image.get('url') or image.get('contentUrl'))
+        return urljoin(base_url, image) if isinstance(image, str) and image else None
+
+
+def find_dicts(obj: Any, *keys: str) -> Iterator[dict]:
+    """Словари внутри состояния SSR, у которых есть все `keys`.
+
+    Форма состояния у каждого сайта своя, это помогает найти в нём объект
+    книги, не расписывая весь путь до него.
+    """
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            if all(k in obj for k in keys):
+                yield obj
+            stack.extend(obj.values())
+        elif isinstance(obj, list):
+            stack.extend(obj)
+
+
+async def structured(page: Page, state: bool = False) -> Structured:
+    """Всё структурированное со страницы одним `page.evaluate`.
+
+    Состояние SSR бывает большим и целиком идёт через CDP, поэтому
+    собирается, только если `state=True`.
+    """
+    return Structured(**await page.evaluate(STRUCTURED_JS, [STATE_GLOBALS, state]))
+
+
+def structured_from_document(doc: Document, state: bool = False) -> Structured:
+    """То же по разобранному HTML. Глобальные переменные без JS недоступны."""
+    out = Structured()
+
+    for s in doc.css('script[type="application/ld+json"]'):
+        try:
+            out.jsonld.append(json.loads(s.text(deep=True)))
+        except ValueError:
+            pass
+
+    for el in doc.css('[itemscope]'):
+        if 'itemprop' not in el.attributes:
+            out.microdata.append(_microdata_item(doc, el))
+
+    if not state:
+        return out
+
+    for s in doc.css('script#__NEXT_DATA__, script[id$="-state"][type="application/json"]'):
+        try:
+            out.state[s.attributes['id']] = json.loads(s.text(deep=True))
+        except ValueError:
+            pass
+
+    return out
+
+
+def _microdata_item(doc: Document, root) -> dict:
+    obj = {'@type': root.attributes.get('itemtype')}
+    for el in doc.css('[itemprop]', root):
+        scope = el.parent
+        while scope is not None and 'itemscope' not in scope.attributes:
+            scope = scope.parent
+        if scope != root:
+            continue
+
+        if 'itemscope' in el.attributes:
+            value = _microdata_item(doc, el)
+        else:
+            attrs = el.attributes
+            value = attrs.get('content') or attrs.get('href') or attrs.get('src') or el.text(deep=True).strip()
+        for name in (el.attributes.get('itemprop') or '').split():
+            obj.setdefault(name, []).append(value)
+    return obj
+
+
+def _types(obj: dict) -> list[str]:
+    types = obj.get('@type') or []
+    if isinstance(types, str):
+        types = [types]
+    # microdata: http://schema.org/Book -> Book
+    return [t.rsplit('/', 1)[-1] for t in types if isinstance(t, str)]
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _text(value: Any) -> str | None:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = _first(value.get('name'))
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def _number(value: Any) -> str | None:
+    value = _first(value)
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, str) and (m := re.search(r'\d+(?:[.,]\d+)?', value.replace('\xa0', '').replace(' ', ''))):
+        return m.group(0).replace(',', '.')
+    return None
+
+
+def _people(value: Any) -> list[dict]:
+    if value is None:
+        return []
+    people = []
+    for p in value if isinstance(value, list) else [value]:
+        if name := _text(p):
+            person = {'name': name}
+            if isinstance(p, dict) and (url := _first(p.get('url'))):
+                person['url'] = url
+            people.append(person)
+    return people
@@ -1,20 +1,43 @@
 import hashlib
+import importlib.util
+import sys
 from io import BytesIO
 from pathlib import Path
+from types import ModuleType
+from typing import AsyncIterator
 from urllib.parse import urljoin
 
-import puremagic
-from aiobotocore.session import get_session
 from furl import furl
-from PIL import Image
 from playwright.async_api import Page
-from usp.tree import sitemap_tree_for_homepage
 
 import settings
 
 
-async def save_cover(page: Page, cover_url: str, timeout: int = 10_000) -> str | None:
-    page_url = page.url
+def lazy_import(name: str) -> ModuleType:
+    """Модуль, который импортируется при первом обращении к атрибуту.
+
+    Для тяжёлых зависимостей (dateparser, pandas), которые нужны не каждому
+    воркеру: импорт на старте воркера стоит секунды.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+async def save_cover(page: Page, cover_url: str, timeout: int = 10_000, referer: str | None = None) -> str | None:
+    import puremagic
+    from aiobotocore.session import get_session
+    from PIL import Image
+
+    # referer - для воркфлоу, чья страница не открывала саму книгу (JSON API)
+    page_url = referer or page.url
     cover_url = urljoin(page_url, cover_url).split('?', 1)[0]
 
     headers = {
@@ -59,11 +82,64 @@ async def save_cover(page: Page, cover_url: str, timeout: int = 10_000) -> str |
         return None
 
 def sitemap(url: str) -> list[str]:
+    from usp.tree import sitemap_tree_for_homepage
+
     tree = sitemap_tree_for_homepage(url, use_robots=False)
     all_pages = [page.url for page in tree.all_pages()]
 
     return list(set(all_pages))
 
+async def iter_sitemap(url: str) -> AsyncIterator[str]:
+    """Ссылки страниц из sitemap сайта по мере загрузки.
+
+    В отличие от `sitemap` дерево не собирается: вложенные карты
+    обходятся по очереди, в памяти одна карта, очередь ссылок на карты и
+    уже отданные ссылки (для дублей между картами). Битая карта пропускается.
+    """
+    import gzip
+    from xml.etree.ElementTree import iterparse
+
+    import httpx
+
+    queue = [urljoin(url, '/sitemap.xml')]
+    seen = set(queue)
+
+    async with httpx.AsyncClient(follow_redirects=True, timeout=60) as client:
+        while queue:
+            sitemap_url = queue.pop()
+            try:
+                resp = await client.get(sitemap_url)
+            except httpx.HTTPError as e:
+                print(f'sitemap error {sitemap_url}: {e!r}')
+                continue
+            if resp.status_code != 200:
+                continue
+
+            content = resp.content
+            try:
+                if content[:2] == b'\x1f\x8b':
+                    content = gzip.decompress(content)
+                elements = list(iterparse(BytesIO(content)))
+            except Exception as e:
+                print(f'sitemap parse error {sitemap_url}: {e!r}')
+                continue
+
+            for _, el in elements:
+                tag = el.tag.rsplit('}', 1)[-1]
+                if tag not in ('url', 'sitemap'):
+                    continue
+
+                loc = (el.findtext('{*}loc') or '').strip()
+                el.clear()
+                if not loc or loc in seen:
+                    continue
+
+                seen.add(loc)
+                if tag == 'url':
+                    yield loc
+                else:
+                    queue.append(loc)
+
 async def detect_new_tab_url(page: Page, timeout: int = 5000):
     try:
         new_page = await page.context.wait_for_event('page', timeout=timeout)
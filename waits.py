@@ -0,0 +1,226 @@
+import asyncio
+import re
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable
+from weakref import WeakKeyDictionary
+
+from playwright.async_api import Page, Request, Response
+
+# Запросы, которые считаются для network_quiet: картинки, шрифты и
+# вебсокеты грузятся долго и на данные страницы не влияют
+QUIET_RESOURCE_TYPES = ('document', 'script', 'xhr', 'fetch')
+
+UrlMatcher = str | re.Pattern | Callable[[str], bool]
+
+
+def url_matches(matcher: UrlMatcher, url: str) -> bool:
+    if callable(matcher) and not isinstance(matcher, re.Pattern):
+        return matcher(url)
+    if isinstance(matcher, re.Pattern):
+        return bool(matcher.search(url))
+    return matcher in url
+
+
+async def selector_stable(
+    page: Page,
+    selector: str,
+    stable_ms: int = 500,
+    timeout: int = 10_000,
+    poll_ms: int = 100,
+) -> bool:
+    """Ждёт, пока элементы `selector` есть и их число не меняется `stable_ms`."""
+    locator = page.locator(selector)
+    deadline = time.monotonic() + timeout / 1000
+    last_count = -1
+    since = time.monotonic()
+
+    while time.monotonic() < deadline:
+        count = await locator.count()
+        now = time.monotonic()
+        if count != last_count:
+            last_count, since = count, now
+        elif count > 0 and (now - since) * 1000 >= stable_ms:
+            return True
+        await asyncio.sleep(poll_ms / 1000)
+    return False
+
+
+class RequestTracker:
+    """Незавершённые запросы страницы с момента `attach`.
+
+    Ставится до `goto`: иначе `network_quiet` сразу после навигации не
+    видит XHR, начатые до его вызова, и возвращает тишину посреди загрузки.
+    """
+
+    def __init__(self):
+        self.inflight: set[Request] = set()
+
+    def attach(self, page: Page) -> None:
+        page.on('request', self._on_request)
+        page.on('requestfinished', self._on_done)
+        page.on('requestfailed', self._on_done)
+        _trackers[page] = self
+
+    def detach(self, page: Page) -> None:
+        page.remove_listener('request', self._on_request)
+        page.remove_listener('requestfinished', self._on_done)
+        page.remove_listener('requestfailed', self._on_done)
+        _trackers.pop(page, None)
+        self.inflight.clear()
+
+    def _on_request(self, request: Request) -> None:
+        self.inflight.add(request)
+
+    def _on_done(self, request: Request) -> None:
+        self.inflight.discard(request)
+
+
+_trackers: WeakKeyDictionary = WeakKeyDictionary()
+
+
+async def network_quiet(
+    page: Page,
+    quiet_ms: int = 500,
+    cap_ms: int = 5_000,
+    resource_types: tuple[str, ...] = QUIET_RESOURCE_TYPES,
+) -> bool:
+    """Ждёт `quiet_ms` без запросов `resource_types`, но не дольше `cap_ms`.
+
+    В отличие от `networkidle` работает в любой момент, а не только при
+    загрузке, и не падает по таймауту: False - тишины так и не было.
+    Запросы, начатые до вызова, видны только через `RequestTracker` страницы.
+    """
+    inflight: set[Request] = set()
+    if tracker := _trackers.get(page):
+        inflight = {r for r in tracker.inflight if r.resource_type in resource_types}
+    idle_since = time.monotonic()
+
+    def on_request(request: Request) -> None:
+        if request.resource_type in resource_types:
+            inflight.add(request)
+
+    def on_done(request: Request) -> None:
+        nonlocal idle_since
+        if request in inflight:
+            inflight.discard(request)
+            if not inflight:
+                idle_since = time.monotonic()
+
+    page.on('request', on_request)
+    page.on('requestfinished', on_done)
+    page.on('requestfailed', on_done)
+    try:
+        deadline = time.monotonic() + cap_ms / 1000
+        while time.monotonic() < deadline:
+            if not inflight and (time.monotonic() - idle_since) * 1000 >= quiet_ms:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+    finally:
+        page.remove_listener('request', on_request)
+        page.remove_listener('requestfinished', on_done)
+        page.remove_listener('requestfailed', on_done)
+
+
+@dataclass
+class ResponseWait:
+    ok: bool = False
+    response: Response | None = None
+
+
+@asynccontextmanager
+async def response_finished(
+    page: Page,
+    url: UrlMatcher,
+    timeout: int = 10_000,
+) -> AsyncIterator[ResponseWait]:
+    """Ответ на `url`, пойманный во время блока, дочитанный до конца.
+
+    Слушатель ставится до блока, поэтому ответ на клик внутри блока не
+    теряется. Таймаут не бросает исключение, а оставляет `ok=False`.
+    """
+    result = ResponseWait()
+    future: asyncio.Future[Response] = asyncio.get_running_loop().create_future()
+
+    def on_response(response: Response) -> None:
+        if not future.done() and url_matches(url, response.url):
+            future.set_result(response)
+
+    page.on('response', on_response)
+    started = time.monotonic()
+    try:
+        yield result
+
+        remaining = timeout / 1000 - (time.monotonic() - started)
+        try:
+            result.response = await asyncio.wait_for(future, max(remaining, 0))
+            await result.response.finished()
+            result.ok = True
+        except asyncio.TimeoutError:
+            pass
+    finally:
+        page.remove_listener('response', on_response)
+        if not future.done():
+            future.cancel()
+
+
+@dataclass
+class WaitStats:
+    count: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+    timeouts: int = 0
+    # На сколько меньше, чем фиксированные sleep'ы, которые заменило ожидание
+    saved_ms: float = 0
+
+
+@dataclass
+class WaitLog:
+    """Сколько на самом деле длились ожидания: по сайтам и по текущему таску."""
+    sites: dict[tuple[str, str], WaitStats] = field(default_factory=lambda: defaultdict(WaitStats))
+    _pages: WeakKeyDictionary = field(default_factory=WeakKeyDictionary)
+
+    def record(
+        self,
+        page: Page,
+        site: str,
+        kind: str,
+        started: float,
+        ok: bool,
+        replaces_ms: int = 0,
+    ) -> float:
+        ms = (time.monotonic() - started) * 1000
+
+        stats = self.sites[(site, kind)]
+        stats.count += 1
+        stats.total_ms += ms
+        stats.max_ms = max(stats.max_ms, ms)
+        stats.timeouts += not ok
+        if replaces_ms:
+            stats.saved_ms += replaces_ms - ms
+
+        self._pages.setdefault(page, []).append(ms)
+        return ms
+
+    def start(self, page: Page) -> None:
+        self._pages.pop(page, None)
+
+    def take(self, page: Page) -> str:
+        waits = self._pages.pop(page, [])
+        return f'waits: {len(waits)}, {sum(waits):.0f}ms'
+
+    def report(self) -> str:
+        lines = []
+        for (site, kind), s in sorted(self.sites.items()):
+            lines.append(
+                f'{site} {kind}: {s.count} waits, avg {s.total_ms / s.count:.0f}ms, '
+                f'max {s.max_ms:.0f}ms, timeouts {s.timeouts}, saved {s.saved_ms / 1000:.0f}s'
+            )
+        return '\n'.join(lines)
+
+
+# Общий на процесс воркера
+wait_log = WaitLog()
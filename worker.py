@@ -2,10 +2,9 @@ import importlib
 import inspect
 import pathlib
 import pkgutil
-from pathlib import Path
+import re
+import time
 
-from browserforge.fingerprints import Screen
-from camoufox.async_api import AsyncCamoufox
 from hatchet_sdk import (
     ConcurrencyExpression,
     ConcurrencyLimitStrategy,
@@ -14,13 +13,24 @@ from hatchet_sdk import (
 )
 from hatchet_sdk.labels import DesiredWorkerLabel
 
+import dedupe
 import settings
+from browser_pool import BrowserPool
+from http_engine import HttpEngine
+from network import ResourceBlocker
+from sessions import session_manager
 from settings import hatchet
+from waits import RequestTracker, wait_log
 from workflow_base import BaseLitresPartnersWorkflow
 
 WORKFLOWS_DIR = pathlib.Path(__file__).parent / 'workflows'
 PACKAGE_NAME = 'workflows'  # папка должна содержать __init__.py
 
+# Один браузер на процесс воркера, переиспользуется между тасками
+browser_pool = BrowserPool()
+# Общие HTTP-соединения для воркфлоу с engine = 'http'
+http_engine = HttpEngine()
+
 
 def create_task_for_class(wf: BaseLitresPartnersWorkflow) -> Workflow:
     @hatchet.task(
@@ -49,56 +59,118 @@ def create_task_for_class(wf: BaseLitresPartnersWorkflow) -> Workflow:
 
     )
     async def task_function(input: wf.input, ctx: Context) -> wf.output:
-        addons_dir = Path(settings.BROWSER_ADDONS_DIR)
-        if addons_dir.exists():
-            addons_paths_list = [str(f.resolve()) for f in addons_dir.iterdir() if addons_dir.is_dir()]
-        else:
-            addons_paths_list = []
-
-        async with AsyncCamoufox(
-            os='windows',
-            humanize=True,
-            headless='virtual',
-            screen=Screen(max_width=1920, max_height=1080),
-            persistent_context=True,
-            user_data_dir='user_data',
-            locale=['ru-RU', 'en-US'],
-            addons=addons_paths_list,
-            proxy={'server': settings.PROXY_URI} if wf.proxy_enable else None,
-        ) as browser:
-            page = await browser.new_page()
-
-            instance = wf(
-                name=wf.name,
-                event=wf.event,
-                customer=wf.customer,
-                input=wf.input,
-                output=wf.output,
-            )
-            result = await instance.task(input, page)
-
+        instance = wf(
+            name=wf.name,
+            event=wf.event,
+            customer=wf.customer,
+            input=wf.input,
+            output=wf.output,
+        )
+
+        if wf.engine_for(input) == 'http':
+            async with http_engine.page(wf.proxy_enable) as page:
+                result = await instance.task(input, page)
+
+            ctx.log(f'{http_engine.report()}; {dedupe.stats.report()}')
             return result
 
+        async with browser_pool.lease(wf.site, wf.proxy_enable) as lease:
+            blocker = ResourceBlocker(wf.block_resources)
+            await blocker.attach(lease.page)
+            tracker = RequestTracker()
+            tracker.attach(lease.page)
+            wait_log.start(lease.page)
+
+            try:
+                result = await instance.task(input, lease.page)
+            finally:
+                tracker.detach(lease.page)
+                if not lease.page.is_closed():
+                    await blocker.detach(lease.page)
+
+        ctx.log(
+            f'{lease.report()}; {blocker.report()}; {wait_log.take(lease.page)}; '
+            f'{browser_pool.report()}; {session_manager.report()}; {dedupe.stats.report()}'
+        )
+        return result
+
     return task_function
 
 
+def _matches(filters: list[tuple[str, str]], values: dict[str, list[str]]) -> bool:
+    for key, pattern in filters:
+        for value in values.get(key, []):
+            if value == pattern or (key == 'event' and value.startswith(pattern)):
+                return True
+    return False
+
+
+def _module_wanted(module_name: str, path: pathlib.Path) -> bool:
+    """Решает по исходнику модуля, без импорта, нужен ли он воркеру."""
+    include = [
+        (k, v) for k, v in settings.WORKFLOWS_INCLUDE
+        if k in ('module', 'site', 'event')
+    ]
+    exclude = [(k, v) for k, v in settings.WORKFLOWS_EXCLUDE if k == 'module']
+
+    source = path.read_text(encoding='utf-8')
+    values = {
+        'module': [module_name],
+        'site': re.findall(r"^\s+site\s*=\s*['\"]([^'\"]+)", source, re.MULTILINE),
+        'event': re.findall(r"^\s+event\s*=\s*['\"]([^'\"]+)", source, re.MULTILINE),
+    }
+
+    if _matches(exclude, values):
+        return False
+    # customer обычно наследуется от базового класса, по исходнику его не проверить
+    if include and len(include) == len(settings.WORKFLOWS_INCLUDE):
+        return _matches(include, values)
+    return True
+
+
+def _workflow_wanted(wf: BaseLitresPartnersWorkflow) -> bool:
+    # Hatchet всё равно не отдаст воркеру таск с неподходящими labels
+    if any(settings.WORKER_LABELS.get(k) != v for k, v in wf.labels.items()):
+        return False
+
+    values = {
+        'module': [wf.__module__.rsplit('.', 1)[-1]],
+        'site': [wf.site],
+        'customer': [wf.customer],
+        'event': [wf.event],
+    }
+    if _matches(settings.WORKFLOWS_EXCLUDE, values):
+        return False
+    if settings.WORKFLOWS_INCLUDE:
+        return _matches(settings.WORKFLOWS_INCLUDE, values)
+    return True
+
+
 def load_workflows() -> list[Workflow]:
     workflows = []
 
     for module_info in pkgutil.iter_modules([str(WORKFLOWS_DIR)]):
+        if not _module_wanted(module_info.name, WORKFLOWS_DIR / f'{module_info.name}.py'):
+            continue
+
         module_name = f'{PACKAGE_NAME}.{module_info.name}'
+        started = time.perf_counter()
         module = importlib.import_module(module_name)
+        import_ms = (time.perf_counter() - started) * 1000
 
         classes_wf = [
             obj
             for _, obj in inspect.getmembers(module, inspect.isclass)
-            if obj.__module__ == module_name
+            if obj.__module__ == module_name and _workflow_wanted(obj)
         ]
 
         for wf in classes_wf:
             # Создаём таск для этого класса
             workflows.append(create_task_for_class(wf))
 
+        print(f'{module_name}: {import_ms:.0f}ms, workflows: {len(classes_wf)}')
+
+    print(f'workflows loaded: {len(workflows)}')
     return workflows
 
 
@@ -107,7 +179,7 @@ def main() -> None:
 
     worker = hatchet.worker(
         name=f'scaper-{settings.SESSION}',
-        slots=1,
+        slots=settings.WORKER_SLOTS,
         labels=settings.WORKER_LABELS,
         workflows=workflows,
     )
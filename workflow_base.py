@@ -1,27 +1,67 @@
 import asyncio
 import hashlib
 import re
+import resource
+import time
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from itertools import batched
 from pprint import pp
-from typing import ClassVar, Generic, Literal, Optional, Type, TypeVar
+from typing import Any, AsyncIterable, AsyncIterator, ClassVar, Generic, Iterable, Literal, Optional, Type, TypeVar
 
-import pandas as pd
-from browserforge.fingerprints import Screen
-from camoufox.async_api import AsyncCamoufox
 from hatchet_sdk import PushEventOptions, V1TaskStatus
 from hatchet_sdk.clients.events import BulkPushEventWithMetadata
 from playwright.async_api import Page
-from pymongo import AsyncMongoClient
 
+import dedupe
 import interfaces
 import settings
+import waits
+from browser_pool import context_proxy
 from db import DbSamizdatPrisma
+from extract import Document
+from http_engine import HttpEngine, HttpResponse
+from network import ResourceBlocker, ResponseCapture
+from sessions import session_manager
 from settings import hatchet
+from waits import RequestTracker, wait_log
+
+# Сколько промахов дедупликации `crawl_many` проверяет в Hatchet одновременно
+CRAWL_MANY_LOOKUPS = 10
+
+# `run`: размер чанка `aio_bulk_push` и сколько чанков в полёте одновременно
+RUN_PUSH_CHUNK = 1000
+RUN_PUSH_CONCURRENCY = 4
+
+# Стартовый элемент: ссылка или kwargs для `input` (обязательно с 'url')
+StartItem = str | dict[str, Any]
 
 TInput = TypeVar('TInput', bound=interfaces.InputBase)
 TOutput = TypeVar('TOutput', bound=interfaces.InputBase)
+T = TypeVar('T')
+
+
+async def aiter_items(items: Iterable[T] | AsyncIterable[T]) -> AsyncIterator[T]:
+    """Обычный или асинхронный источник как асинхронный."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def achunks(items: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    chunk = []
+    async for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
 
 @dataclass
 class BaseWorkflow(
@@ -35,10 +75,28 @@ class BaseWorkflow(
 
     proxy_enable: bool = True
     labels: ClassVar[interfaces.WorkerLabels] = {}
+    block_resources: ClassVar[interfaces.BlockResources] = interfaces.BlockResources(
+        resource_types=['image', 'media', 'font'],
+        url_patterns=[
+            r'google-analytics\.com',
+            r'googletagmanager\.com',
+            r'mc\.yandex\.(ru|com)',
+            r'top-fwz1\.mail\.ru',
+            r'vk\.com/rtrg',
+            r'connect\.facebook\.net',
+        ],
+    )
 
     customer: str = 'default'
 
-    start_urls: ClassVar[list[str]] = []
+    # 'http' - таск получает http_engine.HttpPage вместо браузерной страницы
+    engine: ClassVar[Literal['browser', 'http']] = 'browser'
+    # True - `document()` берёт HTML через httpx-сессию сайта, без рендера
+    static_fetch: ClassVar[bool] = False
+
+    # Список или асинхронный источник (sitemap, курсор Mongo/БД, файл):
+    # `run` читает его по мере отправки, целиком в памяти он не нужен
+    start_urls: ClassVar[Iterable[StartItem] | AsyncIterable[StartItem]] = []
 
     concurrency: int = 10
     execution_timeout_sec: int = 30
@@ -55,7 +113,107 @@ class BaseWorkflow(
         )
 
     @classmethod
-    async def run(cls, user_check: Literal['y', 'n'] | None = None) -> None:
+    def engine_for(cls, input: TInput) -> Literal['browser', 'http']:
+        return cls.engine
+
+    @classmethod
+    async def fetch(cls, page: Page, url: str, **kwargs) -> HttpResponse:
+        """GET без рендера: через httpx-сессию, прогретую этой страницей.
+
+        Браузер нужен только для первого запроса к сайту и когда сайт снова
+        отдаёт челлендж, см. `sessions.SessionManager`. Прокси - тот же, что
+        у контекста слота.
+        """
+        return await session_manager.fetch(
+            page,
+            url,
+            proxy=context_proxy(page.context, settings.PROXY_URI if cls.proxy_enable else None),
+            **kwargs,
+        )
+
+    @classmethod
+    async def document(cls, page: Page, url: str) -> Document:
+        """HTML страницы одним запросом, селекторы дальше - в процессе воркера.
+
+        Для статичных сайтов: вместо десятков вызовов в браузер один
+        `page.content()`, после которого загрузка страницы останавливается.
+        С `static_fetch` страница не открывается вовсе, см. `fetch`.
+        """
+        if cls.static_fetch:
+            resp = await cls.fetch(page, url)
+            return Document(await resp.text(), resp.url, resp.status)
+
+        resp = await page.goto(url, wait_until='domcontentloaded')
+        html = await page.content()
+        await page.evaluate('window.stop()')
+        return Document(html, page.url, resp.status if resp else 200)
+
+    # Ожидания вместо фиксированных `wait_for_timeout`. Не бросают исключение
+    # по таймауту, а возвращают False; время пишется в `waits.wait_log`.
+    # `replaces_ms` - длина sleep'а, который заменило ожидание, для отчёта
+
+    @classmethod
+    async def wait_stable(
+        cls,
+        page: Page,
+        selector: str,
+        stable_ms: int = 500,
+        timeout: int = 10_000,
+        replaces_ms: int = 0,
+    ) -> bool:
+        """Элементы `selector` есть, и их число не меняется `stable_ms`."""
+        started = time.monotonic()
+        ok = await waits.selector_stable(page, selector, stable_ms, timeout)
+        wait_log.record(page, cls.site, 'stable', started, ok, replaces_ms)
+        return ok
+
+    @classmethod
+    async def wait_quiet(
+        cls,
+        page: Page,
+        quiet_ms: int = 500,
+        cap_ms: int = 5_000,
+        replaces_ms: int = 0,
+    ) -> bool:
+        """Нет запросов документов, скриптов и XHR `quiet_ms`, но не дольше `cap_ms`."""
+        started = time.monotonic()
+        ok = await waits.network_quiet(page, quiet_ms, cap_ms)
+        wait_log.record(page, cls.site, 'quiet', started, ok, replaces_ms)
+        return ok
+
+    @classmethod
+    @asynccontextmanager
+    async def wait_xhr(
+        cls,
+        page: Page,
+        url: waits.UrlMatcher,
+        timeout: int = 10_000,
+        replaces_ms: int = 0,
+    ) -> AsyncIterator[waits.ResponseWait]:
+        """Ответ на `url`, вызванный действиями внутри блока, загружен целиком."""
+        started = time.monotonic()
+        async with waits.response_finished(page, url, timeout) as result:
+            yield result
+        wait_log.record(page, cls.site, 'xhr', started, result.ok, replaces_ms)
+
+    @classmethod
+    @asynccontextmanager
+    async def capture(cls, page: Page, **patterns: waits.UrlMatcher) -> AsyncIterator[ResponseCapture]:
+        """JSON-ответы страницы по шаблонам, см. `network.ResponseCapture`. Открывать до `goto`."""
+        capture = ResponseCapture(page, **patterns)
+        capture.attach()
+        try:
+            yield capture
+        finally:
+            capture.detach()
+
+    @classmethod
+    async def run(
+        cls,
+        user_check: Literal['y', 'n'] | None = None,
+        items: Iterable[StartItem] | AsyncIterable[StartItem] | None = None,
+    ) -> None:
+        """`items` - разовый набор вместо `start_urls`, сам класс не трогаем."""
         if settings.DEBUG:
             return
 
@@ -66,43 +224,91 @@ class BaseWorkflow(
             if user_check.lower() == 'y':
                 task_id = cls.site + settings.START_TIME
 
+                pushed = await cls.push_stream(cls.start_urls if items is None else items, task_id)
 
-                for batch_urls in batched(cls.start_urls, 1000):
-                    events = []
-                    for url in batch_urls:
-                        events.append(
-                            BulkPushEventWithMetadata(
-                                key=cls.event,
-                                payload=cls.input(
-                                    url=url,
-                                    task_id=task_id
-                                ).model_dump(),
-                                additional_metadata={
-                                    'customer': cls.customer,
-                                    'site': cls.site,
-                                    'url': url,
-                                    'hash': cls._task_hash(task_id, url),
-                                    'task_id': task_id,
-                                }
-                            )
-                        )
-
-                    await hatchet.event.aio_bulk_push(
-                        events=events
-                    )
-
-                print(f'\ntask_id: {task_id}')
+                print(f'\npushed: {pushed}')
+                print(f'task_id: {task_id}')
                 return
             elif user_check.lower() == 'n':
                 return
 
+    @classmethod
+    async def push_stream(
+        cls,
+        items: Iterable[StartItem] | AsyncIterable[StartItem],
+        task_id: str,
+    ) -> int:
+        """Ставит стартовые таски чанками по мере чтения `items`.
+
+        Одновременно в полёте не больше `RUN_PUSH_CONCURRENCY` чанков,
+        так что память постоянна при любом размере источника, а первые
+        таски уходят сразу, не дожидаясь конца чтения.
+        """
+        pending: dict[asyncio.Task, int] = {}
+        pushed = 0
+
+        def collect(tasks: set[asyncio.Task]) -> None:
+            nonlocal pushed
+            for t in tasks:
+                t.result()
+                pushed += pending.pop(t)
+
+        try:
+            async for chunk in achunks(aiter_items(items), RUN_PUSH_CHUNK):
+                if len(pending) >= RUN_PUSH_CONCURRENCY:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+
+                events = [cls._start_event(item, task_id) for item in chunk]
+                pending[asyncio.create_task(hatchet.event.aio_bulk_push(events=events))] = len(events)
+
+            if pending:
+                done, _ = await asyncio.wait(pending)
+                collect(done)
+        finally:
+            # Упал один чанк - остальные не должны висеть без хозяина
+            for t in pending:
+                t.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return pushed
+
+    @classmethod
+    def _start_event(cls, item: StartItem, task_id: str) -> BulkPushEventWithMetadata:
+        kwargs = {'url': item} if isinstance(item, str) else item
+        url = kwargs['url']
+        return BulkPushEventWithMetadata(
+            key=cls.event,
+            # task_id всегда от текущего запуска, даже если он уже есть в элементе
+            payload=cls.input(**{**kwargs, 'task_id': task_id}).model_dump(),
+            additional_metadata={
+                'customer': cls.customer,
+                'site': cls.site,
+                'url': url,
+                'hash': cls._task_hash(task_id, url),
+                'task_id': task_id,
+            }
+        )
+
     @classmethod
     def run_sync(cls) -> None:
         asyncio.run(cls.run())
 
     @classmethod
     async def debug(cls, url: str, **kwargs) -> None:
-        if settings.DEBUG:
+        if settings.DEBUG and cls.engine_for(cls.input(url=url, **kwargs)) == 'http':
+            engine = HttpEngine()
+            async with engine.page(cls.proxy_enable) as page:
+                result = await cls.task(cls.input(url=url, **kwargs), page)
+            await engine.close()
+
+            print(engine.report())
+            pp(result.model_dump())
+
+        elif settings.DEBUG:
+            from browserforge.fingerprints import Screen
+            from camoufox.async_api import AsyncCamoufox
+
             async with AsyncCamoufox(
                 proxy={'server': settings.PROXY_URI} if cls.proxy_enable else None,
                 # geoip=True,
@@ -110,7 +316,6 @@ class BaseWorkflow(
                 os='windows',
                 humanize=True,
                 screen=Screen(max_width=1920, max_height=1080),
-                # block_images=True,
             ) as browser:
                 # browser = await p.firefox.connect(settings.DEBUG_PW_SERVER)
 
@@ -121,8 +326,14 @@ class BaseWorkflow(
 
                 # page = await context.new_page()
                 page = await browser.new_page()
+                blocker = ResourceBlocker(cls.block_resources)
+                await blocker.attach(page)
+                RequestTracker().attach(page)
+
                 input = cls.input(url=url, **kwargs)
                 result = await cls.task(input, page)
+                print(blocker.report())
+                print(wait_log.report())
 
                 # await context.close()
                 await browser.close()
@@ -164,10 +375,69 @@ class BaseWorkflow(
                     }
                 )
             )
+            await dedupe.store().add(hash)
             return True
         else:
             return False
 
+    @classmethod
+    async def crawl_many(
+        cls,
+        urls: Iterable[str],
+        task_id: str,
+        dedupe_hours: int = 480,
+        dont_dedupe: bool = False,
+        **kwargs
+    ) -> dict[str, bool]:
+        """`crawl` для пачки ссылок: дедупликация разом и `aio_bulk_push` чанками.
+
+        Ссылки хэшируются как есть, как в `crawl`, и схлопываются внутри
+        пачки. Промахи локального хранилища проверяются в Hatchet
+        параллельно. Возвращает ссылка -> поставлена ли она, так что
+        `sum(...values())` - то же, что раньше считали по `crawl`.
+        """
+        urls = list(urls)
+        if settings.DEBUG:
+            return {url: True for url in urls}
+
+        unique = list(dict.fromkeys(urls))
+        hashes = {url: cls._task_hash(task_id, url) for url in unique}
+
+        if dont_dedupe:
+            fresh = unique
+        else:
+            semaphore = asyncio.Semaphore(CRAWL_MANY_LOOKUPS)
+
+            async def not_dupe(url: str) -> bool:
+                async with semaphore:
+                    return await cls._not_dupe(hashes[url], dedupe_hours)
+
+            checks = await asyncio.gather(*(not_dupe(url) for url in unique))
+            fresh = [url for url, ok in zip(unique, checks) if ok]
+
+        for chunk in batched(fresh, 1000):
+            await hatchet.event.aio_bulk_push(
+                events=[
+                    BulkPushEventWithMetadata(
+                        key=cls.event,
+                        payload={'url': url, 'task_id': task_id} | kwargs,
+                        additional_metadata={
+                            'customer': cls.customer,
+                            'site': cls.site,
+                            'url': url,
+                            'hash': hashes[url],
+                            'task_id': task_id,
+                        },
+                    )
+                    for url in chunk
+                ]
+            )
+            for url in chunk:
+                await dedupe.store().add(hashes[url])
+
+        accepted = set(fresh)
+        return {url: url in accepted for url in unique}
+
     @classmethod
     def crawl_sync(
         cls,
@@ -180,6 +450,23 @@ class BaseWorkflow(
 
     @classmethod
     async def _not_dupe(cls, hash: str, hours: int) -> bool:
+        """Ставился ли таск с этим хэшем за `hours`, см. `dedupe`.
+
+        Хранилище отвечает само, если таск завершён или поставлен только
+        что, а промах - только прогретый общий Redis. Иначе - Hatchet:
+        SQLite знает только таски этого воркера, новый Redis - только свежие,
+        а не подтверждённый таск мог упасть или быть отменён.
+        """
+        store = dedupe.store()
+        status = await store.status(hash, hours)
+        if status in ('done', 'pending'):
+            dedupe.stats.hits += 1
+            return False
+        dedupe.stats.misses += 1
+        if status is None and await store.warm(hours):
+            return True
+
+        dedupe.stats.hatchet_lookups += 1
         runs_list = await hatchet.runs.aio_list_with_pagination(
             since=datetime.now().astimezone() - timedelta(hours=hours),
             additional_metadata={
@@ -197,6 +484,9 @@ class BaseWorkflow(
         #     print(t.additional_metadata)
 
         if runs_list:
+            dedupe.stats.hatchet_found += 1
+            # Идущий таск ещё может упасть - снова 'pending', не 'done'
+            await store.add(hash, done=runs_list[0].status == V1TaskStatus.COMPLETED)
             return False
         else:
             return True
@@ -238,49 +528,29 @@ class BaseLitresPartnersWorkflow(
             if user_check.lower() == 'y':
                 task_id = cls.site + settings.START_TIME
 
+                from pymongo import AsyncMongoClient
+
                 client = AsyncMongoClient(settings.MONGO_URI)
                 db = client['ltrs']
                 col_yandex = db['yandex']
                 col_books = db['books']
 
-                tasks = []
-                async for search_result in col_yandex.find({'source': cls.site}):
-                    book_urls = [position['url'] for position in search_result['results']]
-                    book_urls = [url for url in book_urls if re.search(cls.url_patern, url)]
+                async def start_items() -> AsyncIterator[StartItem]:
+                    async for search_result in col_yandex.find({'source': cls.site}):
+                        book_urls = [position['url'] for position in search_result['results']]
+                        book_urls = [url for url in book_urls if re.search(cls.url_patern, url)]
 
-                    for url in book_urls[:3]:
-                        tasks.append({
-                            'url': url,
-                            'book_id': search_result['book_id'],
-                        })
-
-                for batch in batched(tasks, 1000):
-                    events = []
-                    for t in batch:
-                        if not await col_books.find_one({'url': t['url']}):
-                            events.append(
-                                BulkPushEventWithMetadata(
-                                    key=cls.event,
-                                    payload=cls.input(
-                                        url=t['url'],
-                                        task_id=task_id,
-                                        book_id=t['book_id']
-                                    ).model_dump(),
-                                    additional_metadata={
-                                        'customer': cls.customer,
-                                        'site': cls.site,
-                                        'url': t['url'],
-                                        'hash': cls._task_hash(task_id, t['url']),
-                                        'task_id': task_id,
-                                    }
-                                )
-                            )
+                        for url in book_urls[:3]:
+                            if not await col_books.find_one({'url': url}):
+                                yield {
+                                    'url': url,
+                                    'book_id': search_result['book_id'],
+                                }
 
-                    await hatchet.event.aio_bulk_push(
-                        events=events
-                    )
+                pushed = await cls.push_stream(start_items(), task_id)
 
-                print(f'\ntask_id: {task_id}')
+                print(f'\npushed: {pushed}')
+                print(f'task_id: {task_id}')
                 return
             elif user_check.lower() == 'n':
                 return
@@ -312,22 +582,44 @@ class BaseLivelibWorkflow(
 
 
     @classmethod
-    async def run(cls, user_check: Literal['y', 'n'] | None = None) -> None:
+    async def run(
+        cls,
+        user_check: Literal['y', 'n'] | None = None,
+        items: Iterable[StartItem] | AsyncIterable[StartItem] | None = None,
+    ) -> None:
         if settings.DEBUG:
             return
 
-        if not user_check:
+        while not user_check or user_check.lower() not in ('y', 'n'):
             user_check = input(f'Ты уверен что хочешь запустить {cls.site}? Y/N:')
+        if user_check.lower() == 'n':
+            return
 
-        if cls.item_wf:
-            async with DbSamizdatPrisma() as db:
-                cls.item_wf.start_urls = await db.get_all_books_urls(cls.item_wf.site)
+        start_items = cls.start_urls if items is None else items
+        if not cls.item_wf:
+            await super().run(user_check, start_items)
+            return
 
-            cls.start_urls = [u for u in cls.start_urls if u not in cls.item_wf.start_urls]
+        started = time.perf_counter()
+        async with DbSamizdatPrisma() as db:
+            known_urls = await db.get_all_books_urls(cls.item_wf.site)
+        load_s = time.perf_counter() - started
 
-            await cls.item_wf.run(user_check)
+        await cls.item_wf.run(user_check, known_urls)
 
-        await super().run(user_check)
+        fresh = (
+            item async for item in aiter_items(start_items)
+            if (item if isinstance(item, str) else item['url']) not in known_urls
+        )
+        await super().run(user_check, fresh)
+
+        # Фильтр ленивый: время и память - после того, как `run` его прочитал.
+        # ru_maxrss на Linux в килобайтах
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f'{cls.item_wf.site}: {len(known_urls)} known urls loaded in {load_s:.1f}s, '
+            f'run {time.perf_counter() - started:.1f}s, peak rss {peak_mb:.0f}MB'
+        )
 
     @classmethod
     async def run_cron(cls) -> None:
@@ -383,6 +675,9 @@ class BaseLtrsSeWorkflow(
                 user_check = input(f'Ты уверен что хочешь запустить {cls.site}? Y/N:')
             task_id = input(f'Введи имя задачи:')
             if user_check.lower() == 'y':
+                import pandas as pd
+                from pymongo import AsyncMongoClient
+
                 client = AsyncMongoClient(settings.MONGO_URI)
                 col = client['ltrs']['yandex']
 
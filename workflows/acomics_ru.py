@@ -2,11 +2,11 @@ import re
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 
 from workflow_base import BaseLivelibWorkflow
 from interfaces import InputLivelibBook, Output, WorkerLabels
 from db import DbSamizdatPrisma
+from dates import parse_date
 from utils import save_cover
 
 
@@ -166,7 +166,7 @@ class AcomicsRuListing(BaseLivelibWorkflow):
                 content_update_date_locator = item.locator('.date-time-formatted')
                 if await content_update_date_locator.count() > 0:
                     content_update_date_str = await content_update_date_locator.text_content()
-                    metrics['content_update_date'] = dateparser.parse(content_update_date_str)
+                    metrics['content_update_date'] = parse_date(content_update_date_str)
 
                 added_to_lib_locator = item.locator('.subscr-count')
                 if await added_to_lib_locator.count() > 0:
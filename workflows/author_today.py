@@ -2,12 +2,12 @@ import re
 from datetime import datetime
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -118,7 +118,7 @@ class AuthorTodayItem(BaseLivelibWorkflow):
             if await update_date_locator.count() > 0:
                 data_time = await update_date_locator.get_attribute('data-time')
                 if data_time:
-                    metrics['content_update_date'] = dateparser.parse(data_time)
+                    metrics['content_update_date'] = parse_date(data_time)
 
             # --- Метрики: Просмотры ---
             views_locator = page.locator('div[itemtype="http://schema.org/Book"] div.book-stats span').filter(
@@ -206,7 +206,7 @@ class AuthorTodayItem(BaseLivelibWorkflow):
                 if await release_row.count() > 0:
                     release_date_attr = await release_row.get_attribute("data-time")
                     if release_date_attr:
-                        book['date_release'] = dateparser.parse(release_date_attr)
+                        book['date_release'] = parse_date(release_date_attr)
 
                 # --- Статистика библиотеки (Added to lib, Read process, etc) ---
 
@@ -5,6 +5,7 @@ from playwright.async_api import Page
 from workflow_base import BaseLitresPartnersWorkflow
 from interfaces import InputLitresPartnersBook, Output, WorkerLabels
 from db import save_book_mongo
+from structured import structured
 from utils import detect_new_tab_url
 
 
@@ -34,13 +35,19 @@ class AvidreadersRu(BaseLitresPartnersWorkflow):
 
         await page.wait_for_selector('h1[itemprop="name"]')
 
+        # Название и авторы размечены microdata, DOM - только если разметки нет
+        data = {}
+        (await structured(page)).fill(data, {}, page.url)
         book = {
-            'title': await page.text_content('h1'),
+            'title': data.get('title') or await page.text_content('h1'),
         }
 
-        author_locator = page.locator('.author_wrapper div[itemprop="author"] *[itemprop="name"]')
-        if await author_locator.count() > 0:
-            book['author'] = ', '.join([await a.text_content() for a in await author_locator.all()])
+        if 'author' in data:
+            book['author'] = data['author']
+        else:
+            author_locator = page.locator('.author_wrapper div[itemprop="author"] *[itemprop="name"]')
+            if await author_locator.count() > 0:
+                book['author'] = ', '.join([await a.text_content() for a in await author_locator.all()])
 
         download_button_locator = page.locator('.format_download a')
         if await download_button_locator.count() > 0:
@@ -3,12 +3,12 @@ from datetime import datetime
 from random import randint
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page, expect
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -99,7 +99,7 @@ class BookmateItem(BaseLivelibWorkflow):
             ).locator('span[class*="value"]')
             if await release_date_loc.count() > 0:
                 if rd_match := re.search(r'\d{4}', await release_date_loc.first.text_content()):
-                    book['date_release'] = dateparser.parse(rd_match.group(0), date_formats=['%Y'])
+                    book['date_release'] = parse_date(rd_match.group(0), date_formats=['%Y'])
 
             # Owner
             owner_loc = page.locator('div[class*="ContentInfo_container"] div[data-test-id="CONTENT_INFO_ITEM"]').filter(
@@ -242,15 +242,17 @@ class BookmateListing(BaseLivelibWorkflow):
 
         await page.wait_for_selector("div.main-content h1")
 
-        book_locator = page.locator('div[class*="ContentPreview_info"]> a[title], div[class*="SnippetTitle_container"] > a')
+        book_selector = 'div[class*="ContentPreview_info"]> a[title], div[class*="SnippetTitle_container"] > a'
+        book_locator = page.locator(book_selector)
 
         # Скролл до конца страницы пока количество элементов меняется
         previous_count = 0
         while True:
             current_count = await book_locator.count()
             if current_count == previous_count:
-                # Ждем пару секунд для надежности подгрузки новых данных
-                await page.wait_for_timeout(10000)
+                # Ждем догрузку: запросы затихли и число книг не меняется
+                await cls.wait_quiet(page, quiet_ms=1_500, cap_ms=10_000, replaces_ms=10_000)
+                await cls.wait_stable(page, book_selector, timeout=3_000)
                 current_count = await book_locator.count()
                 if current_count == previous_count:
                     break  # Элементы перестали добавляться, выходим из цикла
@@ -260,9 +262,7 @@ class BookmateListing(BaseLivelibWorkflow):
             previous_count = current_count
             await page.keyboard.press("End")
             # await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            await page.wait_for_timeout(200)
-            await page.wait_for_load_state('networkidle') # Задержка перед следующей проверкой
-            await page.wait_for_timeout(1000)
+            await cls.wait_quiet(page, cap_ms=10_000, replaces_ms=1_200)
 
         # Обработка пагинации/списков
         listing_selectors = 'a[class*="BubbleLink_link"], a[class*="LinkTitle_link"], a.tab, a.pagination-page'
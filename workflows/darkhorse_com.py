@@ -2,12 +2,12 @@ import re
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 from furl import furl
 
 from workflow_base import BaseLivelibWorkflow
 from interfaces import InputLivelibBook, Output, WorkerLabels
 from db import DbSamizdatPrisma
+from dates import parse_date
 from utils import save_cover
 
 
@@ -111,7 +111,7 @@ class DarkhorseComItem(BaseLivelibWorkflow):
                 has_text=re.compile('Publication Date:')
              ).locator('+ dd')
             if await date_release_locator.count() > 0:
-                 book['date_release'] = dateparser.parse(await date_release_locator.text_content())
+                 book['date_release'] = parse_date(await date_release_locator.text_content())
 
             if annotation := await page.inner_text('.product-description'):
                 book['annotation'] = annotation
@@ -2,12 +2,12 @@ import re
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 from furl import furl
 
 from workflow_base import BaseLivelibWorkflow
 from interfaces import InputLivelibBook, Output, WorkerLabels
 from db import DbSamizdatPrisma
+from dates import parse_date
 from utils import save_cover
 
 
@@ -176,7 +176,7 @@ class DcComItem(BaseLivelibWorkflow):
             if date_release := await page.locator('.list-values').filter(
                  has_text=re.compile('On Sale Date:')
              ).locator('*[aria-label="list-values"]').text_content():
-                 book['date_release'] = dateparser.parse(date_release)
+                 book['date_release'] = parse_date(date_release)
 
             if annotation := await page.text_content('div[data-testid="textContainer"] > div > p:nth-child(2)'):
                 book['annotation'] = annotation
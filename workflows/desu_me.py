@@ -1,11 +1,11 @@
 import re
 from urllib.parse import urljoin
 
-import dateparser
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -132,7 +132,7 @@ class DesuItem(BaseLivelibWorkflow):
                 'div.b-db_entry div.line-container:has(div.key:text-is("Статус:")) div.value'
             )
             if await release_date_locator.count() > 0:
-                book['date_release'] = dateparser.parse(await release_date_locator.first.text_content())
+                book['date_release'] = parse_date(await release_date_locator.first.text_content())
 
             # Artwork Type
             artwork_type_locator = page.locator(
@@ -2,12 +2,12 @@ import re
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 from furl import furl
 
 from workflow_base import BaseLivelibWorkflow
 from interfaces import InputLivelibBook, Output, WorkerLabels
 from db import DbSamizdatPrisma
+from dates import parse_date
 from utils import save_cover
 
 
@@ -74,7 +74,7 @@ class FicartRuItem(BaseLivelibWorkflow):
             date_release_locator = page.locator('.baseinfo a:nth-of-type(2)')
             if await date_release_locator.count() > 0:
                 release_date_str = await date_release_locator.text_content()
-                book['date_release'] = dateparser.parse(release_date_str)
+                book['date_release'] = parse_date(release_date_str)
 
             views_locator = page.locator('.argviews')
             if await views_locator.count() > 0:
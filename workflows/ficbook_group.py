@@ -1,12 +1,12 @@
 import re
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output, WorkerLabels
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -72,8 +72,8 @@ class FicbookGroupItem(BaseLivelibWorkflow):
 
             dates_locator = page.locator('.part-item__info span, .part-header__date')
             if await dates_locator.count() > 0:
-                book['date_release'] = dateparser.parse(await dates_locator.first.text_content())
-                metrics['content_update_date'] = dateparser.parse(await dates_locator.last.text_content())
+                book['date_release'] = parse_date(await dates_locator.first.text_content())
+                metrics['content_update_date'] = parse_date(await dates_locator.last.text_content())
 
             annotation_locator = page.locator('.card-description__format')
             if await annotation_locator.count() > 0:
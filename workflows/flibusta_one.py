@@ -1,7 +1,9 @@
+from typing import ClassVar
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
 
+from extract import Field
 from workflow_base import BaseLitresPartnersWorkflow
 from interfaces import InputLitresPartnersBook, Output, WorkerLabels
 from db import save_book_mongo
@@ -15,22 +17,19 @@ class FlibustaOne(BaseLitresPartnersWorkflow):
     input = InputLitresPartnersBook
     output = Output
 
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field('h1'),
+        'author': Field('.flist a[itemprop="author"]'),
+        'links-litres': Field('.sect-format span', attr='data-link', many=True),
+    }
+
     @classmethod
     async def task(cls, input: InputLitresPartnersBook, page: Page) -> Output:
-        await page.goto(
-            input.url,
-            wait_until='domcontentloaded',
-        )
-
-        await page.wait_for_selector('h1')
-
-        book = {
-            'title': await page.text_content('h1'),
-            'author': await page.text_content('.flist a[itemprop="author"]'),
-        }
+        doc = await cls.document(page, input.url)
 
-        if links_litres := await page.query_selector_all('.sect-format span'):
-            book['links-litres'] = [await l.get_attribute('data-link') for l in links_litres]
+        book = doc.extract(cls.fields)
+        if not book['links-litres']:
+            del book['links-litres']
 
         await save_book_mongo(input, cls.site, book)
 
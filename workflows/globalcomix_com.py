@@ -2,12 +2,12 @@ import re
 from datetime import datetime
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -155,7 +155,7 @@ class GlobalcomixComItem(BaseLivelibWorkflow):
                 )
                 if await date_release_locator.count() > 0:
                     date_release_match = re.search(date_release_regex, await date_release_locator.text_content())
-                    book['date_release'] = dateparser.parse(date_release_match.group(1))
+                    book['date_release'] = parse_date(date_release_match.group(1))
 
                 if not await db.check_book_have_cover(book_url):
                     cover_locator = item.locator('img')
@@ -181,6 +181,7 @@ class GlobalcomixComListing(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
     # item_wf = GlobalcomixComItem
+    engine = 'http'
 
     concurrency=3
     execution_timeout_sec=3600
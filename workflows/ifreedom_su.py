@@ -2,7 +2,6 @@ import re
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 from furl import furl
 
 from workflow_base import BaseLivelibWorkflow
@@ -1,7 +1,8 @@
-from urllib.parse import urljoin
+from typing import ClassVar
 
 from playwright.async_api import Page
 
+from extract import Field
 from workflow_base import BaseLitresPartnersWorkflow
 from interfaces import InputLitresPartnersBook, Output, WorkerLabels
 from db import save_book_mongo
@@ -15,29 +16,31 @@ class KnigavuheOrg(BaseLitresPartnersWorkflow):
     input = InputLitresPartnersBook
     output = Output
 
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field('h1 span[itemprop="name"]'),
+        'author': Field('h1 span[itemprop="author"] a', many=True),
+        'link-litres': Field('.book_buy_wrap a', attr='href', url=True),
+    }
+
     @classmethod
     async def task(cls, input: InputLitresPartnersBook, page: Page) -> Output:
-        resp = await page.goto(
-            input.url,
-            wait_until='domcontentloaded',
-        )
-        if not (200 <= resp.status < 400):
+        doc = await cls.document(page, input.url)
+        if not doc.ok:
             return Output(
                 result='error',
-                data={'status': resp.status},
+                data={'status': doc.status},
             )
 
+        fields = doc.extract(cls.fields)
         book = {
-            'title': await page.text_content('h1 span[itemprop="name"]'),
+            'title': fields['title'],
         }
 
-        author_locator = page.locator('h1 span[itemprop="author"] a')
-        if await author_locator.count() > 0:
-            book['author'] = ', '.join([await a.text_content() for a in await author_locator.all()])
+        if fields['author']:
+            book['author'] = ', '.join(fields['author'])
 
-        litres_buton_locator = page.locator('.book_buy_wrap a')
-        if await litres_buton_locator.is_visible():
-            book['links-litres'] = [urljoin(page.url, await litres_buton_locator.get_attribute('href'))]
+        if fields['link-litres']:
+            book['links-litres'] = [fields['link-litres']]
 
         await save_book_mongo(input, cls.site, book)
 
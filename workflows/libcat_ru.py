@@ -1,7 +1,8 @@
-from urllib.parse import urljoin
+from typing import ClassVar
 
 from playwright.async_api import Page
 
+from extract import Field
 from workflow_base import BaseLitresPartnersWorkflow
 from interfaces import InputLitresPartnersBook, Output, WorkerLabels
 from db import save_book_mongo
@@ -15,26 +16,33 @@ class LibcatRu(BaseLitresPartnersWorkflow):
     input = InputLitresPartnersBook
     output = Output
 
+    # Сайт статичный: страницы через httpx-сессию, браузер только для прогрева
+    static_fetch = True
+
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field('div[itemprop="name"]'),
+        'author': Field('a[itemprop="author"]'),
+        'last-page': Field('a.pagenav', attr='href', url=True, last=True),
+    }
+
     @classmethod
     async def task(cls, input: InputLitresPartnersBook, page: Page) -> Output:
-        await page.goto(
-            input.url,
-            wait_until='domcontentloaded',
-        )
-
-        await page.wait_for_selector('h1')
+        doc = await cls.document(page, input.url)
 
+        fields = doc.extract(cls.fields)
         book = {
-            'title': await page.text_content('div[itemprop="name"]'),
-            'author': await page.text_content('a[itemprop="author"]'),
+            'title': fields['title'],
+            'author': fields['author'],
         }
 
-        await page.locator('a.pagenav').last.click()
-        await page.wait_for_load_state('domcontentloaded')
+        # Кнопка литреса - на последней странице чтения
+        if fields['last-page']:
+            doc = await cls.document(page, fields['last-page'])
 
-        litres_buton_locator = page.locator('.litresclick')
-        if await litres_buton_locator.is_visible():
-            book['links-litres'] = [urljoin(page.url, await litres_buton_locator.get_attribute('data-href'))]
+        # Без data-href кнопка есть, а ссылки нет - не пишем [None]
+        if litres_button := doc.css_first('.litresclick'):
+            if href := litres_button.attributes.get('data-href'):
+                book['links-litres'] = [doc.absolute(href)]
 
         await save_book_mongo(input, cls.site, book)
 
@@ -1,11 +1,11 @@
 import re
 from urllib.parse import urljoin
 
-import dateparser
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -95,7 +95,7 @@ class LitgorodItem(BaseLivelibWorkflow):
             release_date_locator = page.locator("div.b-book_item__content div._date")
             if await release_date_locator.count() > 0:
                 if release_match := re.search(r'\d{2}\.\d{2}.\d{4}', await release_date_locator.first.text_content()):
-                    book['date_release'] = dateparser.parse(release_match.group(0), date_formats=['%d.%m.%Y'])
+                    book['date_release'] = parse_date(release_match.group(0), date_formats=['%d.%m.%Y'])
 
             # --- Metrics ---
 
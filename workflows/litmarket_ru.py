@@ -2,12 +2,12 @@ import re
 from datetime import datetime
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -119,13 +119,13 @@ class LitmarketItem(BaseLivelibWorkflow):
                 has_text=re.compile(r'Создана:')
             ).locator("span.btn-price__date")
             if await release_date_locator.count() > 0:
-                book['date_release'] = dateparser.parse(await release_date_locator.first.text_content())
+                book['date_release'] = parse_date(await release_date_locator.first.text_content())
 
             final_date_locator = page.locator('div.card-info').filter(
                 has_text=re.compile(r'Закончена:')
             ).locator("span.btn-price__date")
             if await final_date_locator.count() > 0:
-                book['date_final'] = dateparser.parse(await final_date_locator.first.text_content())
+                book['date_final'] = parse_date(await final_date_locator.first.text_content())
 
             # --- Статус написания ---
             btn_price_text = await page.locator("div.card-info div.btn-price").first.text_content() if await page.locator("div.card-info div.btn-price").count() > 0 else ""
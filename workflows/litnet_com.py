@@ -1,14 +1,17 @@
+import json
 import re
 from datetime import datetime
 from random import randint
+from typing import ClassVar, Literal
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page, expect
 
 from db import DbSamizdatPrisma
+from extract import Document, Field, extract
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -23,6 +26,39 @@ class LitnetItem(BaseLivelibWorkflow):
 
     concurrency = 25
 
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field('div.book-view-box h1'),
+        'authors': Field('div.book-view-box h2.p > a.author', many=True),
+        'authors_urls': Field('div.book-view-box h2.p > a.author', attr='href', url=True, many=True),
+        'annotation': Field('div.book-view div#annotation', inner=True),
+        'cover': Field('div.book-view-box div.book-view-cover > img', attr='src', url=True),
+        'category': Field('div.book-view-box p', has=('span', r'Текущий рейтинг:'), then='a', many=True),
+        'series': Field('div.book-view-box p', has=('span', r'Цикл:'), then='a', many=True),
+        'tags': Field('div.book-view-box p', has=('span', r'В тексте есть:'), then='a', many=True),
+        'age_rating': Field('div.book-view-box p', has_text=r'Ограничение:', then='span', many=True, regex=r'\d{1,2}'),
+        'write_dates': Field('div.book-view-box p', has=('span', r'Публикация:'), then=':scope > span', last=True),
+        'content_update_date': Field('.book-view-status', has_text=r'В процессе:\s+(.+)', regex=r'В процессе:\s+(.+)'),
+        'rating': Field('div.book-view-box span.book-rating-info-value span', regex=r'\d+'),
+        'views': Field('div.book-view-box span.count-views', regex=r'\d+'),
+        'likes': Field('a.rate-btn-like > span'),
+        'added_to_lib': Field('div.book-view-box span.count-favourites', regex=r'\d+'),
+        'comments': Field('h3.comments-head-title', regex=r'\d+'),
+        'pages_count': Field('div.book-view-box div.book-view-status span > span', has_text=r'стр\.', regex=r'\d+'),
+        'site_ratings': Field('div.book-view-box p', has=('span', r'Текущий рейтинг:'), inner=True),
+        'status_process': Field('div.book-view-box span.book-status-process', count=True),
+        'status_full': Field('div.book-view-box span.book-status-full', count=True),
+        'price_btn': Field('div.book-view-box span.ln_btn-get-text', has_text=r'\d+', many=True),
+        'price_old': Field('div.book-view-box span.get_prise_old', regex=r'[\d\.]+'),
+        'price_discount': Field('div.book-view-box span.ln_btn_get-discount', count=True),
+        'audio': Field('div.book-view-box span.tw-audio', count=True),
+        'rewards': Field('#js-show_rewards', count=True),
+    }
+
+    # Фрагменты, которые подгружают вкладка наград и окно покупки. Запрашиваются
+    # напрямую с куками страницы, без кликов по интерфейсу
+    rewards_url: ClassVar[str] = 'https://litnet.com/ru/book/rewards-tab?id={book_id}'
+    popup_buy_url: ClassVar[str] = 'https://litnet.com/ru/book/popup-buy?id={book_id}'
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
         resp = await page.goto(input.url, wait_until='domcontentloaded')
@@ -35,13 +71,14 @@ class LitnetItem(BaseLivelibWorkflow):
 
         await page.wait_for_selector(".main_footer-inform")
 
+        fields = await extract(page, cls.fields)
+
         async with DbSamizdatPrisma() as db:
             book = {'url': page.url, 'source': cls.site}
             metrics = {'bookUrl': page.url}
 
             # Title
-            title_locator = page.locator("div.book-view-box h1")
-            book['title'] = await title_locator.text_content() if await title_locator.count() > 0 else ""
+            book['title'] = fields['title'] or ""
 
             if not await db.check_book_exist(page.url):
                 await db.create_book(book)
@@ -49,148 +86,55 @@ class LitnetItem(BaseLivelibWorkflow):
             # --- Сбор основной информации ---
 
             # Authors
-            authors_locator = page.locator("div.book-view-box h2.p > a.author")
-            if await authors_locator.count() > 0:
-                book['author'] = ', '.join([await a.text_content() for a in await authors_locator.all()]).strip()
-
-                book['authors_data'] = []
-                for a in await authors_locator.all():
-                    href = await a.get_attribute('href')
-                    text = await a.text_content()
-                    absolute_url = urljoin(page.url, href)
-
-                    book['authors_data'].append({
-                        'name': text.strip(),
-                        'url': absolute_url
-                    })
+            if fields['authors']:
+                book['author'] = ', '.join(fields['authors']).strip()
+                book['authors_data'] = [
+                    {'name': name.strip(), 'url': url}
+                    for name, url in zip(fields['authors'], fields['authors_urls'])
+                ]
 
             # Annotation
-            annotation_locator = page.locator("div.book-view div#annotation")
-            if await annotation_locator.count() > 0:
-                # В JS фильтруются текстовые ноды, в Python Playwright берем inner_text, обычно это эквивалентно
-                book['annotation'] = (await annotation_locator.inner_text()).strip()
+            if fields['annotation'] is not None:
+                book['annotation'] = fields['annotation'].strip()
 
             # Cover
             if not await db.check_book_have_cover(page.url):
-                cover_locator = page.locator("div.book-view-box div.book-view-cover > img")
-                if await cover_locator.count() > 0:
-                    if img_src := await cover_locator.get_attribute('src'):
-                        full_img_src = urljoin(page.url, img_src)
-                        if img_name := await save_cover(page, full_img_src):
-                            book['coverImage'] = img_name
-
-            # Category
-            # JS: div.book-view-box p:has(span:contains("Текущий рейтинг:")) a
-            category_locator = page.locator("div.book-view-box p").filter(
-                has=page.locator("span").filter(has_text=re.compile(r"Текущий рейтинг:"))
-            ).locator("a")
-
-            if await category_locator.count() > 0:
-                book['category'] = [await x.text_content() for x in await category_locator.all()]
-
-            # Series
-            # JS: div.book-view-box p:has(span:contains("Цикл:")) a
-            series_locator = page.locator("div.book-view-box p").filter(
-                has=page.locator("span").filter(has_text=re.compile(r"Цикл:"))
-            ).locator("a")
-
-            if await series_locator.count() > 0:
-                book['series'] = [await x.text_content() for x in await series_locator.all()]
-
-            # Tags
-            # JS: div.book-view-box p:has(span:contains("В тексте есть:")) a
-            tags_locator = page.locator("div.book-view-box p").filter(
-                has=page.locator("span").filter(has_text=re.compile(r"В тексте есть:"))
-            ).locator("a")
-
-            if await tags_locator.count() > 0:
-                book['tags'] = [await x.text_content() for x in await tags_locator.all()]
+                if fields['cover']:
+                    if img_name := await save_cover(page, fields['cover']):
+                        book['coverImage'] = img_name
+
+            # Category, Series, Tags
+            for field in ('category', 'series', 'tags'):
+                if fields[field]:
+                    book[field] = fields[field]
 
             # Age Rating
-            # JS: div.book-view-box p:has(span:contains("Ограничение:")) span
-            age_rating_locator = page.locator("div.book-view-box p").filter(
-                has_text=re.compile(r"Ограничение:")
-            ).locator("span").filter(
-                has_text=re.compile(r'\d{1,2}')
-            )
-            if await age_rating_locator.count() > 0:
-                age_match = re.search(r'\d{1,2}', await age_rating_locator.text_content())
-                book['age_rating'] = age_match.group(0)
+            if fields['age_rating']:
+                book['age_rating'] = fields['age_rating'][0]
 
             # Dates (Release & Update)
-            # JS: div.book-view-box p:has(span:contains("Публикация:")) > span
-            dates_p = page.locator("div.book-view-box p").filter(
-                has=page.locator("span").filter(has_text=re.compile(r"Публикация:"))
-            )
-            if await dates_p.count() > 0:
-                write_dates_text = await dates_p.locator("> span").last.text_content()
-
+            if write_dates_text := fields['write_dates']:
                 # Release Date
                 if release_match := re.search(r'\d{2}\.\d{2}.\d{4}', write_dates_text):
-                    book['date_release'] = dateparser.parse(release_match.group(0), date_formats=['%d.%m.%Y'])
+                    book['date_release'] = parse_date(release_match.group(0), date_formats=['%d.%m.%Y'])
 
                 # Content Update Date
                 if final_match := re.search(r'— (\d{2}\.\d{2}.\d{4})', write_dates_text):
-                    book['date_final'] = dateparser.parse(final_match.group(1), date_formats=['%d.%m.%Y'])
+                    book['date_final'] = parse_date(final_match.group(1), date_formats=['%d.%m.%Y'])
 
-            dete_update_regex = r'В процессе:\s+(.+)'
-            date_update_locator = page.locator('.book-view-status').filter(
-                has_text=re.compile(dete_update_regex)
-            )
-            if await date_update_locator.count() > 0:
-                if update_match := re.search(dete_update_regex, await date_update_locator.text_content()):
-                    metrics['content_update_date'] = dateparser.parse(update_match.group(1), date_formats=['%d.%m.%Y'])
+            if fields['content_update_date']:
+                metrics['content_update_date'] = parse_date(fields['content_update_date'], date_formats=['%d.%m.%Y'])
 
 
             # --- Metrics ---
 
-            # Rating
-            rating_locator = page.locator("div.book-view-box span.book-rating-info-value span")
-            if await rating_locator.count() > 0:
-                if rating_match := re.search(r'\d+', await rating_locator.text_content()):
-                    metrics['rating'] = rating_match.group(0)
-
-            # Views
-            views_locator = page.locator("div.book-view-box span.count-views")
-            if await views_locator.count() > 0:
-                if views_match := re.search(r'\d+', await views_locator.text_content()):
-                    metrics['views'] = views_match.group(0)
-
-            # Likes
-            likes_locator = page.locator("a.rate-btn-like > span")
-            if await likes_locator.count() > 0:
-                metrics['likes'] = await likes_locator.text_content()
-
-            # Added to lib
-            adds_locator = page.locator("div.book-view-box span.count-favourites")
-            if await adds_locator.count() > 0:
-                if adds_match := re.search(r'\d+', await adds_locator.text_content()):
-                    metrics['added_to_lib'] = adds_match.group(0)
-
-            # Comments
-            comments_locator = page.locator("h3.comments-head-title")
-            if await comments_locator.count() > 0:
-                if comments_match := re.search(r'\d+', await comments_locator.text_content()):
-                    metrics['comments'] = comments_match.group(0)
-
-            # Pages count
-            # JS: div.book-view-box div.book-view-status span:contains("стр.")
-            pages_locator = page.locator("div.book-view-box div.book-view-status span > span").filter(
-                has_text=re.compile(r"стр\.")
-            )
-            if await pages_locator.count() > 0:
-                if pages_match := re.search(r'\d+', await pages_locator.text_content()):
-                    metrics['pages_count'] = pages_match.group(0)
+            for field in ('rating', 'views', 'likes', 'added_to_lib', 'comments', 'pages_count'):
+                if fields[field]:
+                    metrics[field] = fields[field]
 
             # Site Ratings
-            # JS: div.book-view-box p:has(span:contains("Текущий рейтинг:"))
-            # Здесь JS парсит текстовые ноды. В Python возьмем весь текст и распарсим regex-ом.
-            rating_block = page.locator("div.book-view-box p").filter(
-                has=page.locator("span").filter(has_text=re.compile(r"Текущий рейтинг:"))
-            )
-            if await rating_block.count() > 0:
-                full_text = await rating_block.inner_text()
-                # Пример текста: "Текущий рейтинг: #1 в Фэнтези #5 в Попаданцы"
+            # Пример текста: "Текущий рейтинг: #1 в Фэнтези #5 в Попаданцы"
+            if full_text := fields['site_ratings']:
                 # Ищем паттерн #число в категория
                 matches = re.findall(r'#(\d+)\s+в\s+([^\n\r#]+)', full_text)
                 if matches:
@@ -198,115 +142,146 @@ class LitnetItem(BaseLivelibWorkflow):
                     for rank, category in matches:
                         metrics['site_ratings'][category.strip()] = rank
 
-            # Awards Logic
-            awards_tab = page.locator("#js-show_rewards")
-            if await awards_tab.count() > 0 and await awards_tab.is_visible():
-                await awards_tab.scroll_into_view_if_needed()
-
-                async with page.expect_response(lambda response: "/rewards-tab" in response.url and response.status == 200):
-                    await awards_tab.click()
-
-                show_more = page.locator("button#rewards-list-showcase-show-more")
-                if await show_more.count() > 0 and await show_more.is_visible():
-                    await show_more.click()
-
-                await page.wait_for_timeout(1000)
-
-                awards_items = await page.locator("ul#rewards-list-showcase > li").all()
-                if awards_items:
-                    metrics['awards'] = {}
-                    for item in awards_items:
-                        # Key is in p tag
-                        k_loc = item.locator("p")
-                        v_loc = item.locator("ul > li")
-
-                        if await k_loc.count() > 0 and await v_loc.count() > 0:
-                            k_text = (await k_loc.text_content()).strip()
-                            v_text = await v_loc.first.text_content()
-
-                            if v_match := re.search(r'[\d\.]+', v_text):
-                                metrics['awards'][k_text] = v_match.group(0)
+            # Awards
+            if fields['rewards']:
+                if awards := await cls.awards(page):
+                    metrics['awards'] = awards
 
             # Status Writing
-            if await page.locator("div.book-view-box span.book-status-process").count() > 0:
+            if fields['status_process']:
                 metrics['status_writing'] = "PROCESS"
-            elif await page.locator("div.book-view-box span.book-status-full").count() > 0:
+            elif fields['status_full']:
                 metrics['status_writing'] = "FINISH"
 
             # Prices
-            price_btn_locator = page.locator("div.book-view-box span.ln_btn-get-text").filter(
-                has_text=re.compile(r'\d+')
-            )
-            if await price_btn_locator.count() > 0:
-                price_btn_text = await price_btn_locator.first.text_content()
-
+            price_btn_text = fields['price_btn'][0] if fields['price_btn'] else None
+            if price_btn_text:
                 if price_match := re.search(r'[\d\.]+', price_btn_text):
                     metrics['price'] = float(price_match.group(0))
                 if "Подписка" in price_btn_text:
                     metrics['in_subscribe'] = True
 
-                if await price_btn_locator.filter(has_text=re.compile(r"дней доступа")).count() > 0:
+                if any(re.search(r"дней доступа", t) for t in fields['price_btn']):
                     metrics['in_subscribe'] = True
 
             # Price Old
-            price_old_locator = page.locator("div.book-view-box span.get_prise_old")
-            if await price_old_locator.count() > 0:
-                if price_old_match := re.search(r'[\d\.]+', await price_old_locator.text_content()):
-                    metrics['price_old'] = float(price_old_match.group(0))
+            if fields['price_old']:
+                metrics['price_old'] = float(fields['price_old'])
 
             # Price Discount
-            price_disc_locator = page.locator("div.book-view-box span.ln_btn_get-discount")
-            if await price_disc_locator.count() > 0 and price_btn_text:
+            if fields['price_discount'] and price_btn_text:
                  if disc_match := re.search(r'([\d\.]+)\s+(\₽|RUB)', price_btn_text):
                      metrics['price_discount'] = disc_match.group(1) # Сохраняем как строку, как в JS примере (match[1])
 
             # Audio
-            if await page.locator("div.book-view-box span.tw-audio").count() > 0:
+            if fields['audio']:
                 book['url_audio'] = book['url']
 
-                buy_button = page.locator("div.book-view-box a#js-buyModal")
-                confirm_age = page.locator("div.book-view-box a#js-age-confirm")
+                if price_audio := await cls.audio_price(page):
+                    metrics['price_audio'] = price_audio
+                else:
+                    print("Error: Нет отобразилась цена на аудиокнигу")
+
+            await db.update_book(book)
+            await db.create_metrics(metrics)
 
-                if await buy_button.count() > 0 and await buy_button.is_visible():
-                    await buy_button.click()
-                elif await confirm_age.count() > 0 and await confirm_age.is_visible():
-                    await confirm_age.click()
-                    age_input = page.locator("div.modal-content input#checkadulthoodform-userbirthdate")
-                    if await age_input.count() > 0 and await age_input.is_visible():
+            return Output(result='done', data={'book': book, 'metrics': metrics})
 
-                        await age_input.type(f'{randint(10,25)}.{randint(10,12)}.{randint(1975,2004)}')
-                        await page.click('div.modal-content button[type="submit"]')
+    @classmethod
+    async def fragment(cls, page: Page, url_template: str) -> Document | None:
+        """HTML-фрагмент, который сайт отдаёт на XHR, как `Document`."""
+        if not (m := re.search(r'-b(\d+)(?:[/?#]|$)', page.url)):
+            return None
+
+        resp = await page.request.get(
+            url_template.format(book_id=m.group(1)),
+            headers={'X-Requested-With': 'XMLHttpRequest', 'Referer': page.url},
+        )
+        if not resp.ok:
+            return None
+
+        html = await resp.text()
+        # Yii может завернуть фрагмент в JSON
+        if 'json' in resp.headers.get('content-type', ''):
+            data = json.loads(html)
+            html = (data.get('html') or data.get('content') or '') if isinstance(data, dict) else ''
+        return Document(html, page.url, resp.status)
 
-                        next_btn = page.locator("div.modal-content button#btnIfSubscriptionNext")
-                        # JS просто кликает, добавим проверку видимости на всякий случай, как в JS
-                        await next_btn.click()
+    @classmethod
+    async def awards(cls, page: Page) -> dict[str, str]:
+        if doc := await cls.fragment(page, cls.rewards_url):
+            # "Показать ещё" только раскрывает уже загруженные награды
+            if doc.css('ul#rewards-list-showcase > li'):
+                return cls.parse_awards(doc)
+        return await cls.awards_from_tab(page)
+
+    @staticmethod
+    def parse_awards(doc: Document) -> dict[str, str]:
+        awards = {}
+        for item in doc.css('ul#rewards-list-showcase > li'):
+            k_el = doc.css_first('p', item)
+            v_el = doc.css_first('ul > li', item)
+            if k_el and v_el:
+                if v_match := re.search(r'[\d\.]+', v_el.text(deep=True)):
+                    awards[k_el.text(deep=True).strip()] = v_match.group(0)
+        return awards
 
-                try:
-                    async with page.expect_response(lambda response: "/popup-buy" in response.url and response.status == 200, timeout=5000):
-                        pass # Wait for response triggered by previous clicks
-                except Exception:
-                    pass # Ignore timeout if already loaded
+    @classmethod
+    async def awards_from_tab(cls, page: Page) -> dict[str, str]:
+        """Старый путь через клики: если прямой запрос не отдал наград."""
+        awards_tab = page.locator("#js-show_rewards")
+        if not await awards_tab.is_visible():
+            return {}
+        await awards_tab.scroll_into_view_if_needed()
 
-                await page.wait_for_timeout(2000)
+        async with page.expect_response(lambda response: "/rewards-tab" in response.url and response.status == 200):
+            await awards_tab.click()
 
-                # Price Audio inside modal
-                # JS: div.modal-content div.extra-cart-option:has(p:contains("Аудиоверсия книги")) div[data-value]
-                price_audio_div = page.locator("div.modal-content div.extra-cart-option").filter(
-                    has=page.locator("p").filter(has_text=re.compile(r"Аудиоверсия книги"))
-                ).locator("div[data-value]")
+        show_more = page.locator("button#rewards-list-showcase-show-more")
+        if await show_more.count() > 0 and await show_more.is_visible():
+            await show_more.click()
 
-                if await price_audio_div.count() > 0:
-                    metrics['price_audio'] = await price_audio_div.get_attribute("data-value")
-                else:
-                    # JS: throw new Error
-                    print("Error: Нет отобразилась цена на аудиокнигу")
-                    # В Python workflow лучше не кидать исключение, которое остановит воркер, если это не критично
-                    # Но следуем JS логике - если критично, можно оставить print или raise
+        await cls.wait_stable(page, "ul#rewards-list-showcase > li", stable_ms=300, timeout=3_000, replaces_ms=1_000)
+        return cls.parse_awards(Document(await page.content(), page.url))
 
-            await db.update_book(book)
-            await db.create_metrics(metrics)
+    @classmethod
+    async def audio_price(cls, page: Page) -> str | None:
+        if doc := await cls.fragment(page, cls.popup_buy_url):
+            if price := cls.parse_audio_price(doc):
+                return price
+        # Без подтверждения возраста сайт отдаёт вместо окна покупки форму
+        return await cls.audio_price_from_modal(page)
+
+    @staticmethod
+    def parse_audio_price(doc: Document) -> str | None:
+        for option in doc.css('div.extra-cart-option'):
+            if any(re.search(r'Аудиоверсия книги', p.text(deep=True)) for p in doc.css('p', option)):
+                if price := doc.css_first('div[data-value]', option):
+                    return price.attributes.get('data-value')
+        return None
 
-            return Output(result='done', data={'book': book, 'metrics': metrics})
+    @classmethod
+    async def audio_price_from_modal(cls, page: Page) -> str | None:
+        """Старый путь через окно покупки и форму подтверждения возраста."""
+        buy_button = page.locator("div.book-view-box a#js-buyModal")
+        confirm_age = page.locator("div.book-view-box a#js-age-confirm")
+
+        async with cls.wait_xhr(page, "/popup-buy", timeout=5_000, replaces_ms=2_000):
+            if await buy_button.count() > 0 and await buy_button.is_visible():
+                await buy_button.click()
+            elif await confirm_age.count() > 0 and await confirm_age.is_visible():
+                await confirm_age.click()
+                age_input = page.locator("div.modal-content input#checkadulthoodform-userbirthdate")
+                if await age_input.count() > 0 and await age_input.is_visible():
+
+                    await age_input.type(f'{randint(10,25)}.{randint(10,12)}.{randint(1975,2004)}')
+                    await page.click('div.modal-content button[type="submit"]')
+
+                    next_btn = page.locator("div.modal-content button#btnIfSubscriptionNext")
+                    await next_btn.click()
+
+        await cls.wait_stable(page, "div.modal-content div.extra-cart-option", stable_ms=300, timeout=2_000)
+        return cls.parse_audio_price(Document(await page.content(), page.url))
 
 
 class LitnetListing(BaseLivelibWorkflow):
@@ -331,6 +306,11 @@ class LitnetListing(BaseLivelibWorkflow):
         "https://superapi.litnet.com/v2/widgets/books-list/litnet-rekomenduet?limit=20&offset=0",
     ]
 
+    @classmethod
+    def engine_for(cls, input: InputLivelibBook) -> Literal['browser', 'http']:
+        # Страницы авторов из run_cron разбираются браузером
+        return 'http' if 'superapi.litnet.com' in input.url else 'browser'
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
         stats = {'new-page-links': 0, 'new-items-links': 0}
@@ -340,16 +320,20 @@ class LitnetListing(BaseLivelibWorkflow):
             data = await resp.json()
             url_data = furl(input.url)
 
-            for item in data['items']:
-                if await LitnetItem.crawl(f'https://litnet.com/ru/book/{item['alias']}', input.task_id):
-                    stats['new-items-links'] += 1
+            accepted = await LitnetItem.crawl_many(
+                [f'https://litnet.com/ru/book/{item['alias']}' for item in data['items']],
+                input.task_id,
+            )
+            stats['new-items-links'] += sum(accepted.values())
 
             if url_data.args['offset'] == '0':
                 total_items = int(data['total'])
+                page_urls = []
                 for offset in range(20, total_items + 20, 20):
                     url_data.args['offset'] = offset
-                    if await cls.crawl(url_data.url, input.task_id, dont_dedupe=True):
-                        stats['new-page-links'] += 1
+                    page_urls.append(url_data.url)
+                accepted = await cls.crawl_many(page_urls, input.task_id, dont_dedupe=True)
+                stats['new-page-links'] += sum(accepted.values())
 
         else:
             resp = await page.goto(
@@ -362,6 +346,7 @@ class LitnetListing(BaseLivelibWorkflow):
             # Обработка пагинации
             # JS globs: ["https://litnet.com/ru/top/all?alias=all&page=*"]
             # Selector: "ul.pagination a"
+            page_urls = []
             pagination_links = await page.locator("ul.pagination a").all()
             for link in pagination_links:
                 href = await link.get_attribute('href')
@@ -369,8 +354,7 @@ class LitnetListing(BaseLivelibWorkflow):
                     page_url = urljoin(page.url, href)
                     # Простая проверка на паттерн (наличие page=)
                     if 'page=' in page_url:
-                        if await cls.crawl(page_url, input.task_id):
-                            stats['new-page-links'] += 1
+                        page_urls.append(page_url)
 
             pagination_buttons = await page.locator(".page-list span").all()
             url_data = furl(input.url)
@@ -378,19 +362,24 @@ class LitnetListing(BaseLivelibWorkflow):
                 page_num = await b.text_content()
                 if page_num:
                     url_data.args['page'] = page_num.strip()
-                    if await cls.crawl(url_data.url, input.task_id):
-                        stats['new-page-links'] += 1
+                    page_urls.append(url_data.url)
+
+            accepted = await cls.crawl_many(page_urls, input.task_id)
+            stats['new-page-links'] += sum(accepted.values())
 
             # Обработка книг
             # JS selector: "h4.book-title a", label: "book"
+            book_urls = []
             book_links = await page.locator('h4.book-title a').all()
             for link in book_links:
                 href = await link.get_attribute('href')
                 if href:
                     book_url = urljoin(page.url, href)
                     if '/book/' in book_url:
-                        if await LitnetItem.crawl(book_url, input.task_id):
-                            stats['new-items-links'] += 1
+                        book_urls.append(book_url)
+
+            accepted = await LitnetItem.crawl_many(book_urls, input.task_id)
+            stats['new-items-links'] += sum(accepted.values())
 
         return Output(result='done', data=stats)
 
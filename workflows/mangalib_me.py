@@ -1,12 +1,14 @@
 import re
+from typing import ClassVar, Literal
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
+from lib_api import TRANSLATE_STATUS, WRITING_STATUS, lib_task, stats_metrics
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -19,27 +21,34 @@ class MangalibItem(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
 
+    # Тайтл из api2 без рендера страницы; False - старый разбор страницы
+    api_item: ClassVar[bool] = True
+    site_id: ClassVar[int] = 1
+
+    @classmethod
+    def engine_for(cls, input: InputLivelibBook) -> Literal['browser', 'http']:
+        return 'http' if cls.api_item else 'browser'
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
-        resp = await page.goto(input.url, wait_until='domcontentloaded')
-
-        # JS: await page.waitForSelector("h1")
-        await page.wait_for_selector("h1")
-
-        # JS: if (response.status() == 404 || page.url() == "https://mangalib.me/404")
-        if resp.status == 404 or page.url == "https://mangalib.me/404":
-            async with DbSamizdatPrisma() as db:
-                await db.mark_book_deleted(input.url, cls.site)
-            return Output(result='error', data={'status': resp.status, 'error': 'invalid_url_or_404'})
-
-        # JS: await page.waitForResponse(resp => resp.url().includes("/stats?bookmarks=true&rating=true"))
-        try:
-            await page.wait_for_response(
-                lambda r: "/stats?bookmarks=true&rating=true" in r.url,
-                timeout=15000,
-            )
-        except Exception:
-            pass
+        if cls.engine_for(input) == 'http':
+            return await lib_task(cls, input, page, 'https://mangalib.me')
+
+        # Статистику страница сама грузит с api2, читаем её из ответа, а не из DOM
+        async with cls.capture(page, stats='/stats?bookmarks=true&rating=true') as captured:
+            resp = await page.goto(input.url, wait_until='domcontentloaded')
+
+            # JS: await page.waitForSelector("h1")
+            await page.wait_for_selector("h1")
+
+            # JS: if (response.status() == 404 || page.url() == "https://mangalib.me/404")
+            if resp.status == 404 or page.url == "https://mangalib.me/404":
+                async with DbSamizdatPrisma() as db:
+                    await db.mark_book_deleted(input.url, cls.site)
+                return Output(result='error', data={'status': resp.status, 'error': 'invalid_url_or_404'})
+
+            # JS: await page.waitForResponse(resp => resp.url().includes("/stats?bookmarks=true&rating=true"))
+            bookmark_metrics = stats_metrics(await captured.json('stats', timeout=15_000))
 
         async with DbSamizdatPrisma() as db:
             book = {'url': page.url, 'source': cls.site}
@@ -159,7 +168,7 @@ class MangalibItem(BaseLivelibWorkflow):
             ).locator("span")
             if await release_year_locator.count() > 0:
                 if release_match := re.search(r'\d{4}', await release_year_locator.first.text_content()):
-                    book['date_release'] = dateparser.parse(release_match.group(0), date_formats=['%Y'])
+                    book['date_release'] = parse_date(release_match.group(0), date_formats=['%Y'])
 
             # Artwork type
             # JS: a[data-info-variant]:has(div:contains("Тип")) span -> .last()
@@ -187,21 +196,25 @@ class MangalibItem(BaseLivelibWorkflow):
                     if rating_match.group(0) != "0":
                         metrics['rating'] = rating_match.group(0)
 
-            # Votes
-            # JS: span.rating-info__votes (first) , если != "0"
-            votes_locator = page.locator("span.rating-info__votes")
-            if await votes_locator.count() > 0:
-                votes = (await votes_locator.first.text_content() or "").strip()
-                if votes and votes != "0":
-                    metrics['votes'] = votes
-
-            # Added to lib
-            # JS: div[data-stats="bookmarks"] div.section-title -> /\d+/ , если != "0"
-            adds_locator = page.locator('div[data-stats="bookmarks"] div.section-title')
-            if await adds_locator.count() > 0:
-                if adds_match := re.search(r'\d+', await adds_locator.first.text_content()):
-                    if adds_match.group(0) != "0":
-                        metrics['added_to_lib'] = adds_match.group(0)
+            metrics.update(bookmark_metrics)
+
+            # Без ответа stats - из DOM
+            if not bookmark_metrics:
+                # Votes
+                # JS: span.rating-info__votes (first) , если != "0"
+                votes_locator = page.locator("span.rating-info__votes")
+                if await votes_locator.count() > 0:
+                    votes = (await votes_locator.first.text_content() or "").strip()
+                    if votes and votes != "0":
+                        metrics['votes'] = votes
+
+                # Added to lib
+                # JS: div[data-stats="bookmarks"] div.section-title -> /\d+/ , если != "0"
+                adds_locator = page.locator('div[data-stats="bookmarks"] div.section-title')
+                if await adds_locator.count() > 0:
+                    if adds_match := re.search(r'\d+', await adds_locator.first.text_content()):
+                        if adds_match.group(0) != "0":
+                            metrics['added_to_lib'] = adds_match.group(0)
 
             # Chapters count
             # JS: div[data-info-variant]:has(div:contains("Глав")) span -> /\d+/
@@ -214,77 +227,65 @@ class MangalibItem(BaseLivelibWorkflow):
 
             # Writing status
             # JS: a[data-info-variant]:has(div:contains("Статус")) span
-            writing_status_map = {
-                "Завершён": "FINISH",
-                "Онгоинг": "PROCESS",
-                "Приостановлен": "PAUSE",
-                "Выпуск прекращён": "STOP",
-                "Анонс": "ANNOUNCE",
-            }
             writing_status_locator = page.locator("a[data-info-variant]").filter(
                 has=page.locator("div").filter(has_text=re.compile("Статус"))
             ).locator("span")
             if await writing_status_locator.count() > 0:
                 writing_status = (await writing_status_locator.first.text_content() or "").strip()
-                if writing_status in writing_status_map:
-                    metrics['status_writing'] = writing_status_map[writing_status]
+                if writing_status in WRITING_STATUS:
+                    metrics['status_writing'] = WRITING_STATUS[writing_status]
 
             # Translate status
             # JS: a[data-info-variant]:has(div:contains("Перевод")) span
-            translate_status_map = {
-                "Завершён": "FINISH",
-                "Продолжается": "PROCESS",
-                "Заморожен": "PAUSE",
-                "Заброшен": "STOP",
-            }
             translate_status_locator = page.locator("a[data-info-variant]").filter(
                 has=page.locator("div").filter(has_text=re.compile("Перевод"))
             ).locator("span")
             if await translate_status_locator.count() > 0:
                 translate_status = (await translate_status_locator.first.text_content() or "").strip()
-                if translate_status in translate_status_map:
-                    metrics['status_translate'] = translate_status_map[translate_status]
-
-            # Read process (Читаю)
-            # JS: div[data-stats="bookmarks"] > div > div:contains("Читаю") div:last() -> /^\d+$/
-            read_process_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
-                has_text=re.compile("Читаю")
-            ).locator("div").last
-            if await read_process_locator.count() > 0:
-                if read_process := re.match(r'^\d+$', (await read_process_locator.text_content() or "").strip()):
-                    metrics['read_process'] = read_process.group(0)
-
-            # Read stoped (Брошено)
-            read_stoped_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
-                has_text=re.compile("Брошено")
-            ).locator("div").last
-            if await read_stoped_locator.count() > 0:
-                if read_stoped := re.match(r'^\d+$', (await read_stoped_locator.text_content() or "").strip()):
-                    metrics['read_stoped'] = read_stoped.group(0)
-
-            # Read later (В планах)
-            read_later_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
-                has_text=re.compile("В планах")
-            ).locator("div").last
-            if await read_later_locator.count() > 0:
-                if read_later := re.match(r'^\d+$', (await read_later_locator.text_content() or "").strip()):
-                    metrics['read_later'] = read_later.group(0)
-
-            # Read finished (Прочитано)
-            read_finished_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
-                has_text=re.compile("Прочитано")
-            ).locator("div").last
-            if await read_finished_locator.count() > 0:
-                if read_finished := re.match(r'^\d+$', (await read_finished_locator.text_content() or "").strip()):
-                    metrics['read_finished'] = read_finished.group(0)
-
-            # Likes (Любимые)
-            likes_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
-                has_text=re.compile("Любимые")
-            ).locator("div").last
-            if await likes_locator.count() > 0:
-                if likes := re.match(r'^\d+$', (await likes_locator.text_content() or "").strip()):
-                    metrics['likes'] = likes.group(0)
+                if translate_status in TRANSLATE_STATUS:
+                    metrics['status_translate'] = TRANSLATE_STATUS[translate_status]
+
+            if not bookmark_metrics:
+                # Read process (Читаю)
+                # JS: div[data-stats="bookmarks"] > div > div:contains("Читаю") div:last() -> /^\d+$/
+                read_process_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
+                    has_text=re.compile("Читаю")
+                ).locator("div").last
+                if await read_process_locator.count() > 0:
+                    if read_process := re.match(r'^\d+$', (await read_process_locator.text_content() or "").strip()):
+                        metrics['read_process'] = read_process.group(0)
+
+                # Read stoped (Брошено)
+                read_stoped_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
+                    has_text=re.compile("Брошено")
+                ).locator("div").last
+                if await read_stoped_locator.count() > 0:
+                    if read_stoped := re.match(r'^\d+$', (await read_stoped_locator.text_content() or "").strip()):
+                        metrics['read_stoped'] = read_stoped.group(0)
+
+                # Read later (В планах)
+                read_later_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
+                    has_text=re.compile("В планах")
+                ).locator("div").last
+                if await read_later_locator.count() > 0:
+                    if read_later := re.match(r'^\d+$', (await read_later_locator.text_content() or "").strip()):
+                        metrics['read_later'] = read_later.group(0)
+
+                # Read finished (Прочитано)
+                read_finished_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
+                    has_text=re.compile("Прочитано")
+                ).locator("div").last
+                if await read_finished_locator.count() > 0:
+                    if read_finished := re.match(r'^\d+$', (await read_finished_locator.text_content() or "").strip()):
+                        metrics['read_finished'] = read_finished.group(0)
+
+                # Likes (Любимые)
+                likes_locator = page.locator('div[data-stats="bookmarks"] > div > div').filter(
+                    has_text=re.compile("Любимые")
+                ).locator("div").last
+                if await likes_locator.count() > 0:
+                    if likes := re.match(r'^\d+$', (await likes_locator.text_content() or "").strip()):
+                        metrics['likes'] = likes.group(0)
 
             await db.update_book(book)
             await db.create_metrics(metrics)
@@ -300,6 +301,7 @@ class MangalibListing(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
     item_wf = MangalibItem
+    engine = 'http'
 
     concurrency = 1
     execution_timeout_sec = 600
@@ -2,12 +2,12 @@ import re
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 from furl import furl
 
 from workflow_base import BaseLivelibWorkflow
 from interfaces import InputLivelibBook, Output, WorkerLabels
 from db import DbSamizdatPrisma
+from dates import parse_date
 from utils import save_cover
 
 
@@ -87,7 +87,7 @@ class MantaNetItem(BaseLivelibWorkflow):
                 has_text=re.compile(r'\w{2,5} \d{1,2}, \d{4}')
             )
             if await date_release_locator.count() > 0:
-                 book['date_release'] = dateparser.parse(await date_release_locator.first.text_content())
+                 book['date_release'] = parse_date(await date_release_locator.first.text_content())
 
             if annotation := await page.text_content('[data-test="BlockText1-descriptionLong"] > span'):
                 book['annotation'] = annotation
@@ -145,7 +145,7 @@ class MantaNetListing(BaseLivelibWorkflow):
         while True:
             initial_count = await items_links_loacator.count()
             await page.mouse.wheel(0, 1000)
-            await page.wait_for_timeout(1500)
+            await cls.wait_quiet(page, cap_ms=3_000, replaces_ms=1_500)
             await items_links_loacator.last.scroll_into_view_if_needed()
             new_count = await items_links_loacator.count()
             if new_count == initial_count:
@@ -1,16 +1,105 @@
 import re
 from pathlib import Path
+from typing import Any, ClassVar
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
+from pydantic import BaseModel
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
+# Роли в creators записи каталога -> поле книги, как на странице выпуска
+WRITER_ROLES = re.compile(r'writer', re.I)
+ARTIST_ROLES = re.compile(r'penciller|penciler|inker|colorist|letterer|cover artist|artist', re.I)
+EDITOR_ROLES = re.compile(r'editor', re.I)
+
+
+# Схема записи bifrost catalog/comics/calendar, по которой пишется книга.
+# По одному ключу на поле, без угадывания: несовпадение - ValidationError,
+# и листинг падает, а не пишет неполные книги.
+#
+# Пример собран по полям страницы выпуска и живым ответом не сверен, поэтому
+# `write_from_payload` выключен. Чтобы включить: заменить пример первой
+# записью `data.results` реального ответа и проверить `catalog_book` на ней
+# (`__main__` делает это первым делом).
+CATALOG_SAMPLE = {
+    'metadata': {
+        'url': 'https://www.marvel.com/comics/issue/131971/daredevilpunisher_the_devils_trigger_2025_2',
+        'title': "Daredevil/Punisher: The Devil's Trigger (2025) #2",
+        'release_date': '2025-07-16',
+        'description': '',
+        'price': 3.99,
+        'page_count': 32,
+        'image': 'https://i.annihil.us/u/prod/marvel/i/mg/clean.jpg',
+        'creators': [{'name': 'Writer Name', 'role': 'writer', 'url': '/comics/creators/1/writer_name'}],
+    },
+}
+
+
+class CatalogCreator(BaseModel):
+    name: str
+    role: str
+    url: str
+
+
+class CatalogMetadata(BaseModel):
+    url: str
+    title: str
+    release_date: str | None = None
+    description: str | None = None
+    price: float | None = None
+    page_count: int | None = None
+    image: str | None = None
+    creators: list[CatalogCreator] = []
+
+
+class CatalogItem(BaseModel):
+    metadata: CatalogMetadata
+
+
+def catalog_book(item: dict[str, Any]) -> tuple[dict, dict, str | None]:
+    """Книга, метрики и обложка из записи каталога, см. `CATALOG_SAMPLE`.
+
+    Бросает `pydantic.ValidationError`, если запись не той формы.
+    """
+    meta = CatalogItem.model_validate(item).metadata
+    book = {'url': meta.url, 'source': 'marvel.com', 'title': meta.title.strip()}
+    metrics = {'bookUrl': meta.url}
+
+    if meta.release_date:
+        book['date_release'] = parse_date(meta.release_date)
+    if meta.description and meta.description.strip():
+        book['annotation'] = meta.description.strip()
+
+    for field, data_field, roles in (
+        ('author', 'authors_data', WRITER_ROLES),
+        ('artist', 'artists_data', ARTIST_ROLES),
+        (None, 'editors_data', EDITOR_ROLES),
+    ):
+        people = [
+            {'name': c.name.strip(), 'url': urljoin(meta.url, c.url)}
+            for c in meta.creators
+            if roles.search(c.role) and c.name.strip()
+        ]
+        if people:
+            book[data_field] = people
+            if field == 'author':
+                book[field] = ', '.join(p['name'] for p in people)
+            elif field:
+                book[field] = people[0]['name']
+
+    if meta.price is not None:
+        metrics['price'] = str(meta.price)
+    if meta.page_count:
+        metrics['pages_count'] = str(meta.page_count)
+
+    return book, metrics, urljoin(meta.url, meta.image) if meta.image else None
+
 
 class MarvelComItem(BaseLivelibWorkflow):
     name = 'livelib-marvel-com-item'
@@ -135,7 +224,7 @@ class MarvelComItem(BaseLivelibWorkflow):
              ).locator('p:nth-child(2)')
             if await date_release_locator.count() > 0:
                 release_date_str = await date_release_locator.text_content()
-                book['date_release'] = dateparser.parse(release_date_str)
+                book['date_release'] = parse_date(release_date_str)
 
             annotation_locator = page.locator('.ComicMasthead__Description')
             if await annotation_locator.count() > 0:
@@ -167,6 +256,12 @@ class MarvelComListing(BaseLivelibWorkflow):
     output = Output
 
     item_wf = MarvelComItem
+    engine = 'http'
+
+    # Записи каталога пишутся в базу прямо из листинга; браузерный таск
+    # MarvelComItem ставится только для новых книг и книг без обложки.
+    # Выключено, пока `CATALOG_SAMPLE` не сверен с живым ответом
+    write_from_payload: ClassVar[bool] = False
 
     concurrency=3
     execution_timeout_sec=300
@@ -199,18 +294,54 @@ class MarvelComListing(BaseLivelibWorkflow):
 
         if page_url_data.args['offset'] == '0':
             total_books = page_data['data']['total']
+            page_urls = []
             for offset in range(100, total_books, 100):
                 page_url_data.args['offset'] = offset
-                if await MarvelComListing.crawl(page_url_data.url, input.task_id):
-                    data['new-page-links'] += 1
-
-        for i in page_data['data']['results']:
-            if await MarvelComItem.crawl(i['metadata']['url'], input.task_id):
-                data['new-items-links'] += 1
+                page_urls.append(page_url_data.url)
+            accepted = await MarvelComListing.crawl_many(page_urls, input.task_id)
+            data['new-page-links'] += sum(accepted.values())
 
         if not page_data['data']['results']:
             raise Exception('ERROR: No Items')
 
+        if not cls.write_from_payload:
+            accepted = await MarvelComItem.crawl_many(
+                [i['metadata']['url'] for i in page_data['data']['results']],
+                input.task_id,
+            )
+            data['new-items-links'] += sum(accepted.values())
+        else:
+            data['written-items'] = 0
+            # Вся страница проверяется до записи: при несовпадении схемы
+            # таск падает, ничего не записав
+            rows = [catalog_book(i) for i in page_data['data']['results']]
+
+            async with DbSamizdatPrisma() as db:
+                have_cover = await db.get_books_have_cover([book['url'] for book, _, _ in rows])
+
+                metrics_list = []
+                item_urls = []
+                for book, metrics, cover_url in rows:
+                    # Новой книге нужны поля, которые есть только на странице
+                    # (UPC, формат, рейтинг); без обложки - попытка достать её там
+                    if book['url'] not in have_cover or 'title' not in book or not (have_cover[book['url']] or cover_url):
+                        item_urls.append(book['url'])
+                        continue
+
+                    if not have_cover[book['url']]:
+                        if img_name := await save_cover(page, cover_url, timeout=20_000, referer=book['url']):
+                            book['coverImage'] = img_name
+
+                    await db.update_book(book)
+                    if len(metrics) > 1:
+                        metrics_list.append(metrics)
+                    data['written-items'] += 1
+
+                await db.create_metrics_many(metrics_list)
+
+            accepted = await MarvelComItem.crawl_many(item_urls, input.task_id)
+            data['new-items-links'] += sum(accepted.values())
+
         return Output(
             result='done',
             data=data,
@@ -219,6 +350,8 @@ class MarvelComListing(BaseLivelibWorkflow):
 
 
 if __name__ == '__main__':
+    catalog_book(CATALOG_SAMPLE)
+
     MarvelComListing.run_sync()
 
     MarvelComListing.debug_sync(MarvelComListing.start_urls[0])
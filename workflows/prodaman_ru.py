@@ -1,14 +1,18 @@
 import re
+from typing import ClassVar
 from urllib.parse import urljoin
 
-import dateparser
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
+from extract import Field
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
+PRODUCT = 'div[itemtype="http://schema.org/Product"]'
+
 
 class ProdamanItem(BaseLivelibWorkflow):
     name = 'livelib-prodaman-item'
@@ -20,124 +24,106 @@ class ProdamanItem(BaseLivelibWorkflow):
 
     concurrency = 25
 
+    # Страницы книг статичные: через httpx-сессию, браузер только для прогрева
+    static_fetch = True
+
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field(f'{PRODUCT} h1'),
+        'annotation': Field(f'{PRODUCT} div.blog-text', inner=True),
+        'cover': Field(f'{PRODUCT} img[itemprop="image"]', attr='src', url=True),
+        'category': Field(f'{PRODUCT} p.blog-info', has_text=r'Категории:', then='a', many=True),
+        'series': Field(f'{PRODUCT} p.blog-info', has_text=r'Из цикла:', then='a', many=True),
+        'tags': Field(f'{PRODUCT} p.blog-info', has_text=r'Хэштег:', then='a', many=True),
+        'date_release': Field(f'{PRODUCT} div.ui-block-a', has_text=r'Дата размещения:', regex=r'\d{2}\.\d{2}\.\d{4}'),
+        'content_update_date': Field(f'{PRODUCT} div.ui-block-b', has_text=r'Дата обновления:', regex=r'\d{2}\.\d{2}\.\d{4}'),
+        'rating': Field(f'{PRODUCT} p.rating-title strong', regex=r'\d,\d{2}'),
+        'blog_info': Field(f'{PRODUCT} p.blog-info', many=True),
+        'price': Field(f'{PRODUCT} span[class$=-text] strong', regex=r'(\d+)\s+руб'),
+        'status_text': Field(f'{PRODUCT} span[class$=-text]'),
+    }
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
-        resp = await page.goto(input.url, wait_until='domcontentloaded')
+        doc = await cls.document(page, input.url)
 
-        if resp.status == 404 or '/books/' not in page.url:
+        if doc.status == 404 or '/books/' not in doc.url:
             async with DbSamizdatPrisma() as db:
-                await db.mark_book_deleted(page.url, cls.site)
-            return Output(result='error', data={'status': resp.status, 'error': 'invalid_url_or_404'})
+                await db.mark_book_deleted(doc.url, cls.site)
+            return Output(result='error', data={'status': doc.status, 'error': 'invalid_url_or_404'})
 
-        await page.wait_for_selector('div.ui-footer')
+        if not doc.css_first('div.ui-footer'):
+            raise Exception('ERROR: Page not loaded')
+
+        fields = doc.extract(cls.fields)
 
         async with DbSamizdatPrisma() as db:
-            book = {'url': page.url, 'source': cls.site}
-            metrics = {'bookUrl': page.url}
+            book = {'url': doc.url, 'source': cls.site}
+            metrics = {'bookUrl': doc.url}
 
             # Title
             # JS: $('div[itemtype="http://schema.org/Product"] h1').text()
-            title_locator = page.locator('div[itemtype="http://schema.org/Product"] h1')
-            book['title'] = (await title_locator.text_content()).strip() if await title_locator.count() > 0 else ''
+            book['title'] = (fields['title'] or '').strip()
 
-            if not await db.check_book_exist(page.url):
+            if not await db.check_book_exist(doc.url):
                 await db.create_book(book)
 
             # Authors
             # JS: $('div[itemtype="..."] a[data-widget-feisovet-author]')
-            authors_locator = page.locator('div[itemtype="http://schema.org/Product"] a[data-widget-feisovet-author]')
-            if await authors_locator.count() > 0:
-                book['author'] = ', '.join([
-                    (await a.text_content()).strip()
-                    for a in await authors_locator.all()
-                ])
-                book['authors_data'] = []
-                for a in await authors_locator.all():
-                    href = await a.get_attribute('href')
-                    text = await a.text_content()
-                    book['authors_data'].append({
-                        'name': text.strip(),
-                        'url': urljoin(page.url, href),
-                    })
+            if authors := doc.css(f'{PRODUCT} a[data-widget-feisovet-author]'):
+                book['author'] = ', '.join([a.text().strip() for a in authors])
+                book['authors_data'] = [
+                    {
+                        'name': a.text().strip(),
+                        'url': doc.absolute(a.attributes.get('href')),
+                    }
+                    for a in authors
+                ]
 
             # Annotation
             # JS: $('div[itemtype="..."] div.blog-text').text()
-            annotation_locator = page.locator('div[itemtype="http://schema.org/Product"] div.blog-text')
-            if await annotation_locator.count() > 0:
-                book['annotation'] = (await annotation_locator.first.inner_text()).strip()
+            if fields['annotation'] is not None:
+                book['annotation'] = fields['annotation'].strip()
 
             # Cover
             # JS: $('div[itemtype="..."] img[itemprop="image"]').attr('src')
-            if not await db.check_book_have_cover(page.url):
-                cover_locator = page.locator('div[itemtype="http://schema.org/Product"] img[itemprop="image"]')
-                if await cover_locator.count() > 0:
-                    if img_src := await cover_locator.get_attribute('src'):
-                        full_img_src = urljoin(page.url, img_src)
-                        if img_name := await save_cover(page, full_img_src):
-                            book['coverImage'] = img_name
+            if not await db.check_book_have_cover(doc.url):
+                if full_img_src := fields['cover']:
+                    if img_name := await save_cover(page, full_img_src):
+                        book['coverImage'] = img_name
 
             # Category
             # JS: $('div[itemtype="..."] p.blog-info:contains("Категории:") a')
-            category_locator = page.locator('div[itemtype="http://schema.org/Product"] p.blog-info').filter(
-                has_text=re.compile(r'Категории:')
-            ).locator('a')
-            if await category_locator.count() > 0:
-                book['category'] = [(await x.text_content()).strip() for x in await category_locator.all()]
+            if fields['category']:
+                book['category'] = [x.strip() for x in fields['category']]
 
             # Series
             # JS: $('div[itemtype="..."] p.blog-info:contains("Из цикла:") a')
-            series_locator = page.locator('div[itemtype="http://schema.org/Product"] p.blog-info').filter(
-                has_text=re.compile(r'Из цикла:')
-            ).locator('a')
-            if await series_locator.count() > 0:
-                book['series'] = [(await x.text_content()).strip() for x in await series_locator.all()]
+            if fields['series']:
+                book['series'] = [x.strip() for x in fields['series']]
 
             # Tags
             # JS: $('div[itemtype="..."] p.blog-info:contains("Хэштег:") a')
-            tags_locator = page.locator('div[itemtype="http://schema.org/Product"] p.blog-info').filter(
-                has_text=re.compile(r'Хэштег:')
-            ).locator('a')
-            if await tags_locator.count() > 0:
-                book['tags'] = [
-                    (await x.text_content()).replace('#', '').strip()
-                    for x in await tags_locator.all()
-                ]
+            if fields['tags']:
+                book['tags'] = [x.replace('#', '').strip() for x in fields['tags']]
 
             # Release Date & Content Update Date
             # JS: $('div[itemtype="..."] div:contains("Дата размещения:") strong').text().match(/\d{2}\.\d{2}.\d{4}/)
             # HTML: <div class=ui-block-a>Дата размещения: <strong>02.01.2026, 13:48</strong></div>
-            # filter(has_text) поднимается до ближайшего div, содержащего нужный текст — берём inner_text()
-            # самого div, а не спускаемся в strong (там нашлись бы и strong рейтинга и т.п.)
-            dates_block = page.locator('div[itemtype="http://schema.org/Product"] div.ui-block-a').filter(
-                has_text=re.compile(r'Дата размещения:')
-            )
-            if await dates_block.count() > 0:
-                release_text = await dates_block.inner_text()
-                if release_match := re.search(r'\d{2}\.\d{2}\.\d{4}', release_text):
-                    book['date_release'] = dateparser.parse(release_match.group(0), date_formats=['%d.%m.%Y'])
-
-            update_block = page.locator('div[itemtype="http://schema.org/Product"] div.ui-block-b').filter(
-                has_text=re.compile(r'Дата обновления:')
-            )
-            if await update_block.count() > 0:
-                update_text = await update_block.inner_text()
-                if update_match := re.search(r'\d{2}\.\d{2}\.\d{4}', update_text):
-                    metrics['content_update_date'] = dateparser.parse(update_match.group(0), date_formats=['%d.%m.%Y'])
+            # Берём текст самого div, а не спускаемся в strong (там нашлись бы и strong рейтинга и т.п.)
+            if release_date := fields['date_release']:
+                book['date_release'] = parse_date(release_date, date_formats=['%d.%m.%Y'])
+
+            if update_date := fields['content_update_date']:
+                metrics['content_update_date'] = parse_date(update_date, date_formats=['%d.%m.%Y'])
 
             # Rating
             # JS: $('div[itemtype="..."] p.rating-title strong').text().match(/\d,\d{2}/)
-            rating_locator = page.locator('div[itemtype="http://schema.org/Product"] p.rating-title strong').first
-            if await rating_locator.count() > 0:
-                if rating_match := re.search(r'\d,\d{2}', await rating_locator.text_content()):
-                    metrics['rating'] = rating_match.group(0)
+            if fields['rating'] is not None:
+                metrics['rating'] = fields['rating']
 
             # Shared blog-info text block for views/comments/added_to_lib/awards/pages/chars
             # JS: $('div[itemtype="..."] p.blog-info').text()  (called multiple times)
-            blog_info_locator = page.locator('div[itemtype="http://schema.org/Product"] p.blog-info')
-            blog_info_text = ''
-            if await blog_info_locator.count() > 0:
-                parts = [await el.text_content() for el in await blog_info_locator.all()]
-                blog_info_text = ' '.join(parts)
+            blog_info_text = ' '.join(fields['blog_info'])
 
             # Views
             # JS: .match(/(\d+)\s+просмотр/)
@@ -173,26 +159,21 @@ class ProdamanItem(BaseLivelibWorkflow):
 
             # Status Writing
             # JS: span.inprocess-text / span.full-text / span.notfull-text
-            if await page.locator('div[itemtype="http://schema.org/Product"] span.inprocess-text').count() > 0:
+            if doc.css_first(f'{PRODUCT} span.inprocess-text'):
                 metrics['status_writing'] = 'PROCESS'
-            elif await page.locator('div[itemtype="http://schema.org/Product"] span.full-text').count() > 0:
+            elif doc.css_first(f'{PRODUCT} span.full-text'):
                 metrics['status_writing'] = 'FINISH'
-            elif await page.locator('div[itemtype="http://schema.org/Product"] span.notfull-text').count() > 0:
+            elif doc.css_first(f'{PRODUCT} span.notfull-text'):
                 metrics['status_writing'] = 'STOP'
 
             # Price
             # JS: $('div[itemtype="..."] span[class$=-text] strong').text().match(/(\d+)\s+руб/)
-            price_locator = page.locator('div[itemtype="http://schema.org/Product"] span[class$=-text] strong')
-            if await price_locator.count() > 0:
-                price_text = await price_locator.text_content()
-                if price_match := re.search(r'(\d+)\s+руб', price_text):
-                    metrics['price'] = price_match.group(1)
+            if fields['price'] is not None:
+                metrics['price'] = fields['price']
 
             # In Subscribe
             # JS: $('div[itemtype="..."] span[class$=-text]').text().includes("подписк")
-            status_text_locator = page.locator('div[itemtype="http://schema.org/Product"] span[class$=-text]')
-            if await status_text_locator.count() > 0:
-                status_text = await status_text_locator.text_content()
+            if status_text := fields['status_text']:
                 if 'подписк' in status_text:
                     metrics['in_subscribe'] = True
 
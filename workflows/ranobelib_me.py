@@ -1,12 +1,14 @@
 import re
+from typing import ClassVar, Literal
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from dates import parse_date
+from lib_api import lib_task
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
@@ -19,8 +21,19 @@ class RanobelibItem(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
 
+    # Тайтл из api2 без рендера страницы; False - старый разбор страницы
+    api_item: ClassVar[bool] = True
+    site_id: ClassVar[int] = 3
+
+    @classmethod
+    def engine_for(cls, input: InputLivelibBook) -> Literal['browser', 'http']:
+        return 'http' if cls.api_item else 'browser'
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
+        if cls.engine_for(input) == 'http':
+            return await lib_task(cls, input, page, 'https://ranobelib.me')
+
         resp = await page.goto(input.url, wait_until='domcontentloaded')
 
         # JS: await page.waitForSelector("h1", { state: "attached" })
@@ -154,7 +167,7 @@ class RanobelibItem(BaseLivelibWorkflow):
             ).locator("span")
             if await release_year_locator.count() > 0:
                 if release_match := re.search(r'\d{4}', await release_year_locator.first.text_content()):
-                    book['date_release'] = dateparser.parse(release_match.group(0), date_formats=['%Y'])
+                    book['date_release'] = parse_date(release_match.group(0), date_formats=['%Y'])
 
             # Artwork type
             # JS: a[data-info-variant]:has(div:contains("Тип")) span -> .last()
@@ -295,6 +308,7 @@ class RanobelibListing(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
     item_wf = RanobelibItem
+    engine = 'http'
 
     concurrency = 1
     execution_timeout_sec = 600
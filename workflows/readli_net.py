@@ -1,12 +1,14 @@
 import re
+from typing import ClassVar
 from urllib.parse import urljoin
 
 from playwright.async_api import Page
-import dateparser
 
+from extract import Field
 from workflow_base import BaseLitresPartnersWorkflow, BaseLivelibWorkflow
 from interfaces import InputLivelibBook, InputLitresPartnersBook, Output, WorkerLabels
 from db import DbSamizdatPrisma, save_book_mongo
+from dates import parse_date
 from utils import save_cover
 
 class ReadliNet(BaseLitresPartnersWorkflow):
@@ -17,34 +19,30 @@ class ReadliNet(BaseLitresPartnersWorkflow):
     input = InputLitresPartnersBook
     output = Output
 
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field('h1'),
+        'author': Field('h1~a', many=True),
+        'links-download': Field('.download a.download__link[href^="/download.php"]', attr='href', url=True, many=True),
+        'links-litres': Field('.download a.download__link[href^="/getfile.php"]', attr='href', url=True, many=True),
+    }
+
     @classmethod
     async def task(cls, input: InputLitresPartnersBook, page: Page) -> Output:
-        await page.goto(
-            input.url,
-            wait_until='domcontentloaded',
-        )
-
-        await page.wait_for_selector('h1')
+        doc = await cls.document(page, input.url)
 
+        fields = doc.extract(cls.fields)
         book = {
-            'title': await page.text_content('h1'),
+            'title': fields['title'],
         }
 
-        author_locator = page.locator('h1~a')
-        if await author_locator.count() > 0:
-            book['author'] = ', '.join([await a.text_content() for a in await author_locator.all()])
+        if fields['author']:
+            book['author'] = ', '.join(fields['author'])
 
-        if links_download := await page.query_selector_all('.download a.download__link[href^="/download.php"]'):
-            book['links-download'] = [
-                urljoin(page.url, await l.get_attribute('href'))
-                for l in links_download
-            ]
+        if fields['links-download']:
+            book['links-download'] = fields['links-download']
 
-        if links_litres := await page.query_selector_all('.download a.download__link[href^="/getfile.php"]'):
-            book['links-litres'] = [
-                urljoin(page.url, await l.get_attribute('href'))
-                for l in links_litres
-            ]
+        if fields['links-litres']:
+            book['links-litres'] = fields['links-litres']
 
         await save_book_mongo(input, cls.site, book)
 
@@ -60,102 +58,77 @@ class ReadliNetItem(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
 
+    fields: ClassVar[dict[str, Field]] = {
+        'title': Field('h1'),
+        'series': Field('.book-info > p', has_text=r'Серия:|Серии:', then='a', many=True),
+        'category': Field('.book-info > p', has_text=r'Жанр:|Жанры:', then='a', many=True),
+        'date_release': Field('.book-sidebar .book-chars__item', has_text=r'Размещено ', regex=r'\d\d\.\d\d\.\d\d\d\d'),
+        'annotation': Field('.seo__content', inner=True),
+        'cover': Field('.book-image img', attr='src'),
+        'views': Field('.book-sidebar .rating-numbers__item_icon-1'),
+        'added_to_lib': Field('.book-sidebar .rating-numbers__item_icon-2'),
+        'comments': Field('.book-sidebar .rating-numbers__item_icon-3'),
+        'likes': Field('.book-sidebar .button-like__count'),
+        'rating': Field('.book-sidebar .rating-info__count'),
+        'pages_count': Field('.book-sidebar .button-pages__cols .button-pages__right', regex=r'\d+'),
+    }
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
-        resp = await page.goto(
-            input.url,
-            wait_until='domcontentloaded',
-            timeout=20_000,
-        )
-        if not (200 <= resp.status < 400):
+        doc = await cls.document(page, input.url)
+        if not doc.ok:
             return Output(
                 result='error',
-                data={'status': resp.status},
+                data={'status': doc.status},
             )
 
-        await page.wait_for_selector('h1')
+        fields = doc.extract(cls.fields)
 
         async with DbSamizdatPrisma() as db:
             book = {
-                'url': page.url,
+                'url': doc.url,
                 'source': cls.site,
             }
 
             metrics = {
-                'bookUrl': page.url,
+                'bookUrl': doc.url,
             }
 
-            if not await db.check_book_exist(page.url):
-                book['title'] = await page.text_content('h1')
+            if not await db.check_book_exist(doc.url):
+                book['title'] = fields['title']
                 await db.create_book(book)
 
-            authors_locator = page.locator('.main-info > a')
-            if await authors_locator.count() > 0:
-                book['author'] = ', '.join([await a.text_content() for a in await authors_locator.all()])
+            if authors := doc.css('.main-info > a'):
+                book['author'] = ', '.join([a.text() for a in authors])
                 # Все авторы с текстом и ссылками
-                book['authors_data'] = []
-                for a in await authors_locator.all():
-                    href = await a.get_attribute('href')
-                    text = await a.text_content()
-                    absolute_url = urljoin(page.url, href)
-
-                    book['authors_data'].append({
-                        'name': text.strip(),
-                        'url': absolute_url
-                    })
-
-            serie_locator = page.locator('.book-info > p').filter(
-                has_text=re.compile(r'Серия:|Серии:')
-            ).locator('a')
-            if await serie_locator.count() > 0:
-                book['series'] = [await s.text_content() for s in await serie_locator.all()]
-
-            genres_locator = page.locator('.book-info > p').filter(
-                has_text=re.compile(r'Жанр:|Жанры:')
-            ).locator('a')
-            if await genres_locator.count() > 0:
-                book['category'] = [await g.text_content() for g in await genres_locator.all()]
-
-            date_release_locator = page.locator('.book-sidebar .book-chars__item').filter(
-                has_text=re.compile(r'Размещено ')
-            )
-            if await date_release_locator.count() > 0:
-                date_release_str = await date_release_locator.text_content()
-                date_release_str = re.search(r'\d\d\.\d\d\.\d\d\d\d', date_release_str)[0]
-                book['date_release'] = dateparser.parse(date_release_str, languages=['ru'])
-
-            if annotation := await page.inner_text('.seo__content'):
-                book['annotation'] = re.sub(r'^АННОТАЦИЯ\n', '', annotation.strip()).strip()
-
-            if not await db.check_book_have_cover(page.url):
-                if img_src := await page.get_attribute('.book-image img', 'src', timeout=2_000):
-                    if img_name := await save_cover(page, img_src, timeout=10_000):
-                        book['coverImage'] = img_name
+                book['authors_data'] = [
+                    {
+                        'name': a.text().strip(),
+                        'url': doc.absolute(a.attributes.get('href')),
+                    }
+                    for a in authors
+                ]
 
-            views_locator = page.locator('.book-sidebar .rating-numbers__item_icon-1')
-            if await views_locator.count() > 0:
-                metrics['views'] = await views_locator.text_content()
+            if fields['series']:
+                book['series'] = fields['series']
 
-            added_to_lib_locator = page.locator('.book-sidebar .rating-numbers__item_icon-2')
-            if await added_to_lib_locator.count() > 0:
-                metrics['added_to_lib'] = await added_to_lib_locator.text_content()
+            if fields['category']:
+                book['category'] = fields['category']
 
-            comments_locator = page.locator('.book-sidebar .rating-numbers__item_icon-3')
-            if await comments_locator.count() > 0:
-                metrics['comments'] = await comments_locator.text_content()
+            if date_release_str := fields['date_release']:
+                book['date_release'] = parse_date(date_release_str, languages=['ru'])
 
-            likes_locator = page.locator('.book-sidebar .button-like__count')
-            if await likes_locator.count() > 0:
-                metrics['likes'] = await likes_locator.first.text_content()
+            if annotation := fields['annotation']:
+                book['annotation'] = re.sub(r'^АННОТАЦИЯ\n', '', annotation.strip()).strip()
 
-            rating_locator = page.locator('.book-sidebar .rating-info__count')
-            if await rating_locator.count() > 0:
-                metrics['rating'] = await rating_locator.text_content()
+            if not await db.check_book_have_cover(doc.url):
+                if img_src := fields['cover']:
+                    if img_name := await save_cover(page, img_src, timeout=10_000):
+                        book['coverImage'] = img_name
 
-            pages_count_locator = page.locator('.book-sidebar .button-pages__cols .button-pages__right')
-            if await pages_count_locator.count() > 0:
-                pages_count_str = await pages_count_locator.text_content()
-                metrics['pages_count'] = re.search(r'\d+', pages_count_str)[0]
+            for key in ('views', 'added_to_lib', 'comments', 'likes', 'rating', 'pages_count'):
+                if fields[key] is not None:
+                    metrics[key] = fields[key]
 
             await db.update_book(book)
             await db.create_metrics(metrics)
@@ -1,15 +1,92 @@
 import re
 from datetime import datetime
+from typing import ClassVar
 from urllib.parse import urljoin
 
 from furl import furl
 from playwright.async_api import Page
 
 from db import DbSamizdatPrisma
+from extract import Document, inner_text
 from interfaces import InputLivelibBook, Output
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
+TITLE_API = 'https://api.remanga.org/api/titles/{dir}/'
+
+WRITING_STATUS = {
+    "Закончен": "FINISH",
+    "Продолжается": "PROCESS",
+    "Заморожен": "PAUSE",
+    "Лицензировано": "LICENSE",
+    "Анонс": "ANNOUNCE",
+}
+# age_limit в API -> возраст, как на странице
+AGE_LIMITS = {1: 16, 2: 18}
+
+
+def title_book(content: dict) -> tuple[dict, dict, str | None]:
+    """Поля книги, метрики и обложка из ответа api/titles/<dir>/."""
+    book, metrics = {}, {}
+
+    if title := (content.get('rus_name') or content.get('main_name') or '').strip():
+        book['title'] = title
+
+    titles_other = [content.get('en_name') or ''] + (content.get('another_name') or '').split(' / ')
+    if titles_other := [t.strip() for t in titles_other if t.strip()]:
+        book['titles_other'] = titles_other
+
+    # Создатели есть не в каждом ответе, без них страница всё равно нужна
+    if authors := [a for a in content.get('authors') or content.get('creators') or [] if a.get('name')]:
+        book['author'] = ', '.join(a['name'].strip() for a in authors)
+        # Персоны в базе уникальны по url: без dir человек остаётся только в строке имён
+        if authors_data := [
+            {'name': a['name'].strip(), 'url': f"https://remanga.org/person/{a['dir']}"}
+            for a in authors if a.get('dir')
+        ]:
+            book['authors_data'] = authors_data
+
+    if publishers := [p for p in content.get('publishers') or [] if p.get('name')]:
+        book['publisher'] = ', '.join(p['name'].strip() for p in publishers)
+        if publishers_data := [
+            {'name': p['name'].strip(), 'url': f"https://remanga.org/team/{p['dir']}"}
+            for p in publishers if p.get('dir')
+        ]:
+            book['publishers_data'] = publishers_data
+
+    if description := content.get('description'):
+        book['annotation'] = inner_text(Document(description, 'https://remanga.org').tree.body)
+
+    if category := [g['name'] for g in content.get('genres') or []]:
+        book['category'] = category
+    if tags := [c['name'] for c in content.get('categories') or []]:
+        book['tags'] = tags
+
+    if year := content.get('issue_year'):
+        book['date_release'] = datetime(int(year), 1, 1)
+    if artwork_type := (content.get('type') or {}).get('name'):
+        book['artwork_type'] = artwork_type
+    if age_rating := AGE_LIMITS.get(content.get('age_limit')):
+        book['age_rating'] = age_rating
+
+    for key, field in (
+        ('avg_rating', 'rating'),
+        ('count_rating', 'votes'),
+        ('total_views', 'views'),
+        ('count_bookmarks', 'added_to_lib'),
+        ('total_votes', 'likes'),
+        ('count_chapters', 'chapters_count'),
+    ):
+        if content.get(key) is not None:
+            metrics[field] = str(content[key])
+
+    if status := WRITING_STATUS.get((content.get('status') or {}).get('name')):
+        metrics['status_writing'] = status
+
+    img = content.get('img') or {}
+    cover = img.get('high') or img.get('mid')
+    return book, metrics, urljoin('https://remanga.org', cover) if cover else None
+
 
 class RemangaOrgItem(BaseLivelibWorkflow):
     name = 'livelib-remanga-org-item'
@@ -19,8 +96,59 @@ class RemangaOrgItem(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
 
+    # Тайтл из api/titles/<dir>/; страница открывается, только если в API
+    # нет какого-то из `page_fields` или сам запрос не удался
+    api_item: ClassVar[bool] = True
+    page_fields: ClassVar[tuple[str, ...]] = ('author',)
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
+        if not cls.api_item:
+            return await cls.task_page(input, page)
+
+        dir = re.search(r'/manga/([^/?#]+)', input.url).group(1)
+        resp = await page.request.get(TITLE_API.format(dir=dir), headers={'referer': input.url})
+        if resp.status == 404:
+            async with DbSamizdatPrisma() as db:
+                await db.mark_book_deleted(input.url, cls.site)
+            return Output(result='error', data={'status': resp.status})
+        content = (await resp.json()).get('content') if resp.ok else None
+        if not content:
+            return await cls.task_page(input, page)
+
+        api_book, api_metrics, cover_url = title_book(content)
+        if any(f not in api_book and f not in api_metrics for f in cls.page_fields):
+            return await cls.task_page(input, page, api_book, api_metrics)
+
+        async with DbSamizdatPrisma() as db:
+            book = {'url': input.url, 'source': cls.site}
+            metrics = {'bookUrl': input.url} | api_metrics
+
+            if not await db.check_book_exist(input.url):
+                if 'title' in api_book:
+                    book['title'] = api_book['title']
+                await db.create_book(book)
+
+            book |= {k: v for k, v in api_book.items() if k != 'title'}
+
+            if cover_url and not await db.check_book_have_cover(input.url):
+                if img_name := await save_cover(page, cover_url, referer=input.url):
+                    book['coverImage'] = img_name
+
+            await db.update_book(book)
+            await db.create_metrics(metrics)
+
+            return Output(result='done', data={'book': book, 'metrics': metrics})
+
+    @classmethod
+    async def task_page(
+        cls,
+        input: InputLivelibBook,
+        page: Page,
+        api_book: dict | None = None,
+        api_metrics: dict | None = None,
+    ) -> Output:
+        """Разбор страницы тайтла. Поля из API, если есть, важнее страничных."""
         resp = await page.goto(input.url, wait_until='domcontentloaded')
 
         async with DbSamizdatPrisma() as db:
@@ -228,6 +356,9 @@ class RemangaOrgItem(BaseLivelibWorkflow):
                 elif status == "Нет переводчика":
                     metrics["status_translate"] = "STOP"
 
+            book |= {k: v for k, v in (api_book or {}).items() if k != 'title'}
+            metrics |= api_metrics or {}
+
             await db.update_book(book)
             await db.create_metrics(metrics)
 
@@ -243,6 +374,7 @@ class RemangaOrgListing(BaseLivelibWorkflow):
     input = InputLivelibBook
     output = Output
     item_wf = RemangaOrgItem
+    engine = 'http'
 
     concurrency=3
     execution_timeout_sec=1800
@@ -1,18 +1,68 @@
-import asyncio
+import hashlib
 import re
 from datetime import datetime
 from random import randint
+from typing import Any, Literal
 from urllib.parse import urljoin
 
+from furl import furl
 from playwright.async_api import Page
-from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output
+from network import ResponseCapture
+from structured import structured
 from utils import save_cover
 from workflow_base import BaseLivelibWorkflow
 
 
+SITE = 'https://stroki.mts.ru'
+SEARCH_API = 'https://stroki.mts.ru/api/books/search'
+
+# Параметры пагинации api/books/search
+PAGE_PARAMS = ('page', 'pageNumber', 'pageNum')
+OFFSET_PARAMS = ('offset', 'from', 'skip')
+LIMIT_PARAMS = ('limit', 'size', 'pageSize', 'count')
+
+# Ссылка на книгу, аудиокнигу или комикс, абсолютная или от корня сайта
+BOOK_PATH = re.compile(r'^(https://stroki\.mts\.ru)?/(book|audiobook|comics)/[\w-]+')
+
+
+def search_limit(url: str) -> int | None:
+    """Размер страницы из запроса api/books/search, если он там указан."""
+    f = furl(url)
+    return next((int(f.args[n]) for n in LIMIT_PARAMS if str(f.args.get(n, '')).isdigit()), None)
+
+
+def next_search_url(url: str) -> str | None:
+    """Та же выдача api/books/search со следующей страницы.
+
+    Номер страницы увеличивается на 1, смещение - на размер страницы из
+    запроса. None, если нет ни номера страницы, ни смещения с размером.
+    """
+    f = furl(url)
+    for name in PAGE_PARAMS:
+        if str(f.args.get(name, '')).isdigit():
+            f.args[name] = int(f.args[name]) + 1
+            return f.url
+    for name in OFFSET_PARAMS:
+        if str(f.args.get(name, '')).isdigit() and (step := search_limit(url)):
+            f.args[name] = int(f.args[name]) + step
+            return f.url
+    return None
+
+
+def book_paths(payload: Any) -> list[str]:
+    """Ссылки на книги в ответе api/books/search, где бы в нём они ни лежали."""
+    if isinstance(payload, str):
+        return [payload] if BOOK_PATH.search(payload) else []
+    if isinstance(payload, dict):
+        payload = list(payload.values())
+    if isinstance(payload, list):
+        return [path for item in payload for path in book_paths(item)]
+    return []
+
+
 class StrokiMtsItem(BaseLivelibWorkflow):
     name = 'livelib-stroki-mts-item'
     event = 'livelib:stroki-mts-item'
@@ -26,7 +76,8 @@ class StrokiMtsItem(BaseLivelibWorkflow):
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
         resp = await page.goto(input.url, wait_until='domcontentloaded')
-        await page.wait_for_timeout(3000)
+        # Приложение дорисовывает страницу или уводит на not-found после загрузки
+        await cls.wait_quiet(page, cap_ms=3_000, replaces_ms=3_000)
 
         if resp.status == 404 or page.url == "https://stroki.mts.ru/not-found":
             async with DbSamizdatPrisma() as db:
@@ -52,6 +103,14 @@ class StrokiMtsItem(BaseLivelibWorkflow):
             if not await db.check_book_exist(page.url):
                 await db.create_book(book)
 
+            # JSON-LD и microdata страницы, DOM ниже дописывает недостающее.
+            # Цену оставляем DOM: там учтены подписка и бесплатные книги
+            ld_metrics = {}
+            cover_url = (await structured(page)).fill(book, ld_metrics, page.url)
+            for key in ('rating', 'votes'):
+                if key in ld_metrics:
+                    metrics[key] = ld_metrics[key]
+
             # Original Title
             title_original_locator = page.locator("book-body-description-widget-item").filter(
                 has=page.locator("div.title").filter(has_text=re.compile(r"^\s*название на языке оригинала\s*$", re.I))
@@ -60,36 +119,40 @@ class StrokiMtsItem(BaseLivelibWorkflow):
                 book['title_original'] = await title_original_locator.first.inner_text()
 
             # Authors
-            authors_locator = page.locator("authors-links.in-detail-content a.author-link")
-            if await authors_locator.count() > 0:
-                author_elements = await authors_locator.all()
-                book['author'] = ', '.join([await a.text_content() for a in author_elements]).strip()
-
-                book['authors_data'] = []
-                for a in author_elements:
-                    href = await a.get_attribute('href')
-                    text = await a.text_content()
-                    book['authors_data'].append({
-                        'name': text.strip(),
-                        'url': urljoin(page.url, href)
-                    })
+            if 'authors_data' not in book:
+                authors_locator = page.locator("authors-links.in-detail-content a.author-link")
+                if await authors_locator.count() > 0:
+                    author_elements = await authors_locator.all()
+                    book['author'] = ', '.join([await a.text_content() for a in author_elements]).strip()
+
+                    book['authors_data'] = []
+                    for a in author_elements:
+                        href = await a.get_attribute('href')
+                        text = await a.text_content()
+                        book['authors_data'].append({
+                            'name': text.strip(),
+                            'url': urljoin(page.url, href)
+                        })
 
             # Annotation
-            annotation_locator = page.locator("p.multi-card-description-content__text")
-            if await annotation_locator.count() > 0:
-                texts = [await p.inner_text() for p in await annotation_locator.all()]
-                annotation = "\n".join([t.strip() for t in texts if t.strip()])
-                if annotation:
-                    book['annotation'] = annotation
+            if 'annotation' not in book:
+                annotation_locator = page.locator("p.multi-card-description-content__text")
+                if await annotation_locator.count() > 0:
+                    texts = [await p.inner_text() for p in await annotation_locator.all()]
+                    annotation = "\n".join([t.strip() for t in texts if t.strip()])
+                    if annotation:
+                        book['annotation'] = annotation
 
             # Cover
             if not await db.check_book_have_cover(page.url):
-                cover_locator = page.locator("cover.detail-contents-cover img")
-                if await cover_locator.count() > 0:
-                    if img_src := await cover_locator.first.get_attribute('src'):
-                        full_img_src = urljoin(page.url, img_src)
-                        if img_name := await save_cover(page, full_img_src):
-                            book['coverImage'] = img_name
+                if not cover_url:
+                    cover_locator = page.locator("cover.detail-contents-cover img")
+                    if await cover_locator.count() > 0:
+                        if img_src := await cover_locator.first.get_attribute('src'):
+                            cover_url = urljoin(page.url, img_src)
+                if cover_url:
+                    if img_name := await save_cover(page, cover_url):
+                        book['coverImage'] = img_name
 
             # Category
             category_locator = page.locator("div.genre-wrapper badge-pill")
@@ -161,18 +224,20 @@ class StrokiMtsItem(BaseLivelibWorkflow):
                     metrics['duration'] = hours * 3600 + minutes * 60
 
             # Rating
-            rating_locator = page.locator('stroki-raiting [itemprop="ratingValue"]')
-            if await rating_locator.count() > 0:
-                if rating_match := re.search(r'[\d\.]+', await rating_locator.first.text_content()):
-                    if rating_match.group(0) != "0":
-                        metrics['rating'] = rating_match.group(0)
+            if 'rating' not in metrics:
+                rating_locator = page.locator('stroki-raiting [itemprop="ratingValue"]')
+                if await rating_locator.count() > 0:
+                    if rating_match := re.search(r'[\d\.]+', await rating_locator.first.text_content()):
+                        if rating_match.group(0) != "0":
+                            metrics['rating'] = rating_match.group(0)
 
             # Votes
-            votes_locator = page.locator('stroki-raiting [itemprop="ratingCount"]')
-            if await votes_locator.count() > 0:
-                if votes_match := re.search(r'\d+', await votes_locator.first.text_content()):
-                    if votes_match.group(0) != "0":
-                        metrics['votes'] = votes_match.group(0)
+            if 'votes' not in metrics:
+                votes_locator = page.locator('stroki-raiting [itemprop="ratingCount"]')
+                if await votes_locator.count() > 0:
+                    if votes_match := re.search(r'\d+', await votes_locator.first.text_content()):
+                        if votes_match.group(0) != "0":
+                            metrics['votes'] = votes_match.group(0)
 
             # Price
             # price_locator = page.locator("offer-buttons stroki-button.stroki-btn-primary p.button-price")
@@ -258,8 +323,16 @@ class StrokiMtsListing(BaseLivelibWorkflow):
         "https://stroki.mts.ru/collection/novinki-2513"
     ]
 
+    @classmethod
+    def engine_for(cls, input: InputLivelibBook) -> Literal['browser', 'http']:
+        # Страницы api/books/search - просто JSON, браузер нужен только жанрам
+        return 'http' if SEARCH_API in input.url else 'browser'
+
     @classmethod
     async def task(cls, input: InputLivelibBook, page: Page) -> Output:
+        if SEARCH_API in input.url:
+            return await cls.search_page(input, page)
+
         stats = {'new-page-links': 0, 'new-items-links': 0}
 
         await page.set_viewport_size({
@@ -267,59 +340,25 @@ class StrokiMtsListing(BaseLivelibWorkflow):
             "height": randint(950,1080),
         })
 
-        await page.goto(input.url, wait_until='domcontentloaded')
-        await page.wait_for_selector("page-title h1")
-        await page.wait_for_timeout(2000)
-
-        more_button_locator = page.locator('.more stroki-button span.text')
-        book_urls_done = []
-        while True:
-            book_urls_new = []
-            # Сбор книг во время скролла списка
-            book_links =  page.locator("a.content-name")
-            for link in await book_links.all():
-                if href := await link.get_attribute('href'):
-                    book_url = urljoin(page.url, href)
-                    if '/book/' in book_url or '/audiobook/' in book_url or '/comics/' in book_url:
-                        if book_url not in book_urls_done:
-                            book_urls_new.append(book_url)
-                            if await StrokiMtsItem.crawl(book_url, input.task_id):
-                                stats['new-items-links'] += 1
-            book_urls_new = list(set(book_urls_new))
-            if book_urls_new:
-                book_urls_done.extend(book_urls_new)
-                try:
-                    async with page.expect_response(
-                        lambda res: res.url == 'https://stroki.mts.ru/api/books/search',
-                        timeout=7000,
-                    ) as resp:
-                        # Скроллим к футеру
-                        await page.locator('.footer-application').focus()
-                        print('scroll')
-
-                        # Жмем кнопку если она есть
-                        if await more_button_locator.count() > 0 and await more_button_locator.first.is_visible():
-                            await more_button_locator.first.click()
-
-                except (PlaywrightTimeoutError, asyncio.TimeoutError):
-                    pass
-
-                await page.wait_for_timeout(500)
-
-                # await page.wait_for_timeout(2000)
-
+        # Первая страница списка приходит из api/books/search: дальше листаем
+        # сам API, каждая страница - отдельный таск с курсором в URL
+        async with cls.capture(page, search=SEARCH_API) as captured:
+            async with cls.wait_xhr(page, SEARCH_API, timeout=15_000) as search:
+                await page.goto(input.url, wait_until='domcontentloaded')
+            await page.wait_for_selector("page-title h1")
+
+            request = search.response.request if search.ok else None
+            if (
+                request and request.method == 'GET'
+                and next_search_url(request.url) and search_limit(request.url)
+                and book_paths(await captured.json('search', timeout=5_000))
+            ):
+                if await cls.crawl(request.url, input.task_id):
+                    stats['new-page-links'] += 1
             else:
-                break
-
-            # try:
-            #     more_button = page.locator("div.more stroki-button")
-            #     if await more_button.count() > 0 and await more_button.is_visible():
-            #         await more_button.click(timeout=5000)
-            #         await page.wait_for_timeout(2000)
-            #     else:
-            #         break
-            # except Exception:
-            #     break
+                # Запрос не GET, без пагинации и размера страницы или ссылки на
+                # книги из ответа не достаются - листаем как раньше
+                stats['new-items-links'] += await cls.scroll_listing(input, page, captured)
 
         # Сбор жанров
         genre_links = await page.locator("genre-tree a").all()
@@ -331,6 +370,76 @@ class StrokiMtsListing(BaseLivelibWorkflow):
 
         return Output(result='done', data=stats)
 
+    @classmethod
+    async def search_page(cls, input: InputLivelibBook, page: Page) -> Output:
+        """Одна страница api/books/search: книги и таск на следующую страницу.
+
+        Повтор упавшего таска начинается с этой же страницы, а не с начала
+        жанра. Следующая ставится, только пока страница полная и не
+        повторяет предыдущую: API может за концом выдачи не отдавать пустую
+        страницу, а повторять последнюю.
+        """
+        stats = {'new-page-links': 0, 'new-items-links': 0}
+
+        resp = await page.request.get(input.url)
+        if not resp.ok:
+            raise Exception(f'api/books/search {resp.status}')
+
+        paths = book_paths(await resp.json())
+        accepted = await StrokiMtsItem.crawl_many([urljoin(SITE, path) for path in paths], input.task_id)
+        stats['new-items-links'] += sum(accepted.values())
+
+        # Конец выдачи: пустая, неполная или та же, что предыдущая, страница
+        limit = search_limit(input.url)
+        page_hash = hashlib.md5('\n'.join(sorted(set(paths))).encode()).hexdigest()
+        full = limit and len(set(paths)) >= limit and page_hash != input.prev_page
+        if full and (next_url := next_search_url(input.url)):
+            if await cls.crawl(next_url, input.task_id, prev_page=page_hash):
+                stats['new-page-links'] += 1
+
+        return Output(result='done', data=stats)
+
+    @classmethod
+    async def scroll_listing(cls, input: InputLivelibBook, page: Page, captured: ResponseCapture) -> int:
+        """Прокрутка списка кнопкой "ещё", если API не удалось листать напрямую."""
+        new_items = 0
+        more_button_locator = page.locator('.more stroki-button span.text')
+        book_urls_done = set()
+        while True:
+            await captured.settled()
+            book_urls = {
+                urljoin(page.url, path)
+                for body in captured.take('search')
+                for path in book_paths(body)
+            }
+            if not book_urls:
+                # Ответ не разобрался или пришёл до подписки - из DOM
+                hrefs = await page.eval_on_selector_all(
+                    "a.content-name",
+                    "els => els.map(e => e.getAttribute('href'))",
+                )
+                book_urls = {urljoin(page.url, h) for h in hrefs if h}
+
+            book_urls_new = [
+                u for u in book_urls
+                if BOOK_PATH.search(u) and u not in book_urls_done
+            ]
+            if not book_urls_new:
+                return new_items
+
+            for book_url in book_urls_new:
+                if await StrokiMtsItem.crawl(book_url, input.task_id):
+                    new_items += 1
+            book_urls_done.update(book_urls_new)
+
+            async with cls.wait_xhr(page, SEARCH_API, timeout=7_000, replaces_ms=500):
+                # Скроллим к футеру
+                await page.locator('.footer-application').focus()
+
+                # Жмем кнопку если она есть
+                if await more_button_locator.count() > 0 and await more_button_locator.first.is_visible():
+                    await more_button_locator.first.click()
+
 if __name__ == '__main__':
     # StrokiMtsListing.run_sync()
     # StrokiMtsListing.run_cron_sync()
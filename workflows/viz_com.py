@@ -3,11 +3,11 @@ from urllib.parse import urljoin
 
 from hatchet_sdk.clients.rest.models.worker import WorkerLabel
 from playwright.async_api import Page
-import dateparser
 
 from workflow_base import BaseLivelibWorkflow
 from interfaces import InputLivelibBook, Output, WorkerLabels
 from db import DbSamizdatPrisma
+from dates import parse_date
 from utils import save_cover
 
 
@@ -157,7 +157,7 @@ class VizComItem(BaseLivelibWorkflow):
             )
             if await date_release_locator.count() > 0:
                 date_release = await date_release_locator.inner_text()
-                book['date_release'] = dateparser.parse(date_release.replace('Release', ''))
+                book['date_release'] = parse_date(date_release.replace('Release', ''))
 
             if not await db.check_book_have_cover(page.url):
                 if img_src := await page.get_attribute('.product-image img', 'src', timeout=2_000):
@@ -2,7 +2,6 @@ import logging
 
 from hatchet_sdk import ClientConfig, Hatchet, PushEventOptions, V1TaskStatus
 from playwright.async_api import Page
-from pymongo import AsyncMongoClient
 
 import settings
 from interfaces import InputSeLtrs, Output
@@ -27,6 +26,8 @@ class YandexLtrs(BaseLtrsSeWorkflow):
     output = Output
 
     concurrency=3
+    # капчу решает аддон, ему нужны картинки
+    block_resources = {}
 
     sources = [
         'topliba.com',
@@ -63,6 +64,8 @@ class YandexLtrs(BaseLtrsSeWorkflow):
         if not results:
             raise Exception('no results')
 
+        from pymongo import AsyncMongoClient
+
         client = AsyncMongoClient(settings.MONGO_URI)
         col = client['ltrs']['yandex']
 
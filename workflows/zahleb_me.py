@@ -2,14 +2,15 @@ import re
 from typing import Literal
 from urllib.parse import urljoin
 
-import dateparser
 from furl import furl
 from playwright.async_api import Page
 
 import settings
 from db import DbSamizdatPrisma
 from interfaces import InputLivelibBook, Output, WorkerLabels
-from utils import save_cover, sitemap
+from structured import structured
+from dates import parse_date
+from utils import iter_sitemap, save_cover
 from workflow_base import BaseLivelibWorkflow
 
 
@@ -38,7 +39,7 @@ class ZahlebMeItem(BaseLivelibWorkflow):
             return Output(result='error', data={'status': resp.status, 'error_page': await error_title_locator.is_visible()})
 
         await page.wait_for_selector('h2.ant-typography')
-        await page.wait_for_timeout(2_000)
+        await cls.wait_quiet(page, cap_ms=2_000, replaces_ms=2_000)
 
         age_checkbox_locator = page.locator('.ant-modal-body .ant-checkbox')
         if await age_checkbox_locator.count() > 0:
@@ -64,27 +65,31 @@ class ZahlebMeItem(BaseLivelibWorkflow):
                 book['title'] = await page.text_content('h2.ant-typography')
                 await db.create_book(book)
 
-            authors_locator = page.locator('a[class*="StoryInfoAuthor_author_name"]')
-            if await authors_locator.count() > 0:
-                authors_str_list = [
-                    re.sub(r'^соавтор\s+|\,\s+|\s+$|^\s+', '', await a.text_content())
-                    for a in await authors_locator.all()
-                ]
-                book['author'] = ', '.join([a for a in authors_str_list if not a.startswith('бета ')])
-                # Все авторы с текстом и ссылками
-                book['authors_data'] = []
-                for a in await authors_locator.all():
-                    href = await a.get_attribute('href')
-                    text = re.sub(r'^соавтор\s+|\,\s+|\s+$|^\s+', '', await a.text_content())
-                    if text.startswith('бета '):
-                        continue
-
-                    absolute_url = urljoin(page.url, href)
-
-                    book['authors_data'].append({
-                        'name': text.strip(),
-                        'url': absolute_url
-                    })
+            # JSON-LD и microdata страницы, DOM ниже дописывает недостающее
+            cover_url = (await structured(page)).fill(book, metrics, page.url)
+
+            if 'authors_data' not in book:
+                authors_locator = page.locator('a[class*="StoryInfoAuthor_author_name"]')
+                if await authors_locator.count() > 0:
+                    authors_str_list = [
+                        re.sub(r'^соавтор\s+|\,\s+|\s+$|^\s+', '', await a.text_content())
+                        for a in await authors_locator.all()
+                    ]
+                    book['author'] = ', '.join([a for a in authors_str_list if not a.startswith('бета ')])
+                    # Все авторы с текстом и ссылками
+                    book['authors_data'] = []
+                    for a in await authors_locator.all():
+                        href = await a.get_attribute('href')
+                        text = re.sub(r'^соавтор\s+|\,\s+|\s+$|^\s+', '', await a.text_content())
+                        if text.startswith('бета '):
+                            continue
+
+                        absolute_url = urljoin(page.url, href)
+
+                        book['authors_data'].append({
+                            'name': text.strip(),
+                            'url': absolute_url
+                        })
 
             genres_locator = page.locator('[class^="StoryInfo_container"] a[href*="/category/"]')
             if await genres_locator.count() > 0:
@@ -96,29 +101,31 @@ class ZahlebMeItem(BaseLivelibWorkflow):
 
             date_release_locator = page.locator('[class^="LatestEpisodeReleaseTag_tag_content"]')
             if await date_release_locator.count() > 0:
-                book['date_release'] = dateparser.parse(await date_release_locator.last.text_content())
+                book['date_release'] = parse_date(await date_release_locator.last.text_content())
 
             dates_locator = page.locator('.ant-list-item-meta-description .ant-space-item:nth-of-type(2)')
             if await dates_locator.count() > 0:
                 date_release_str = await dates_locator.first.text_content()
-                book['date_release'] = dateparser.parse(date_release_str, languages=['ru'])
+                book['date_release'] = parse_date(date_release_str, languages=['ru'])
 
                 date_updated_str = await dates_locator.last.text_content()
-                metrics['content_update_date'] = dateparser.parse(date_updated_str, languages=['ru'])
+                metrics['content_update_date'] = parse_date(date_updated_str, languages=['ru'])
 
 
             age_rating_locator = page.locator('div[class^="StoryInfo_container"] div[class^="StoryInfo_storyCover"] .ant-avatar-string')
             if await age_rating_locator.count() > 0:
                 book['age_rating'] = re.search(r'\d+', await age_rating_locator.text_content())[0]
 
-            if annotation := await page.inner_text('[class*="StoryInfo_description"]'):
-                book['annotation'] = annotation
+            if 'annotation' not in book:
+                if annotation := await page.inner_text('[class*="StoryInfo_description"]'):
+                    book['annotation'] = annotation
 
             if not await db.check_book_have_cover(page.url):
                 img_cover_locator = page.locator('div[class^="StoryInfo_container"] img[class^="StoryInfoCoverImage_storyCoverImageMain"]')
-                if await img_cover_locator.count() > 0:
-                    img_src = await img_cover_locator.get_attribute('src', timeout=2_000)
-                    if img_name := await save_cover(page, img_src, timeout=10_000):
+                if not cover_url and await img_cover_locator.count() > 0:
+                    cover_url = await img_cover_locator.get_attribute('src', timeout=2_000)
+                if cover_url:
+                    if img_name := await save_cover(page, cover_url, timeout=10_000):
                         book['coverImage'] = img_name
 
             views_locator = page.locator('[class^="StoryCounter_storyCounter"]').filter(
@@ -170,9 +177,8 @@ class ZahlebMeListing(ZahlebMeItem):
         if settings.DEBUG:
             return
 
-        cls.start_urls = [url for url in sitemap('https://zahleb.me') if '/story/' in url]
-        print('books in sitemap:', len(cls.start_urls))
-        await super().run()
+        stories = (url async for url in iter_sitemap('https://zahleb.me') if '/story/' in url)
+        await super().run(user_check, stories)
 
 if __name__ == '__main__':
     ZahlebMeListing.run_sync()